@@ -0,0 +1,92 @@
+"""
+Benchmark of cold start, i.e. time of fresh Python process to import what a command needs (every cron job is a new process).
+
+    python -m benchmarks.import_time --output result.json
+    python -m benchmarks.import_time --baseline result.json
+
+Scenarios are run by `python -X importtime` so the slowest imported modules are reported as well.
+"""
+
+import json
+import subprocess
+import sys
+from statistics import median
+from time import perf_counter
+
+import click
+
+SCENARIOS = {
+    "cli": "import gold_digger.__main__",
+    "update": "from gold_digger import di_container; di = di_container('benchmark'); di.exchange_rate_manager",
+    "api": "import gold_digger.api_server.app",
+}
+
+
+def _run(code):
+    """
+    :type code: str
+    :return: wall time of the process & cumulative import times (microseconds) of top-level modules
+    :rtype: tuple[float, dict[str, int]]
+    """
+    start = perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    elapsed = perf_counter() - start
+
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)
+    return elapsed, modules
+
+
+def _measure(code, repeat, top):
+    """
+    :type code: str
+    :type repeat: int
+    :type top: int
+    :rtype: dict[str, float | dict[str, int]]
+    """
+    runs = [_run(code) for _ in range(repeat)]
+    _, modules = runs[-1]
+    return {
+        "seconds": median(elapsed for elapsed, _ in runs),
+        "import_seconds": median(sum(modules.values()) for _, modules in runs) / 1e6,
+        "slowest_modules": dict(sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]),
+    }
+
+
+@click.command(help="Benchmark cold start of gold-digger commands")
+@click.option("--repeat", default=5, help="Runs of every scenario, median is reported.")
+@click.option("--top", default=5, help="Number of the slowest top-level imports reported.")
+@click.option("--output", type=click.Path(dir_okay=False), help="Store results as JSON (e.g. as a baseline).")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), help="Fail if a scenario is slower than in the baseline.")
+@click.option("--max-regression", default=0.2, help="Allowed slowdown against the baseline.")
+def main(**kwargs):
+    """
+    Benchmark cold start of gold-digger commands.
+    """
+    results = {name: _measure(code, kwargs["repeat"], kwargs["top"]) for name, code in SCENARIOS.items()}
+
+    click.echo(json.dumps(results, indent=2))
+    if kwargs["output"]:
+        with open(kwargs["output"], "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if kwargs["baseline"]:
+        with open(kwargs["baseline"], encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = [
+            f"{name}: {result['seconds']:.3f}s (baseline {baseline[name]['seconds']:.3f}s)"
+            for name, result in results.items()
+            if name in baseline and result["seconds"] > baseline[name]["seconds"] * (1 + kwargs["max_regression"])
+        ]
+        if regressions:
+            click.echo("Regressions:\n" + "\n".join(regressions), err=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
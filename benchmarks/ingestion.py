@@ -0,0 +1,139 @@
+"""
+Offline benchmark of rates ingestion (`update` & `update-all`) against the stub server replaying recorded provider exchanges.
+
+Record an archive on a machine with network access:
+
+    GOLD_DIGGER_PROVIDER_HTTP_RECORD_ARCHIVE=exchanges.json python -m gold_digger update --date 2019-04-15
+    GOLD_DIGGER_PROVIDER_HTTP_RECORD_ARCHIVE=exchanges.json python -m gold_digger update-all --origin-date 2019-04-01
+
+and run the benchmark anywhere. The archive remembers when it was recorded and the benchmark runs with the time pinned to it,
+so the same requests are sent whatever day it runs (record both scenarios on the same day).
+Tables of the configured database are dropped & created before every run, so every run does the same work.
+Use a dedicated database:
+
+    python -m benchmarks.ingestion --archive exchanges.json --date 2019-04-15 --origin-date 2019-04-01 --output result.json
+    python -m benchmarks.ingestion --archive exchanges.json --date 2019-04-15 --origin-date 2019-04-01 --baseline result.json
+
+The benchmark fails if any request is not recorded in the archive, results of such run are not comparable.
+"""
+
+import json
+import sys
+from statistics import median
+from time import perf_counter
+
+import click
+
+from gold_digger import di_container, settings
+from gold_digger.data_providers import ExchangeArchive, StubServer
+from gold_digger.database.db_model import Base
+from gold_digger.utils.clock import pin_time
+
+
+def _run(server, scenario):
+    """
+    Run the scenario with new DI container and empty tables, so every run starts with cold in-memory caches of providers
+    and requests the same rates.
+
+    :type server: gold_digger.data_providers.StubServer
+    :type scenario: (gold_digger.di.DiContainer, gold_digger.utils.ContextLogger) -> None
+    :rtype: tuple[float, int]
+    """
+    requests_before = server.requests
+    with di_container(__file__) as di:
+        Base.metadata.drop_all(di.db_connection)
+        Base.metadata.create_all(di.db_connection)
+        start = perf_counter()
+        scenario(di, di.logger())
+        elapsed = perf_counter() - start
+    return elapsed, server.requests - requests_before
+
+
+def _measure(server, scenario, repeat):
+    """
+    :type server: gold_digger.data_providers.StubServer
+    :type scenario: (gold_digger.di.DiContainer, gold_digger.utils.ContextLogger) -> None
+    :type repeat: int
+    :rtype: dict[str, float]
+    """
+    runs = [_run(server, scenario) for _ in range(repeat)]
+    elapsed = median(run[0] for run in runs)
+    requests = median(run[1] for run in runs)
+    return {
+        "seconds": elapsed,
+        "requests": requests,
+        "requests_per_second": requests / elapsed if elapsed else 0.0,
+    }
+
+
+def _regressions(results, baseline, max_regression):
+    """
+    :type results: dict[str, dict[str, float]]
+    :type baseline: dict[str, dict[str, float]]
+    :type max_regression: float
+    :rtype: list[str]
+    """
+    regressions = []
+    for name, result in results.items():
+        baseline_seconds = baseline.get(name, {}).get("seconds")
+        if baseline_seconds and result["seconds"] > baseline_seconds * (1 + max_regression):
+            regressions.append(f"{name}: {result['seconds']:.3f}s (baseline {baseline_seconds:.3f}s)")
+    return regressions
+
+
+@click.command(help="Benchmark rates ingestion against recorded provider exchanges")
+@click.option("--archive", required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--date", "date_of_exchange", required=True, type=click.DateTime(["%Y-%m-%d"]), help="Date of `update` scenario.")
+@click.option("--origin-date", required=True, type=click.DateTime(["%Y-%m-%d"]), help="Origin date of `update-all` scenario.")
+@click.option("--repeat", default=3, help="Runs of every scenario, median is reported.")
+@click.option("--latency", default=0.0, help="Simulated latency of providers in seconds.")
+@click.option("--error-rate", default=0.0, help="Ratio of provider requests failing with 503.")
+@click.option("--output", type=click.Path(dir_okay=False), help="Store results as JSON (e.g. as a baseline).")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), help="Fail if a scenario is slower than in the baseline.")
+@click.option("--max-regression", default=0.2, help="Allowed slowdown against the baseline.")
+def main(**kwargs):
+    """
+    Benchmark rates ingestion against recorded provider exchanges.
+    """
+    date_of_exchange = kwargs["date_of_exchange"].date()
+    origin_date = kwargs["origin_date"].date()
+    archive = ExchangeArchive.load(kwargs["archive"])
+
+    with pin_time(archive.recorded_at), StubServer(archive, latency=kwargs["latency"], error_rate=kwargs["error_rate"], seed=0) as server:
+        settings.PROVIDER_HTTP_REPLAY_URL = server.url
+        settings.PROVIDER_HTTP_RECORD_ARCHIVE = None
+        settings.PROVIDER_HTTP_CACHE_DIR = None
+
+        results = {
+            "update": _measure(
+                server,
+                lambda di, logger: di.exchange_rate_manager.update_all_rates_by_date(date_of_exchange, list(di.data_providers.values()), logger),
+                kwargs["repeat"],
+            ),
+            "update-all": _measure(
+                server,
+                lambda di, logger: di.exchange_rate_manager.update_all_historical_rates(origin_date, logger),
+                kwargs["repeat"],
+            ),
+        }
+        results["meta"] = {"recorded_at": archive.recorded_at.isoformat(), "not_recorded_requests": server.misses}
+
+    click.echo(json.dumps(results, indent=2))
+    if server.misses:
+        click.echo(f"{server.misses} requests are not recorded in the archive, results are not comparable.", err=True)
+        sys.exit(1)
+
+    if kwargs["output"]:
+        with open(kwargs["output"], "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if kwargs["baseline"]:
+        with open(kwargs["baseline"], encoding="utf-8") as baseline_file:
+            regressions = _regressions({name: results[name] for name in ("update", "update-all")}, json.load(baseline_file), kwargs["max_regression"])
+        if regressions:
+            click.echo("Regressions:\n" + "\n".join(regressions), err=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
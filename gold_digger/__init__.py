@@ -1,12 +1,10 @@
-from .di import DiContainer as _DiContainer
-
-
 def di_container(main_file_path):
     """
+    DI container is imported on first use, so importing the package (e.g. by `python -m gold_digger`) is cheap.
+
     :type main_file_path: str
     :rtype: gold_digger.di.DiContainer
     """
-    return _DiContainer(main_file_path)
-
+    from .di import DiContainer
 
-_DiContainer.set_up_root_logger()
+    return DiContainer(main_file_path)
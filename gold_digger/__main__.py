@@ -1,12 +1,13 @@
-from datetime import date, datetime as datetime_
+import signal
+import sys
+from datetime import date, datetime as datetime_, timedelta
 
 import click
-from crontab import CronTab
 
 from . import di_container
-from .api_server.app import app
-from .database.db_model import Base
-from .settings import DATABASE_NAME
+from .settings import CRON_JOB_TIMEOUT, DATABASE_NAME, INGESTION_CHUNK_DAYS, INGESTION_POLL_INTERVAL
+
+# Modules used by single commands are imported by the commands, e.g. cron jobs don't load API server or data providers.
 
 
 def _parse_date(ctx, param, value):
@@ -31,28 +32,42 @@ def cli():
     """
 
 
+def _update_rates(di, date_of_exchange, logger, providers=None, exclude_providers=None):
+    """
+    :type di: gold_digger.di.DiContainer
+    :type date_of_exchange: datetime.date
+    :type logger: gold_digger.utils.ContextLogger
+    :param providers: names of updated data providers, all if None
+    :type providers: None | list[str]
+    :type exclude_providers: None | list[str]
+    """
+    providers = [p for p in (providers or di.data_providers) if p not in (exclude_providers or ())]
+    data_providers = [di.data_providers[provider_name] for provider_name in providers]
+    di.exchange_rate_manager.update_all_rates_by_date(date_of_exchange, data_providers, logger)
+
+
 @cli.command("cron", help="Run cron jobs")
 def cron(**_):
     """
-    Run cron jobs.
+    Run cron jobs in-process on one DI container (see `gold_digger.scheduler.Scheduler`).
     """
+    from .scheduler import Job, Scheduler
+
+    jobs = [
+        Job("update", "5 0 * * *", lambda di, logger: _update_rates(di, date.today(), logger, exclude_providers=["fixer.io"]), CRON_JOB_TIMEOUT),
+        Job("update-fixer", "5 2 * * *", lambda di, logger: _update_rates(di, date.today(), logger, providers=["fixer.io"]), CRON_JOB_TIMEOUT),
+    ]
+
     with di_container(__file__) as di:
         logger = di.logger()
-        cron_tab = CronTab(
-            tab="""
-            # m h dom mon dow command
-            5 0 * * * cd /app && python -m gold_digger update --exclude-providers fixer.io {redirect}
-            5 2 * * * cd /app && python -m gold_digger update --providers fixer.io {redirect}
-            0 * * * * echo "`date` - cron health check" {redirect}
-            """.format(
-                redirect="> /proc/1/fd/1 2>/proc/1/fd/2",
-            ),  # redirect to stdout/stderr
-        )
-
-        logger.info("Cron started. Commands:\n%s\n---", "\n".join(list(map(str, cron_tab.crons))))
+        scheduler = Scheduler(di, jobs, logger)
+        signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
 
-        for result in cron_tab.run_scheduler():
-            print(result)  # noqa: T201
+        logger.info("Cron started. Jobs:\n%s\n---", "\n".join(map(str, jobs)))
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
 
 
 @cli.command("initialize-db", help="Create empty table (drop if exists)")
@@ -60,6 +75,8 @@ def initialize_db(**_):
     """
     Create empty table (drop if exists).
     """
+    from .database.db_model import Base
+
     with di_container(__file__) as di:
         print("This will drop & create all tables in '%s'. To continue press 'c'" % DATABASE_NAME)  # noqa: T201
         if input() != "c":
@@ -87,19 +104,99 @@ def update(**kwargs):
     """
     Updates rates of specified day (default today).
     """
+    with di_container(__file__) as di:
+        _update_rates(
+            di,
+            kwargs["date"],
+            di.logger(),
+            kwargs["providers"] and kwargs["providers"].split(","),
+            kwargs["exclude_providers"] and kwargs["exclude_providers"].split(","),
+        )
+
+
+@cli.command("enqueue", help="Enqueue ingestion jobs of rates within date range (default since 2015-01-01 until yesterday)")
+@click.option("--start-date", default=date(2015, 1, 1), callback=_parse_date, help="Specify date in format 'yyyy-mm-dd'")
+@click.option("--end-date", default=date.today() - timedelta(days=1), callback=_parse_date, help="Specify date in format 'yyyy-mm-dd'")
+@click.option("--providers", type=str, help="Specify data providers names separated by comma.")
+@click.option("--chunk-days", type=click.IntRange(min=1), default=INGESTION_CHUNK_DAYS, help="Days of one job.")
+def enqueue(**kwargs):
+    """
+    Enqueue ingestion jobs of rates within date range, they are processed by `worker` command.
+    """
+    with di_container(__file__) as di:
+        logger = di.logger()
+        for provider_name in kwargs["providers"].split(",") if kwargs["providers"] else di.data_providers:
+            job_ids = di.dao_ingestion_job.enqueue(provider_name, kwargs["start_date"], kwargs["end_date"], datetime_.utcnow(), kwargs["chunk_days"])
+            logger.info("Enqueued %s ingestion jobs of provider %s, dates %s - %s.", len(job_ids), provider_name, kwargs["start_date"], kwargs["end_date"])
+
+
+def _run_worker():
+    """
+    Run one consumer of the ingestion job queue until SIGTERM.
+    """
+    from .worker import Worker
+
     with di_container(__file__) as di:
         logger = di.logger()
-        if kwargs["providers"]:
-            providers = kwargs["providers"].split(",")
-        else:
-            providers = list(di.data_providers)
+        worker = Worker(di, di.dao_ingestion_job, logger, INGESTION_POLL_INTERVAL)
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+
+        logger.info("Worker started.")
+        try:
+            worker.run_forever()
+        except KeyboardInterrupt:
+            worker.stop()
+        logger.info("Worker stopped. Ingestion jobs by status: %s", di.dao_ingestion_job.count_by_status())
+
+
+@cli.command("worker", help="Process ingestion jobs")
+@click.option("--concurrency", "-c", default=1, help="Number of consumer processes.")
+def worker(**kwargs):
+    """
+    Process ingestion jobs enqueued by `enqueue` command. Every consumer is a process with its own DI container (connection pools,
+    provider sessions), consumers of all processes and pods share the queue in database.
+    """
+    if kwargs["concurrency"] == 1:
+        _run_worker()
+        return
 
-        if kwargs["exclude_providers"]:
-            excluded_providers = kwargs["exclude_providers"].split(",")
-            providers = [p for p in providers if p not in excluded_providers]
+    import multiprocessing
 
-        data_providers = [di.data_providers[provider_name] for provider_name in providers]
-        di.exchange_rate_manager.update_all_rates_by_date(kwargs["date"], data_providers, logger)
+    processes = [multiprocessing.Process(target=_run_worker, name=f"worker-{i}") for i in range(kwargs["concurrency"])]
+
+    def _terminate(*_):
+        for process_ in processes:
+            process_.terminate()
+
+    signal.signal(signal.SIGTERM, _terminate)
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+    if any(process.exitcode for process in processes):
+        sys.exit(1)
+
+
+@cli.command("stub-server", help="Run stub server replaying recorded provider exchanges")
+@click.option("--archive", required=True, type=click.Path(exists=True, dir_okay=False), help="Archive recorded with GOLD_DIGGER_PROVIDER_HTTP_RECORD_ARCHIVE.")
+@click.option("--host", "-h", default="127.0.0.1")
+@click.option("--port", "-p", default=8000)
+@click.option("--latency", default=0.0, help="Delay of every response in seconds.")
+@click.option("--error-rate", default=0.0, help="Ratio of requests failing with 503.")
+def stub_server(**kwargs):
+    """
+    Run stub server replaying recorded provider exchanges. Point providers to it by GOLD_DIGGER_PROVIDER_HTTP_REPLAY_URL.
+    """
+    from .data_providers import ExchangeArchive, StubServer
+
+    server = StubServer(ExchangeArchive.load(kwargs["archive"]), kwargs["host"], kwargs["port"], kwargs["latency"], kwargs["error_rate"])
+    print("Stub server is listening on %s" % server.url)  # noqa: T201
+    server.serve_forever()
 
 
 @cli.command("api", help="Run API server (simple)")
@@ -109,6 +206,8 @@ def api(**kwargs):
     """
     Run API server (simple).
     """
+    from .api_server.app import app
+
     app.simple_server(kwargs["host"], kwargs["port"])
 
 
@@ -5,9 +5,10 @@ from wsgiref import simple_server
 import falcon
 from sqlalchemy.exc import DatabaseError
 
-from .helpers import http_api_logger
+from .helpers import http_api_logger, query_budget
 from .. import di_container
 from ..settings import SUPPORTED_CURRENCIES
+from ..utils.metrics import CONTENT_TYPE, render_metrics
 
 
 class DatabaseResource:
@@ -20,6 +21,7 @@ class DatabaseResource:
 
 class IntervalsRateResource(DatabaseResource):
     @http_api_logger
+    @query_budget(50)
     def on_get_intervals_rate(self, req, resp, logger):
         """
         :type req: falcon.request.Request
@@ -41,7 +43,13 @@ class IntervalsRateResource(DatabaseResource):
 
         exchange_rate_in_intervals = []
         try:
-            exchange_rate_in_intervals = exchange_rate_manager.get_exchange_rate_in_intervals_by_date(date_of_exchange, from_currency, to_currency, logger)
+            exchange_rate_in_intervals = exchange_rate_manager.get_exchange_rate_in_intervals_by_date(
+                date_of_exchange,
+                from_currency,
+                to_currency,
+                logger,
+                req.context.deadline,
+            )
         except DatabaseError:
             self.container.db_session.rollback()
             logger.exception("Database error occurred. Rollback session to allow reconnect to the DB on next request.")
@@ -67,6 +75,7 @@ class IntervalsRateResource(DatabaseResource):
 
 class DateRateResource(DatabaseResource):
     @http_api_logger
+    @query_budget(20)
     def on_get_date_rate(self, req, resp, logger):
         """
         :type req: falcon.request.Request
@@ -88,7 +97,7 @@ class DateRateResource(DatabaseResource):
 
         exchange_rate = None
         try:
-            exchange_rate = exchange_rate_manager.get_exchange_rate_by_date(date_of_exchange, from_currency, to_currency, logger)
+            exchange_rate = exchange_rate_manager.get_exchange_rate_by_date(date_of_exchange, from_currency, to_currency, logger, req.context.deadline)
         except DatabaseError:
             self.container.db_session.rollback()
             logger.exception("Database error occurred. Rollback session to allow reconnect to the DB on next request.")
@@ -114,6 +123,7 @@ class DateRateResource(DatabaseResource):
 
 class RangeRateResource(DatabaseResource):
     @http_api_logger
+    @query_budget(25)
     def on_get_range_rate(self, req, resp, logger):
         """
         :type req: falcon.request.Request
@@ -135,9 +145,16 @@ class RangeRateResource(DatabaseResource):
         exchange_rate = None
         try:
             if start_date == end_date:
-                exchange_rate = exchange_rate_manager.get_exchange_rate_by_date(start_date, from_currency, to_currency, logger)
+                exchange_rate = exchange_rate_manager.get_exchange_rate_by_date(start_date, from_currency, to_currency, logger, req.context.deadline)
             else:
-                exchange_rate = exchange_rate_manager.get_average_exchange_rate_by_dates(start_date, end_date, from_currency, to_currency, logger)
+                exchange_rate = exchange_rate_manager.get_average_exchange_rate_by_dates(
+                    start_date,
+                    end_date,
+                    from_currency,
+                    to_currency,
+                    logger,
+                    req.context.deadline,
+                )
         except DatabaseError:
             self.container.db_session.rollback()
             logger.exception("Database error occurred. Rollback session to allow reconnect to the DB on next request.")
@@ -194,6 +211,39 @@ class HealthAliveResource(DatabaseResource):
         resp.status = falcon.HTTP_200
 
 
+class HealthProvidersResource(DatabaseResource):
+    def on_get_check_providers(self, req, resp):
+        """
+        Circuit breakers & HTTP statistics of data providers in this worker.
+
+        :type req: falcon.request.Request
+        :type resp: falcon.response.Response
+        """
+        providers = {}
+        for name, data_provider in self.container.data_providers.items():
+            circuit_breaker = data_provider.circuit_breaker
+            providers[name] = {
+                "circuit_breaker": circuit_breaker.snapshot() if circuit_breaker is not None else None,
+                "statistics": data_provider.statistics.snapshot(),
+            }
+
+        resp.text = json.dumps({"providers": providers})
+        resp.status = falcon.HTTP_200
+
+
+class MetricsResource:
+    def on_get_metrics(self, req, resp):
+        """
+        Prometheus metrics of all workers.
+
+        :type req: falcon.request.Request
+        :type resp: falcon.response.Response
+        """
+        resp.data = render_metrics()
+        resp.content_type = CONTENT_TYPE
+        resp.status = falcon.HTTP_200
+
+
 class API(falcon.App):
     def __init__(self, *args, **kwargs):
         """
@@ -206,6 +256,8 @@ class API(falcon.App):
         self.add_route("/range", RangeRateResource(self.container), suffix="range_rate")
         self.add_route("/health", HealthCheckResource(), suffix="check_readiness")
         self.add_route("/health/alive", HealthAliveResource(self.container), suffix="check_liveness")
+        self.add_route("/health/providers", HealthProvidersResource(self.container), suffix="check_providers")
+        self.add_route("/metrics", MetricsResource(), suffix="metrics")
 
     def simple_server(self, host, port):
         """
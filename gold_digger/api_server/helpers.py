@@ -1,10 +1,18 @@
+import hmac
 import json
+import logging
 from functools import wraps
+from random import random
 from time import time
 
 import falcon
 
+from .. import settings
 from ..di import DiContainer
+from ..settings import API_REQUEST_TIMEOUT, API_REQUEST_TIMEOUT_MAX, API_REQUEST_TIMEOUT_MIN
+from ..utils import Deadline, QueryBudgetExceeded, QueryStatistics, use_query_statistics
+from ..utils.metrics import API_REQUEST_DURATION
+from ..utils.profiler import prune_profiles, StackSampler
 
 
 class ContextMiddleware:
@@ -13,13 +21,54 @@ class ContextMiddleware:
         :type req: falcon.request.Request
         """
         req.context.flow_id = DiContainer.flow_id()
+        timeout = req.get_param_as_float("timeout", min_value=API_REQUEST_TIMEOUT_MIN, max_value=API_REQUEST_TIMEOUT_MAX, default=API_REQUEST_TIMEOUT)
+        req.context.deadline = Deadline(timeout)
+
+
+def query_budget(max_queries):
+    """
+    Declare maximal number of database queries of the route, the route has to be decorated by `http_api_logger` as well.
+    Exceeded budget is logged as warning, in strict mode (`API_QUERY_BUDGET_STRICT`) the request fails.
+
+    :type max_queries: int
+    :rtype: function
+    """
+
+    def decorator(func):
+        """
+        :type func: types.FunctionType
+        :rtype: types.FunctionType
+        """
+        func.query_budget = max_queries
+        return func
+
+    return decorator
+
+
+def is_profiled(req):
+    """
+    Request is profiled if profiling is enabled and the request has profiling header with the admin token or it's sampled.
+
+    :type req: falcon.request.Request
+    :rtype: bool
+    """
+    if not settings.API_PROFILING_DIR:
+        return False
+    if settings.API_PROFILING_TOKEN:
+        token = req.get_header(settings.API_PROFILING_HEADER)
+        if token is not None and hmac.compare_digest(token.encode("utf-8"), settings.API_PROFILING_TOKEN.encode("utf-8")):
+            return True
+    return random() < settings.API_PROFILING_SAMPLE_RATE
 
 
 def http_api_logger(func):
     """
+    Log API request with its duration and statistics of its database queries. Request is profiled on demand (see `is_profiled`).
+
     :type func: types.FunctionType
     :rtype: types.FunctionType
     """
+    max_queries = getattr(func, "query_budget", None)
 
     @wraps(func)
     def wrapper(api_route, req, resp, *args, **kwargs):
@@ -31,45 +80,28 @@ def http_api_logger(func):
         start = time()
 
         logger = DiContainer.logger(flow_id=req.context.flow_id)
-        logger.info(
-            "Received API request %s.",
-            func.__name__,
-            extra={
-                "request_method": req.method,
-                "request_url": req.url,
-                "request_user_agent": req.user_agent,
-                "request_referer": req.referer,
-                "request_func": func.__name__,
-            },
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Received API request %s.", func.__name__, extra=_request_extra(req, func.__name__))
 
+        query_statistics = QueryStatistics()
         try:
-            func(api_route, req, resp, *args, logger=logger, **kwargs)
-            logger.info(
-                "Completed API request %s.",
-                func.__name__,
-                extra={
-                    "request_method": req.method,
-                    "request_url": req.url,
-                    "request_func": func.__name__,
-                    "request_user_agent": req.user_agent,
-                    "request_referer": req.referer,
-                    "duration_in_secs": time() - start,
-                },
-            )
+            with use_query_statistics(query_statistics):
+                if is_profiled(req):
+                    _profiled(func, req.context.flow_id, logger)(api_route, req, resp, *args, logger=logger, **kwargs)
+                else:
+                    func(api_route, req, resp, *args, logger=logger, **kwargs)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Completed API request %s.",
+                    func.__name__,
+                    extra=_request_extra(req, func.__name__, duration_in_secs=time() - start, **query_statistics.log_extra()),
+                )
 
         except falcon.HTTPInvalidParam:
             logger.warning(
                 "Wrong parameter was sent in API request %s.",
                 func.__name__,
-                extra={
-                    "request_method": req.method,
-                    "request_url": req.url,
-                    "request_func": func.__name__,
-                    "request_user_agent": req.user_agent,
-                    "request_referer": req.referer,
-                    "duration_in_secs": time() - start,
-                },
+                extra=_request_extra(req, func.__name__, duration_in_secs=time() - start),
             )
             raise
 
@@ -77,14 +109,7 @@ def http_api_logger(func):
             logger.warning(
                 "Missing parameter in API request %s.",
                 func.__name__,
-                extra={
-                    "request_method": req.method,
-                    "request_url": req.url,
-                    "request_func": func.__name__,
-                    "request_user_agent": req.user_agent,
-                    "request_referer": req.referer,
-                    "duration_in_secs": time() - start,
-                },
+                extra=_request_extra(req, func.__name__, duration_in_secs=time() - start),
             )
             raise
 
@@ -92,14 +117,7 @@ def http_api_logger(func):
             logger.exception(
                 "Exception raised on API request %s.",
                 func.__name__,
-                extra={
-                    "request_method": req.method,
-                    "request_url": req.url,
-                    "request_func": func.__name__,
-                    "request_user_agent": req.user_agent,
-                    "request_referer": req.referer,
-                    "duration_in_secs": time() - start,
-                },
+                extra=_request_extra(req, func.__name__, duration_in_secs=time() - start),
             )
 
             resp.status = falcon.HTTP_500
@@ -109,4 +127,58 @@ def http_api_logger(func):
                 },
             )
 
+        finally:
+            API_REQUEST_DURATION.labels(func.__name__).observe(time() - start)
+
+        if max_queries is not None and query_statistics.count > max_queries:
+            if settings.API_QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(f"API request {func.__name__} executed {query_statistics.count} database queries, its budget is {max_queries}.")
+            logger.warning(
+                "API request %s exceeded its query budget (%s).",
+                func.__name__,
+                max_queries,
+                extra={"request_func": func.__name__, **query_statistics.log_extra()},
+            )
+
+    return wrapper
+
+
+def _request_extra(req, func_name, **extra):
+    """
+    :type req: falcon.request.Request
+    :type func_name: str
+    :rtype: dict[str, str | int | float | list[str]]
+    """
+    return {
+        "request_method": req.method,
+        "request_url": req.url,
+        "request_func": func_name,
+        "request_user_agent": req.user_agent,
+        "request_referer": req.referer,
+        **extra,
+    }
+
+
+def _profiled(func, flow_id, logger):
+    """
+    :type func: types.FunctionType
+    :type flow_id: str
+    :type logger: gold_digger.utils.ContextLogger
+    :rtype: types.FunctionType
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        sampler = StackSampler(settings.API_PROFILING_INTERVAL)
+        try:
+            with sampler:
+                return func(*args, **kwargs)
+        finally:
+            try:
+                path = sampler.save(settings.API_PROFILING_DIR, flow_id)
+                logger.info("Profile of API request %s stored to %s.", func.__name__, path, extra={"profile_path": path})
+                prune_profiles(settings.API_PROFILING_DIR, settings.API_PROFILING_MAX_FILES)
+            except OSError:
+                logger.exception("Profile of API request %s could not be stored.", func.__name__)
+
     return wrapper
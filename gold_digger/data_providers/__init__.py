@@ -1,4 +1,12 @@
+from ._async_provider import AsyncHttpPool, AsyncProvider
+from ._calendar import PublicationCalendar
+from ._capabilities import ProviderCapabilities
+from ._circuit_breaker import CircuitBreaker, CircuitOpen
+from ._http_cache import HttpResponseCache
 from ._provider import Provider
+from ._replay import ExchangeArchive, RecordingTransport, ReplayTransport, StubServer
+from ._supported_currencies_cache import SupportedCurrenciesCache
+from ._transport import DeadlineExceeded, HttpTransport, ProviderStatistics
 from .currency_layer import CurrencyLayer
 from .fixer import Fixer
 from .frankfurter import Frankfurter
@@ -0,0 +1,233 @@
+import asyncio
+import weakref
+from abc import abstractmethod
+from http import HTTPStatus
+from time import monotonic
+from urllib.parse import urlsplit
+
+import httpx
+from cachetools import keys
+
+from ._provider import Provider
+from ..utils.deadline import Deadline
+from ..utils.request_failures import record_request_failure
+
+
+class AsyncHttpPool:
+    """
+    Keep-alive connection pool shared by all asynchronous providers.
+    HTTP client and semaphores are bound to the event loop, so the pool is bound to one loop at a time. When it's used
+    from another loop (e.g. next `asyncio.run`), the client and semaphores of the previous loop are dropped,
+    i.e. nothing accumulates for finished loops. Pool is not meant to be used by more loops running concurrently.
+    Number of concurrent requests to the same host is limited by semaphore.
+    """
+
+    def __init__(self, max_connections=100, max_keepalive_connections=20, max_connections_per_host=10, transport=None):
+        """
+        :type max_connections: int
+        :type max_keepalive_connections: int
+        :type max_connections_per_host: int
+        :type transport: None | httpx.AsyncBaseTransport
+        """
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self._max_connections_per_host = max_connections_per_host
+        self._transport = transport
+        self._loop = None  # weak reference to the event loop of the client & semaphores
+        self._client = None
+        self._host_semaphores = {}
+
+    def _bind_loop(self):
+        """
+        Drop the client & semaphores of the previous loop if the pool is used from another one.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is None or self._loop() is not loop:
+            self._loop = weakref.ref(loop)
+            self._client = None
+            self._host_semaphores = {}
+
+    def client(self):
+        """
+        :rtype: httpx.AsyncClient
+        """
+        self._bind_loop()
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self._limits, transport=self._transport)
+        return self._client
+
+    def host_semaphore(self, host):
+        """
+        :type host: str
+        :rtype: asyncio.Semaphore
+        """
+        self._bind_loop()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(self._max_connections_per_host)
+        return semaphore
+
+    async def get(self, url, params=None, *, headers=None, timeout):
+        """
+        Time spent by waiting for a free slot of the host is included in the timeout budget.
+
+        :type url: str
+        :type params: None | dict[str, str]
+        :type headers: None | dict[str, str]
+        :type timeout: float
+        :rtype: httpx.Response
+        :raises httpx.HTTPError | asyncio.TimeoutError:
+        """
+
+        async def _get():
+            """
+            :rtype: httpx.Response
+            """
+            async with self.host_semaphore(urlsplit(url).netloc):
+                return await self.client().get(url, params=params, headers=headers, timeout=timeout)
+
+        return await asyncio.wait_for(_get(), timeout)
+
+    async def close(self):
+        """
+        Close HTTP client of the running event loop.
+        """
+        self._bind_loop()
+        client, self._client, self._host_semaphores = self._client, None, {}
+        if client is not None:
+            await client.aclose()
+
+
+class AsyncProvider(Provider):
+    """
+    Provider with asynchronous counterparts of its data fetching methods.
+    Synchronous methods are inherited from `Provider` and keep working as before.
+    """
+
+    async_http_pool = AsyncHttpPool()
+
+    @abstractmethod
+    async def async_get_supported_currencies(self, date_of_exchange, logger):
+        """
+        :type date_of_exchange: datetime.date
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: set[str]
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def async_get_by_date(self, date_of_exchange, currency, logger):
+        """
+        :type date_of_exchange: datetime.date
+        :type currency: str
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: decimal.Decimal | None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def async_get_all_by_date(self, date_of_exchange, currencies, logger):
+        """
+        :type date_of_exchange: datetime.date
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: dict[str, decimal.Decimal | None]
+        """
+        raise NotImplementedError
+
+    async def _async_request(self, url, params=None, *, logger, timeout=None):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :type logger: gold_digger.utils.ContextLogger
+        :type timeout: None | float
+        :rtype: httpx.Response | None
+        """
+        timeout = self.DEFAULT_REQUEST_TIMEOUT if timeout is None else timeout
+        deadline = Deadline.current()
+        trimmed = False
+        if deadline is not None:
+            trimmed = deadline.remaining() < timeout
+            timeout = deadline.trim(timeout)
+            if timeout <= 0:
+                logger.warning("%s - Request skipped, deadline exceeded. URL: %s, Params: %s", self, url, params)
+                record_request_failure()
+                return None
+
+        circuit_breaker = self.circuit_breaker
+        if circuit_breaker is not None and not circuit_breaker.allow_request():
+            logger.warning("%s - Request skipped, circuit breaker is open. URL: %s, Params: %s", self, url, params)
+            record_request_failure()
+            return None
+
+        start = monotonic()
+        success, counted = False, True
+        try:
+            response = await self.async_http_pool.get(
+                url,
+                params=params,
+                headers={"User-Agent": self._http_session.headers["User-Agent"]},
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.error("%s - Exception: Timeout budget exceeded, URL: %s, Params: %s", self, url, params)
+            counted = not trimmed  # timeout shortened by deadline of the caller says nothing about health of the provider
+        except httpx.HTTPError as e:
+            logger.error("%s - Exception: %s, URL: %s, Params: %s", self, e, url, params)
+        else:
+            success = not self.is_failed_status(response.status_code)
+            if not success:
+                record_request_failure()
+            return response
+        finally:
+            self._record_async_request(monotonic() - start, success, counted)
+
+        record_request_failure()
+        return None
+
+    def _record_async_request(self, latency, success, counted=True):
+        """
+        :type latency: float
+        :type success: bool
+        :param counted: outcome of the request counts to circuit breaker
+        :type counted: bool
+        """
+        self.statistics.record_request(latency, success)
+        if self.circuit_breaker is not None:
+            if counted:
+                self.circuit_breaker.record(latency, success)
+            else:
+                self.circuit_breaker.release()
+
+    async def _async_get(self, url, params=None, *, logger, timeout=None):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :type logger: gold_digger.utils.ContextLogger
+        :type timeout: None | float
+        :rtype: httpx.Response | None
+        """
+        response = await self._async_request(url, params, logger=logger, timeout=timeout)
+        if response is not None and response.status_code != HTTPStatus.OK:
+            logger.error("%s - Status code: %s, URL: %s, Params: %s", self, response.status_code, url, params)
+            return None
+
+        return response
+
+    async def _async_cached_supported_currencies(self, date_of_exchange, fetch):
+        """
+        Share cache of supported currencies with the synchronous `get_supported_currencies`.
+
+        :type date_of_exchange: datetime.date
+        :type fetch: () -> collections.abc.Awaitable[set[str]]
+        :rtype: set[str]
+        """
+        key = keys.hashkey(date_of_exchange)
+        with self._cache_lock:
+            currencies = self._cache.get(key)
+        if currencies is not None:
+            return currencies
+
+        currencies = await fetch()
+        with self._cache_lock:
+            self._cache[key] = currencies
+        return currencies
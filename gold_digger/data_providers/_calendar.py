@@ -0,0 +1,128 @@
+from datetime import date, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from ..utils import clock
+
+
+@lru_cache(maxsize=None)
+def easter_sunday(year):
+    """
+    Date of Easter Sunday in Gregorian calendar (anonymous Gregorian algorithm).
+
+    :type year: int
+    :rtype: datetime.date
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    r = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * r) // 451
+    month, day = divmod(h + r - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+class PublicationCalendar:
+    """
+    Declarative description of days on which a data provider publishes exchange rates.
+    Providers are not requested for days which cannot return any data (weekends, holidays, rates not published yet,
+    dates out of provider's history).
+    """
+
+    MAX_DAYS_WITHOUT_PUBLICATION = 10
+
+    def __init__(self, weekdays=range(7), holidays=(), easter_holidays=(), publish_time=None, timezone_name="UTC", history_start=None, history_days=None):
+        """
+        :param weekdays: days of week with publication (Monday is 0)
+        :type weekdays: collections.abc.Iterable[int]
+        :param holidays: recurring holidays without publication as (month, day)
+        :type holidays: collections.abc.Iterable[tuple[int, int]]
+        :param easter_holidays: holidays without publication as offset in days from Easter Sunday (e.g. -2 is Good Friday)
+        :type easter_holidays: collections.abc.Iterable[int]
+        :param publish_time: local time of publication, rates of today are not available before
+        :type publish_time: None | datetime.time
+        :type timezone_name: str
+        :param history_start: first day with published rates
+        :type history_start: None | datetime.date
+        :param history_days: how many days back the provider serves rates (0 means today only), unlimited if None
+        :type history_days: None | int
+        """
+        self.weekdays = frozenset(weekdays)
+        self.holidays = frozenset(holidays)
+        self.easter_holidays = frozenset(easter_holidays)
+        self.publish_time = publish_time
+        self.timezone = ZoneInfo(timezone_name)
+        self.history_start = history_start
+        self.history_days = history_days
+
+    def publishes_on(self, day):
+        """
+        :type day: datetime.date
+        :rtype: bool
+        """
+        if day.weekday() not in self.weekdays or (day.month, day.day) in self.holidays:
+            return False
+        if self.history_start is not None and day < self.history_start:
+            return False
+        return not self.easter_holidays or (day - easter_sunday(day.year)).days not in self.easter_holidays
+
+    def is_published(self, day, now=None):
+        """
+        Rates of the day are already published.
+
+        :type day: datetime.date
+        :type now: None | datetime.datetime
+        :rtype: bool
+        """
+        local_now = self._local_now(now)
+        if day > local_now.date() or not self.publishes_on(day):
+            return False
+        return day < local_now.date() or self.publish_time is None or local_now.time() >= self.publish_time
+
+    def is_available(self, day, now=None):
+        """
+        Rates of the day are published and the provider still serves them, i.e. it makes sense to request the provider.
+
+        :type day: datetime.date
+        :type now: None | datetime.datetime
+        :rtype: bool
+        """
+        if self.history_days is not None and (self._local_now(now).date() - day).days > self.history_days:
+            return False
+        return self.is_published(day, now)
+
+    def latest_publication(self, day, now=None):
+        """
+        :return: the latest day (not later than given day) with published rates
+        :type day: datetime.date
+        :type now: None | datetime.datetime
+        :rtype: None | datetime.date
+        """
+        day = min(day, self._local_now(now).date())
+        for _ in range(self.MAX_DAYS_WITHOUT_PUBLICATION):
+            if self.is_published(day, now):
+                return day
+            day -= timedelta(days=1)
+        return None
+
+    def publication_days(self, start_date, end_date, now=None):
+        """
+        :return: days with published rates within interval <start_date, end_date>
+        :type start_date: datetime.date
+        :type end_date: datetime.date
+        :type now: None | datetime.datetime
+        :rtype: list[datetime.date]
+        """
+        days = (start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1))
+        return [day for day in days if self.is_published(day, now)]
+
+    def _local_now(self, now):
+        """
+        :type now: None | datetime.datetime
+        :rtype: datetime.datetime
+        """
+        return (now or clock.now(timezone.utc)).astimezone(self.timezone)
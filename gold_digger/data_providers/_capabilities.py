@@ -0,0 +1,33 @@
+from math import ceil
+
+
+class ProviderCapabilities:
+    """
+    Cost of data fetching operations of a provider expressed in number of HTTP requests.
+    """
+
+    def __init__(self, by_date_requests=1, currencies_per_request=1):
+        """
+        :param by_date_requests: requests made by `get_by_date` for one currency
+        :type by_date_requests: int
+        :param currencies_per_request: currencies returned by one request of `get_all_by_date`, unlimited if None
+        :type currencies_per_request: None | int
+        """
+        self.by_date_requests = by_date_requests
+        self.currencies_per_request = currencies_per_request
+
+    def by_date_cost(self, currencies_count):
+        """
+        :type currencies_count: int
+        :rtype: int
+        """
+        return self.by_date_requests * currencies_count
+
+    def all_by_date_cost(self, currencies_count):
+        """
+        :type currencies_count: int
+        :rtype: int
+        """
+        if self.currencies_per_request is None:
+            return 1
+        return ceil(currencies_count / self.currencies_per_request)
@@ -0,0 +1,133 @@
+from collections import deque
+from threading import Lock
+from time import monotonic
+
+from requests import RequestException
+
+
+class CircuitOpen(RequestException):
+    """
+    Request was not sent because circuit breaker of the provider is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one data provider shared by all threads of the worker.
+
+    Outcomes of recent requests are kept in a sliding window, failed and too slow requests are counted as failures.
+    The circuit opens when the failure ratio of the window reaches the threshold and requests are rejected immediately.
+    After `reset_timeout` the circuit is half-open and a single probe request is let through,
+    the circuit closes if the probe succeeds and opens again otherwise.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, window=20, min_requests=5, failure_ratio=0.5, slow_call_duration=10.0, reset_timeout=30.0, clock=monotonic):
+        """
+        :param window: number of recent requests the failure ratio is computed from
+        :type window: int
+        :param min_requests: the circuit doesn't open before the number of requests in the window
+        :type min_requests: int
+        :type failure_ratio: float
+        :param slow_call_duration: requests lasting longer (in seconds) are counted as failures
+        :type slow_call_duration: float
+        :param reset_timeout: seconds before the open circuit lets a probe request through
+        :type reset_timeout: float
+        :type clock: () -> float
+        """
+        self.min_requests = min_requests
+        self.failure_ratio = failure_ratio
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = Lock()
+        self._outcomes = deque(maxlen=window)  # True for failure
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._trips = 0
+
+    @property
+    def state(self):
+        """
+        :rtype: str
+        """
+        with self._lock:
+            return self._state
+
+    @property
+    def is_open(self):
+        """
+        Requests would be rejected now, i.e. the circuit is open and it's not time for a probe yet, or the probe is running.
+
+        :rtype: bool
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                return self._clock() - self._opened_at < self.reset_timeout
+            return self._state == self.HALF_OPEN and self._probe_in_flight
+
+    def allow_request(self):
+        """
+        :return: request may be sent (it's the probe request if the circuit was open)
+        :rtype: bool
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record(self, latency, success):
+        """
+        :type latency: float
+        :type success: bool
+        """
+        failure = not success or latency >= self.slow_call_duration
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if failure:
+                    self._open()
+                else:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                return
+
+            self._outcomes.append(failure)
+            if self._state == self.CLOSED and len(self._outcomes) >= self.min_requests and sum(self._outcomes) / len(self._outcomes) >= self.failure_ratio:
+                self._open()
+
+    def release(self):
+        """
+        Finish request without outcome (e.g. its timeout was shortened by deadline of the caller), i.e. the next request is a probe again.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def snapshot(self):
+        """
+        :rtype: dict[str, str | int | float | None]
+        """
+        with self._lock:
+            return {
+                "state": self._state,
+                "failure_ratio": sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0,
+                "open_for": self._clock() - self._opened_at if self._state != self.CLOSED else None,
+                "trips": self._trips,
+            }
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._trips += 1
@@ -0,0 +1,231 @@
+import json
+import os
+import re
+from base64 import b64decode, b64encode
+from datetime import date, timedelta, timezone
+from hashlib import sha256
+from http import HTTPStatus
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from ..utils import clock
+
+SECRET_PARAMS = frozenset(("access_key", "api_key", "apikey", "app_id", "appid", "key", "token"))
+
+
+def normalized_request(url, params=None):
+    """
+    :return: host, path & sorted query of the request without access keys (scheme is omitted)
+    :type url: str
+    :type params: None | dict[str, str]
+    :rtype: str
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True) + list((params or {}).items())
+    query = sorted((name, str(value)) for name, value in query if name.lower() not in SECRET_PARAMS)
+    return f"{parts.netloc}{parts.path}?{urlencode(query)}"
+
+
+def strip_secrets(url):
+    """
+    :type url: str
+    :rtype: str
+    """
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name.lower() not in SECRET_PARAMS]
+    return parts._replace(query=urlencode(query)).geturl()
+
+
+class HttpResponseCache:
+    """
+    Opt-in, size-bounded on-disk cache of successful provider responses shared by all HTTP transports.
+
+    Entries are keyed by URL & query params without access keys, so the cache files never contain secrets in their keys.
+    Responses of historical dates (every ISO date in URL or params is older than yesterday) never change and they are served
+    without network traffic. Other responses are revalidated by conditional GET (`If-None-Match` / `If-Modified-Since`)
+    when the server sent `ETag` / `Last-Modified`, and they are not stored at all otherwise.
+    Least recently used entries are removed when the cache exceeds its size.
+    """
+
+    DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+    FILE_SUFFIX = ".json"
+
+    def __init__(self, directory, max_size):
+        """
+        :type directory: str
+        :param max_size: maximal size of all entries in bytes
+        :type max_size: int
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = Lock()
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, url, params=None):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :rtype: str
+        """
+        return sha256(f"{urlsplit(url).scheme}://{normalized_request(url, params)}".encode()).hexdigest()
+
+    def is_immutable(self, url, params=None, today=None):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :type today: None | datetime.date
+        :rtype: bool
+        """
+        parts = urlsplit(url)
+        dates = self.DATE_PATTERN.findall(" ".join([parts.path, parts.query, *map(str, (params or {}).values())]))
+        if not dates:
+            return False
+        yesterday = (today or clock.now(timezone.utc).date()) - timedelta(days=1)
+        try:
+            return all(date.fromisoformat(day) < yesterday for day in dates)
+        except ValueError:
+            return False
+
+    def get(self, url, params=None):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :return: cached entry with keys `response`, `immutable`, `etag`, `last_modified`
+        :rtype: None | dict
+        """
+        path = self._path(self.key(url, params))
+        try:
+            with open(path, encoding="utf-8") as cache_file:
+                entry = json.load(cache_file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        response = Response()
+        response.status_code = entry["status_code"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.url = entry["url"]
+        response.encoding = entry["encoding"]
+        response._content = b64decode(entry["content"])
+        response.from_cache = True
+        return {
+            "response": response,
+            "immutable": entry["immutable"],
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+    def conditional_headers(self, entry):
+        """
+        :type entry: dict
+        :rtype: dict[str, str]
+        """
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, params, response):
+        """
+        Only successful responses are stored. Empty payloads and error payloads which some providers send with status 200
+        (e.g. `"success": false`) are skipped as well, they would be served forever for historical dates otherwise.
+
+        :type url: str
+        :type params: None | dict[str, str]
+        :type response: requests.Response
+        :return: the response was stored
+        :rtype: bool
+        """
+        immutable = self.is_immutable(url, params)
+        if response.status_code != HTTPStatus.OK or self._is_error_payload(response):
+            return False
+        if not immutable and not ("ETag" in response.headers or "Last-Modified" in response.headers):
+            return False
+
+        headers = {name: value for name, value in response.headers.items() if name in ("Content-Type", "ETag", "Last-Modified")}
+        entry = {
+            "status_code": response.status_code,
+            "headers": headers,
+            "url": strip_secrets(response.url or url),
+            "encoding": response.encoding,
+            "content": b64encode(response.content).decode("ascii"),
+            "immutable": immutable,
+            "stored_at": time(),
+        }
+        with NamedTemporaryFile("w", dir=self.directory, suffix=".tmp", delete=False, encoding="utf-8") as cache_file:
+            json.dump(entry, cache_file)
+        path = self._path(self.key(url, params))
+        with self._lock:
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(cache_file.name, path)
+            self._size = self._current_size() if self._size is None else self._size - previous_size + os.path.getsize(path)
+            if self._size > self.max_size:
+                self._evict()
+        return True
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if name.endswith(self.FILE_SUFFIX):
+                    os.remove(os.path.join(self.directory, name))
+            self._size = 0
+
+    def _evict(self):
+        """
+        Remove least recently used entries until the cache fits into the half of its size, so eviction is not run on every store.
+        """
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in self._entries())
+        for _, size, path in entries:
+            if self._size <= self.max_size // 2:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def _current_size(self):
+        """
+        :rtype: int
+        """
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        """
+        :rtype: list[os.DirEntry]
+        """
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith(self.FILE_SUFFIX)]
+
+    def _path(self, key):
+        """
+        :type key: str
+        :rtype: str
+        """
+        return os.path.join(self.directory, key + self.FILE_SUFFIX)
+
+    @staticmethod
+    def _is_error_payload(response):
+        """
+        :type response: requests.Response
+        :rtype: bool
+        """
+        if not response.content.strip():
+            return True
+        content_type = response.headers.get("Content-Type")
+        if content_type is not None and "json" not in content_type:
+            return False
+        try:
+            payload = response.json()
+        except ValueError:
+            return False
+        if isinstance(payload, dict):
+            return not payload or payload.get("success") is False or "error" in payload
+        return content_type is not None  # JSON API never answers with a bare value, plain text rate might look like one
@@ -1,28 +1,46 @@
 from abc import ABCMeta, abstractmethod
-from datetime import date
 from decimal import Decimal, InvalidOperation
 from functools import wraps
 from http import HTTPStatus
 from inspect import getcallargs
+from threading import Lock, RLock
 
-from cachetools import Cache
-from requests import RequestException, Session
+from cachetools import Cache, keys, TTLCache
+from requests import RequestException
+
+from ._calendar import PublicationCalendar
+from ._capabilities import ProviderCapabilities
+from ._transport import HttpTransport, is_failed_status
+from ..utils import clock
+from ..utils.metrics import PROVIDER_QUOTA_CALLS
+from ..utils.request_failures import record_request_failure
 
 
 class Provider(metaclass=ABCMeta):
-    DEFAULT_REQUEST_TIMEOUT = 15  # 15 seconds for both connect & read timeouts
+    DEFAULT_REQUEST_TIMEOUT = 15  # 15 seconds read timeout (connect timeout is set by transport)
+    SHARED_RESPONSE_TTL = 60  # successful responses are shared by methods requesting the same document for 1 minute
+    calendar = PublicationCalendar()  # rates are published every day by default
+    capabilities = ProviderCapabilities()  # one request per currency by default
 
-    def __init__(self, base_currency, http_user_agent):
+    def __init__(self, base_currency, http_user_agent, transport=None, supported_currencies_cache=None):
         """
         :type base_currency: str
         :type http_user_agent: str
+        :type transport: None | gold_digger.data_providers.HttpTransport
+        :param supported_currencies_cache: cache of supported currencies by date, only the last date is cached in memory if None
+        :type supported_currencies_cache: None | cachetools.Cache
         """
         self._base_currency = base_currency
         self.has_request_limit = False
         self.request_limit_reached = False
-        self._http_session = Session()
-        self._http_session.headers["User-Agent"] = http_user_agent
-        self._cache = Cache(maxsize=1)
+        self._transport = transport or HttpTransport(http_user_agent, read_timeout=self.DEFAULT_REQUEST_TIMEOUT)
+        self._transport.statistics.provider = self.name
+        self._transport.is_cacheable = self.is_cacheable_response
+        self._http_session = self._transport.session
+        self._cache = Cache(maxsize=1) if supported_currencies_cache is None else supported_currencies_cache
+        self._cache_lock = RLock()
+        self._shared_responses = TTLCache(maxsize=8, ttl=self.SHARED_RESPONSE_TTL)
+        self._shared_responses_lock = Lock()
 
     @property
     def base_currency(self):
@@ -31,6 +49,20 @@ class Provider(metaclass=ABCMeta):
         """
         return self._base_currency
 
+    @property
+    def statistics(self):
+        """
+        :rtype: gold_digger.data_providers.ProviderStatistics
+        """
+        return self._transport.statistics
+
+    @property
+    def circuit_breaker(self):
+        """
+        :rtype: None | gold_digger.data_providers.CircuitBreaker
+        """
+        return self._transport.circuit_breaker
+
     @property
     @abstractmethod
     def name(self):
@@ -86,17 +118,68 @@ class Provider(metaclass=ABCMeta):
         :rtype: requests.Response | None
         """
         try:
-            self._http_session.cookies.clear()
-            response = self._http_session.get(url, params=params, timeout=self.DEFAULT_REQUEST_TIMEOUT)
+            response = self._transport.get(url, params=params)
             if response.status_code == HTTPStatus.OK:
                 return response
             else:
                 logger.error("%s - Status code: %s, URL: %s, Params: %s", self, response.status_code, url, params)
+                if self.is_failed_status(response.status_code):
+                    record_request_failure()
         except RequestException as e:
             logger.error("%s - Exception: %s, URL: %s, Params: %s", self, e, url, params)
+            record_request_failure()
 
         return None
 
+    def _get_shared(self, url, params=None, *, logger):
+        """
+        Same as `_get`, but a successful response is reused for a short time by other methods requesting the same document,
+        e.g. rates of a date and currencies supported on the date are read from one HTTP exchange.
+
+        :type url: str
+        :type params: None | dict[str, str]
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: requests.Response | None
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        with self._shared_responses_lock:
+            response = self._shared_responses.get(key)
+        if response is not None:
+            logger.debug("%s - Reusing response. URL: %s, Params: %s", self, url, params)
+            return response
+
+        response = self._get(url, params=params, logger=logger)
+        if response is not None and response.status_code == HTTPStatus.OK:
+            with self._shared_responses_lock:
+                self._shared_responses[key] = response
+        return response
+
+    is_failed_status = staticmethod(is_failed_status)
+
+    @staticmethod
+    def is_cacheable_response(response):
+        """
+        Successful response may be stored in HTTP response cache, unless the provider knows its payload carries no rates.
+
+        :type response: requests.Response
+        :rtype: bool
+        """
+        return True
+
+    def _share_supported_currencies(self, date_of_exchange, currencies):
+        """
+        Fill cache of supported currencies from a rates response so `get_supported_currencies` does not request it again.
+
+        :type date_of_exchange: datetime.date
+        :type currencies: set[str]
+        """
+        if not currencies:
+            return
+        key = keys.hashkey(date_of_exchange)
+        with self._cache_lock:
+            if self._cache.get(key) is None:
+                self._cache[key] = currencies
+
     def _to_decimal(self, value, currency=None, *, logger):
         """
         :type value: str | float | decimal.Decimal
@@ -117,6 +200,7 @@ class Provider(metaclass=ABCMeta):
         """
         logger.warning("%s - Requests limit exceeded.", self)
         self.request_limit_reached = True
+        record_request_failure()
 
     def __str__(self):
         """
@@ -129,7 +213,7 @@ class Provider(metaclass=ABCMeta):
         """
         :rtype: bool
         """
-        return date.today().day == 1
+        return clock.today().day == 1
 
     @staticmethod
     def check_request_limit(return_value=None):
@@ -156,8 +240,11 @@ class Provider(metaclass=ABCMeta):
                     provider_instance.request_limit_reached = False
 
                 if not provider_instance.request_limit_reached:
+                    PROVIDER_QUOTA_CALLS.labels(provider_instance.name, "allowed").inc()
                     return func(*args, **kwargs)
                 else:
+                    PROVIDER_QUOTA_CALLS.labels(provider_instance.name, "rejected").inc()
+                    record_request_failure()
                     getcallargs(func, *args)["logger"].warning("%s - API limit was exceeded. Rate won't be requested.", provider_instance.name)
                     return return_value
 
@@ -0,0 +1,258 @@
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import Random
+from threading import Lock, Thread
+from time import sleep
+from urllib.parse import urlsplit
+
+from ._http_cache import normalized_request, strip_secrets
+from ._transport import HttpTransport
+from ..utils import clock
+
+
+class ExchangeArchive:
+    """
+    Archive of recorded HTTP exchanges of data providers keyed by normalized request (access keys are stripped).
+    The archive is stored as JSON file, textual bodies are kept readable so the archives can be reviewed as test fixtures.
+    Requested URLs depend on the current date (e.g. ranges up to today), so the time of recording is stored as well
+    and exchanges are replayed with the time pinned to it (see `gold_digger.utils.clock.pin_time`).
+    """
+
+    VERSION = 1
+    HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+    def __init__(self, exchanges=None, recorded_at=None):
+        """
+        :type exchanges: None | dict[str, dict]
+        :param recorded_at: time of recording (with local timezone of the recording machine), the current time if None
+        :type recorded_at: None | datetime.datetime
+        """
+        self._exchanges = dict(exchanges or {})
+        self.recorded_at = recorded_at or clock.now().astimezone()
+        self._lock = Lock()
+
+    @classmethod
+    def load(cls, path):
+        """
+        :type path: str
+        :rtype: gold_digger.data_providers.ExchangeArchive
+        """
+        with open(path, encoding="utf-8") as archive_file:
+            archive = json.load(archive_file)
+        recorded_at = datetime.fromisoformat(archive["recorded_at"]) if archive.get("recorded_at") else None
+        return cls({exchange["request"]: exchange for exchange in archive["exchanges"]}, recorded_at)
+
+    def save(self, path):
+        """
+        :type path: str
+        """
+        with self._lock:
+            exchanges = [self._exchanges[request] for request in sorted(self._exchanges)]
+        with open(path, "w", encoding="utf-8") as archive_file:
+            json.dump({"version": self.VERSION, "recorded_at": self.recorded_at.isoformat(), "exchanges": exchanges}, archive_file, indent=1)
+
+    def record(self, url, params, response):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :type response: requests.Response
+        """
+        exchange = {
+            "request": normalized_request(url, params),
+            "url": strip_secrets(response.url or url),
+            "status_code": response.status_code,
+            "headers": {name: value for name, value in response.headers.items() if name in self.HEADERS},
+        }
+        try:
+            exchange["text"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            exchange["content_base64"] = b64encode(response.content).decode("ascii")
+
+        with self._lock:
+            self._exchanges[exchange["request"]] = exchange
+
+    def lookup(self, request):
+        """
+        :param request: normalized request, see `normalized_request`
+        :type request: str
+        :return: status code, headers & body of the recorded response
+        :rtype: None | tuple[int, dict[str, str], bytes]
+        """
+        with self._lock:
+            exchange = self._exchanges.get(request)
+        if exchange is None:
+            return None
+        content = exchange["text"].encode("utf-8") if "text" in exchange else b64decode(exchange["content_base64"])
+        return exchange["status_code"], exchange["headers"], content
+
+    def __len__(self):
+        """
+        :rtype: int
+        """
+        return len(self._exchanges)
+
+
+class RecordingTransport(HttpTransport):
+    """
+    Transport which records every received response of a data provider into the archive.
+    """
+
+    def __init__(self, http_user_agent, archive, **kwargs):
+        """
+        :type http_user_agent: str
+        :type archive: gold_digger.data_providers.ExchangeArchive
+        """
+        super().__init__(http_user_agent, **kwargs)
+        self.archive = archive
+
+    def get(self, url, params=None):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :rtype: requests.Response
+        """
+        response = super().get(url, params)
+        self.archive.record(url, params, response)
+        return response
+
+
+class ReplayTransport(HttpTransport):
+    """
+    Transport which sends requests of a data provider to the stub server instead of the provider's API.
+    Host of the provider is kept as the first path segment, e.g. `https://api.frankfurter.app/2019-04-15` is requested
+    as `http://127.0.0.1:8000/api.frankfurter.app/2019-04-15`.
+    """
+
+    def __init__(self, http_user_agent, server_url, **kwargs):
+        """
+        :type http_user_agent: str
+        :type server_url: str
+        """
+        super().__init__(http_user_agent, **kwargs)
+        self.server_url = server_url.rstrip("/")
+
+    def get(self, url, params=None):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :rtype: requests.Response
+        """
+        parts = urlsplit(url)
+        replay_url = f"{self.server_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        return super().get(replay_url, params)
+
+
+class StubServer:
+    """
+    Local HTTP server replaying recorded exchanges of data providers, requests missing in the archive are answered by 404.
+    Every response is delayed by `latency` seconds and `error_rate` of requests fail with 503 to simulate unreliable providers.
+    """
+
+    def __init__(self, archive, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, seed=None):
+        """
+        :type archive: gold_digger.data_providers.ExchangeArchive
+        :type host: str
+        :param port: port of the server, random free port if 0
+        :type port: int
+        :type latency: float
+        :type error_rate: float
+        :type seed: None | int
+        """
+        self.archive = archive
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.misses = 0
+        self._random = Random(seed)
+        self._lock = Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        :rtype: str
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Serve requests in a background thread.
+        """
+        self._thread = Thread(target=self._server.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        """
+        :rtype: gold_digger.data_providers.StubServer
+        """
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        :type exc_type: None | type[BaseException]
+        :type exc_val: None | BaseException
+        :type exc_tb: None | traceback
+        """
+        self.stop()
+
+    def respond(self, path):
+        """
+        :param path: requested path including query, the first segment is the host of the provider
+        :type path: str
+        :rtype: tuple[int, dict[str, str], bytes]
+        """
+        with self._lock:
+            self.requests += 1
+            failure = self.error_rate and self._random.random() < self.error_rate
+
+        if self.latency:
+            sleep(self.latency)
+        if failure:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {}, b""
+
+        recorded = self.archive.lookup(normalized_request("stub://" + path.lstrip("/")))
+        if recorded is None:
+            with self._lock:
+                self.misses += 1
+            return HTTPStatus.NOT_FOUND, {"Content-Type": "application/json"}, b'{"message": "not recorded"}'
+        return recorded
+
+    def _handler_class(self):
+        """
+        :rtype: type[http.server.BaseHTTPRequestHandler]
+        """
+        stub_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                status_code, headers, content = stub_server.respond(self.path)
+                self.send_response(status_code)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                """
+                Requests are not logged to stderr.
+                """
+
+        return Handler
@@ -0,0 +1,70 @@
+from cachetools import TTLCache
+
+from ..utils.metrics import record_cache_lookup
+
+
+class SupportedCurrenciesCache(TTLCache):
+    """
+    Cache of provider's supported currencies keyed by `cachetools.keys.hashkey(date_of_exchange)`.
+    In-process TTL layer is backed by currencies persisted in database, so they are shared by all workers & cron runs
+    and they survive restarts. Empty sets (failed requests) are not persisted.
+    """
+
+    def __init__(self, provider_name, dao_supported_currencies, logger, ttl, maxsize=32):
+        """
+        :type provider_name: str
+        :type dao_supported_currencies: gold_digger.database.DaoSupportedCurrencies
+        :type logger: gold_digger.utils.ContextLogger
+        :type ttl: float
+        :type maxsize: int
+        """
+        super().__init__(maxsize, ttl)
+        self._provider_name = provider_name
+        self._dao_supported_currencies = dao_supported_currencies
+        self._logger = logger
+
+    def __missing__(self, key):
+        """
+        :type key: tuple
+        :rtype: set[str]
+        :raises KeyError: when currencies are not in database either
+        """
+        (date_of_exchange,) = key
+        try:
+            currencies = self._dao_supported_currencies.get_supported_currencies(self._provider_name, date_of_exchange)
+        except Exception:
+            self._logger.exception("Loading of supported currencies of provider %s (%s) failed.", self._provider_name, date_of_exchange)
+            raise KeyError(key)
+
+        record_cache_lookup("supported_currencies", hit=bool(currencies))
+        if not currencies:
+            raise KeyError(key)
+
+        super().__setitem__(key, currencies)
+        return currencies
+
+    def __setitem__(self, key, value):
+        """
+        :type key: tuple
+        :type value: set[str]
+        """
+        super().__setitem__(key, value)
+        if value:
+            (date_of_exchange,) = key
+            try:
+                self._dao_supported_currencies.save_supported_currencies(self._provider_name, date_of_exchange, value)
+            except Exception:
+                self._logger.exception("Storing of supported currencies of provider %s (%s) failed.", self._provider_name, date_of_exchange)
+
+    def setdefault(self, key, default=None):
+        """
+        Value is stored (and persisted) without another lookup in database.
+
+        :type key: tuple
+        :type default: set[str]
+        :rtype: set[str]
+        """
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
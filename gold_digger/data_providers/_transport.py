@@ -0,0 +1,299 @@
+from collections import deque
+from http import HTTPStatus
+from random import uniform
+from threading import Lock
+from time import monotonic, sleep
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as HTTPConnectionError, Timeout
+
+from ._circuit_breaker import CircuitOpen
+from ..utils.deadline import Deadline
+from ..utils.metrics import record_cache_lookup, record_provider_request
+
+
+def is_failed_status(status_code):
+    """
+    Response with the status doesn't say anything about rates (server error, too many requests), unlike e.g. 404.
+
+    :type status_code: int
+    :rtype: bool
+    """
+    return status_code >= HTTPStatus.INTERNAL_SERVER_ERROR or status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+class DeadlineExceeded(Timeout):
+    """
+    Request was not sent because the time budget of the current deadline is spent.
+    """
+
+
+class ProviderStatistics:
+    """
+    Thread-safe counters of HTTP requests made by one data provider. Requests are also observed by Prometheus metrics labelled by `provider`.
+    """
+
+    LATENCY_SAMPLES = 200  # latencies & outcomes of recent requests kept for rolling statistics
+    LATENCY_MIN_SAMPLES = 20
+    MIN_SUCCESS_RATIO = 0.05
+
+    def __init__(self):
+        self._lock = Lock()
+        self._latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        self._outcomes = deque(maxlen=self.LATENCY_SAMPLES)  # True for success
+        self.provider = None  # name of the data provider, set by the provider
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.cache_hits = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record_request(self, latency, success):
+        """
+        :type latency: float
+        :type success: bool
+        """
+        with self._lock:
+            self.requests += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            self._latencies.append(latency)
+            self._outcomes.append(success)
+            if not success:
+                self.errors += 1
+        record_provider_request(self.provider, latency, success)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_cache_hit(self):
+        with self._lock:
+            self.cache_hits += 1
+
+    def record_hedge(self, win):
+        """
+        :param win: the hedge request answered sooner than the request it hedged
+        :type win: bool
+        """
+        with self._lock:
+            self.hedges += 1
+            if win:
+                self.hedge_wins += 1
+
+    def expected_latency(self):
+        """
+        Expected time to get a successful response, i.e. mean latency of recent requests divided by their success ratio.
+
+        :return: seconds, None if there are not enough requests yet
+        :rtype: None | float
+        """
+        with self._lock:
+            if len(self._latencies) < self.LATENCY_MIN_SAMPLES:
+                return None
+            success_ratio = sum(self._outcomes) / len(self._outcomes)
+            return sum(self._latencies) / len(self._latencies) / max(success_ratio, self.MIN_SUCCESS_RATIO)
+
+    def latency_percentile(self, percentile):
+        """
+        :type percentile: float
+        :return: percentile of latencies of recent requests, None if there are not enough requests yet
+        :rtype: None | float
+        """
+        with self._lock:
+            if len(self._latencies) < self.LATENCY_MIN_SAMPLES:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(percentile * len(latencies)))]
+
+    def snapshot(self):
+        """
+        :rtype: dict[str, int | float]
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "latency_total": self.latency_total,
+                "latency_average": self.latency_total / self.requests if self.requests else 0.0,
+                "latency_max": self.latency_max,
+                "cache_hits": self.cache_hits,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_win_rate": self.hedge_wins / self.hedges if self.hedges else 0.0,
+            }
+
+
+class HttpTransport:
+    """
+    HTTP layer of data provider with keep-alive connection pool, separate connect & read timeouts
+    and bounded exponential backoff with full jitter. Requests are retried on connection errors, timeouts and 5xx responses.
+    Responses are served from optional on-disk cache when possible.
+    """
+
+    def __init__(
+        self,
+        http_user_agent,
+        *,
+        pool_size=10,
+        connect_timeout=3.05,
+        read_timeout=15,
+        max_retries=2,
+        backoff_factor=0.5,
+        backoff_max=10,
+        response_cache=None,
+        circuit_breaker=None,
+    ):
+        """
+        :type http_user_agent: str
+        :type pool_size: int
+        :type connect_timeout: float
+        :type read_timeout: float
+        :type max_retries: int
+        :type backoff_factor: float
+        :type backoff_max: float
+        :type response_cache: None | gold_digger.data_providers.HttpResponseCache
+        :type circuit_breaker: None | gold_digger.data_providers.CircuitBreaker
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.statistics = ProviderStatistics()
+        self.response_cache = response_cache
+        self.is_cacheable = None  # predicate of responses the data provider can parse, set by the provider
+        self.circuit_breaker = circuit_breaker
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session = Session()
+        self.session.headers["User-Agent"] = http_user_agent
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def backoff_time(self, attempt):
+        """
+        :type attempt: int
+        :rtype: float
+        """
+        return uniform(0, min(self.backoff_max, self.backoff_factor * 2**attempt))
+
+    def get(self, url, params=None):
+        """
+        Timeouts are trimmed to the remaining time of the current deadline (if any)
+        and request is not retried when the backoff would not fit into the deadline.
+
+        Immutable cached responses are returned without request, other cached responses are revalidated by conditional GET.
+
+        :type url: str
+        :type params: None | dict[str, str]
+        :rtype: requests.Response
+        :raises requests.RequestException: when the last attempt fails
+        """
+        if self.response_cache is None:
+            return self._get(url, params)
+
+        entry = self.response_cache.get(url, params)
+        if entry is not None and entry["immutable"]:
+            self.statistics.record_cache_hit()
+            record_cache_lookup("http_response", hit=True)
+            return entry["response"]
+
+        response = self._get(url, params, self.response_cache.conditional_headers(entry) if entry is not None else None)
+        if entry is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+            self.statistics.record_cache_hit()
+            record_cache_lookup("http_response", hit=True)
+            return entry["response"]
+
+        record_cache_lookup("http_response", hit=False)
+        if self.is_cacheable is None or self.is_cacheable(response):
+            self.response_cache.store(url, params, response)
+        return response
+
+    def _get(self, url, params, headers=None):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :type headers: None | dict[str, str]
+        :rtype: requests.Response
+        :raises requests.RequestException: when the last attempt fails
+        """
+        request_kwargs = {"headers": headers} if headers else {}
+        deadline = Deadline.current()
+        attempt = 0
+        while True:
+            timeout = self._timeout(deadline)
+            if min(timeout) <= 0:
+                raise DeadlineExceeded(f"Deadline of {deadline.timeout}s exceeded")
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+                raise CircuitOpen("Circuit breaker is open")
+
+            # timeout shortened by deadline of the caller says nothing about health of the provider
+            trimmed = timeout != (self.connect_timeout, self.read_timeout)
+            self.session.cookies.clear()
+            start = monotonic()
+            success, counted = False, True
+            try:
+                response = self.session.get(url, params=params, timeout=timeout, **request_kwargs)
+            except Timeout:
+                counted = not trimmed
+                if attempt >= self.max_retries or not self._has_time_for_backoff(attempt, deadline):
+                    raise
+            except HTTPConnectionError:
+                if attempt >= self.max_retries or not self._has_time_for_backoff(attempt, deadline):
+                    raise
+            else:
+                server_error = response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+                success = not is_failed_status(response.status_code)
+                if not server_error or attempt >= self.max_retries or not self._has_time_for_backoff(attempt, deadline):
+                    return response
+            finally:
+                # outcome is recorded whatever the request raised, so probe of half-open circuit breaker is always finished
+                self._record_request(monotonic() - start, success, counted)
+
+            self.statistics.record_retry()
+            sleep(self.backoff_time(attempt))
+            attempt += 1
+
+    def _timeout(self, deadline):
+        """
+        Connect and read timeouts of a request, scaled down so that together they fit into remaining time of the deadline.
+
+        :type deadline: None | gold_digger.utils.Deadline
+        :rtype: tuple[float, float]
+        """
+        if deadline is None:
+            return self.connect_timeout, self.read_timeout
+
+        remaining = deadline.remaining()
+        total = self.connect_timeout + self.read_timeout
+        if total <= remaining:
+            return self.connect_timeout, self.read_timeout
+        return self.connect_timeout * remaining / total, self.read_timeout * remaining / total
+
+    def _record_request(self, latency, success, counted=True):
+        """
+        :type latency: float
+        :type success: bool
+        :param counted: outcome of the request counts to circuit breaker
+        :type counted: bool
+        """
+        self.statistics.record_request(latency, success)
+        if self.circuit_breaker is not None:
+            if counted:
+                self.circuit_breaker.record(latency, success)
+            else:
+                self.circuit_breaker.release()
+
+    def _has_time_for_backoff(self, attempt, deadline):
+        """
+        :type attempt: int
+        :type deadline: None | gold_digger.utils.Deadline
+        :rtype: bool
+        """
+        return deadline is None or min(self.backoff_max, self.backoff_factor * 2**attempt) < deadline.remaining()
@@ -1,11 +1,13 @@
 import re
 from collections import defaultdict
-from datetime import date, timedelta
+from datetime import timedelta
 from operator import attrgetter
 
 from cachetools import cachedmethod, keys
 
+from ._capabilities import ProviderCapabilities
 from ._provider import Provider
+from ..utils import clock
 
 
 class CurrencyLayer(Provider):
@@ -16,15 +18,18 @@ class CurrencyLayer(Provider):
 
     BASE_URL = "http://www.apilayer.net/api/live?access_key=%s"
     name = "currency_layer"
+    capabilities = ProviderCapabilities(currencies_per_request=None)
 
-    def __init__(self, base_currency, http_user_agent, access_key, logger):
+    def __init__(self, base_currency, http_user_agent, access_key, logger, transport=None, supported_currencies_cache=None):
         """
         :type base_currency: str
         :type http_user_agent: str
         :type access_key: str
         :type logger: gold_digger.utils.ContextLogger
+        :type transport: None | gold_digger.data_providers.HttpTransport
+        :type supported_currencies_cache: None | cachetools.Cache
         """
-        super().__init__(base_currency, http_user_agent)
+        super().__init__(base_currency, http_user_agent, transport, supported_currencies_cache)
         if access_key:
             self._url = self.BASE_URL % access_key
         else:
@@ -33,7 +38,7 @@ class CurrencyLayer(Provider):
 
         self.has_request_limit = True
 
-    @cachedmethod(cache=attrgetter("_cache"), key=lambda _, date_of_exchange, __: keys.hashkey(date_of_exchange))
+    @cachedmethod(cache=attrgetter("_cache"), key=lambda _, date_of_exchange, __: keys.hashkey(date_of_exchange), lock=attrgetter("_cache_lock"))
     def get_supported_currencies(self, date_of_exchange, logger):
         """
         :type date_of_exchange: datetime.date
@@ -123,10 +128,8 @@ class CurrencyLayer(Provider):
         :rtype: dict[date, dict[str, decimal.Decimal]]
         """
         day_rates = defaultdict(dict)
-        date_of_exchange = origin_date
-        date_of_today = date.today()
 
-        while date_of_exchange != date_of_today:
+        for date_of_exchange in self.calendar.publication_days(origin_date, clock.today() - timedelta(days=1)):
             response = self._get(f"{self._url}&date={date_of_exchange.strftime('%Y-%m-%d')}&currencies={','.join(currencies)}", logger=logger)
             records = {}
             if response:
@@ -142,6 +145,5 @@ class CurrencyLayer(Provider):
                 decimal_value = self._to_decimal(value, currency, logger=logger) if value is not None else None
                 if currency and decimal_value:
                     day_rates[date_of_exchange][currency] = decimal_value
-            date_of_exchange = date_of_exchange + timedelta(1)
 
         return day_rates
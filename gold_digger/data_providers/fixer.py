@@ -1,9 +1,12 @@
-from datetime import date, timedelta
+from datetime import timedelta
 from operator import attrgetter
 
 from cachetools import cachedmethod, keys
 
+from ._capabilities import ProviderCapabilities
 from ._provider import Provider
+from ..utils import clock
+from ..utils.request_failures import record_request_failure
 
 
 class Fixer(Provider):
@@ -15,15 +18,18 @@ class Fixer(Provider):
 
     BASE_URL = "http://data.fixer.io/api/{path}?access_key=%s"
     name = "fixer.io"
+    capabilities = ProviderCapabilities(currencies_per_request=None)
 
-    def __init__(self, base_currency, http_user_agent, access_key, logger):
+    def __init__(self, base_currency, http_user_agent, access_key, logger, transport=None, supported_currencies_cache=None):
         """
         :type base_currency: str
         :type http_user_agent: str
         :type access_key: str
         :type logger: gold_digger.utils.ContextLogger
+        :type transport: None | gold_digger.data_providers.HttpTransport
+        :type supported_currencies_cache: None | cachetools.Cache
         """
-        super().__init__(base_currency, http_user_agent)
+        super().__init__(base_currency, http_user_agent, transport, supported_currencies_cache)
         if access_key:
             self._url = self.BASE_URL % access_key
         else:
@@ -32,20 +38,22 @@ class Fixer(Provider):
 
         self.has_request_limit = True
 
-    @cachedmethod(cache=attrgetter("_cache"), key=lambda _, date_of_exchange, __: keys.hashkey(date_of_exchange))
+    @cachedmethod(cache=attrgetter("_cache"), key=lambda _, date_of_exchange, __: keys.hashkey(date_of_exchange), lock=attrgetter("_cache_lock"))
     @Provider.check_request_limit(return_value=set())
     def get_supported_currencies(self, date_of_exchange, logger):
         """
+        Currencies are read from rates document of the date (shared with `get_all_by_date`) instead of separate `symbols` request.
+
         :type date_of_exchange: datetime.date
         :type logger: gold_digger.utils.ContextLogger
         :rtype: set[str]
         """
         currencies = set()
-        response = self._get(self._url.format(path="symbols"), logger=logger)
+        response = self._get_shared(self._url.format(path=date_of_exchange.strftime("%Y-%m-%d")), logger=logger)
         if response:
             response = response.json()
             if response.get("success"):
-                currencies = set((response.get("symbols") or {}).keys())
+                currencies = self._parse_supported_currencies(response)
             elif response["error"]["code"] == 104:
                 self.set_request_limit_reached(logger)
             else:
@@ -58,6 +66,17 @@ class Fixer(Provider):
 
         return currencies
 
+    @staticmethod
+    def _parse_supported_currencies(response):
+        """
+        :type response: dict
+        :rtype: set[str]
+        """
+        currencies = set((response.get("rates") or {}).keys())
+        if currencies and response.get("base"):
+            currencies.add(response["base"])
+        return currencies
+
     def get_by_date(self, date_of_exchange, currency, logger):
         """
         :type date_of_exchange: datetime.date
@@ -82,7 +101,7 @@ class Fixer(Provider):
         day_rates_in_eur = {}
 
         url = self._url.format(path=date_of_exchange_string)
-        response = self._get(url, logger=logger)
+        response = self._get_shared(url, logger=logger)
 
         if response:
             try:
@@ -94,6 +113,7 @@ class Fixer(Provider):
                     return {}
 
                 rates = response.get("rates", {})
+                self._share_supported_currencies(date_of_exchange, self._parse_supported_currencies(response))
 
                 for currency in currencies:
                     if currency in rates:
@@ -102,6 +122,7 @@ class Fixer(Provider):
                             day_rates_in_eur[currency] = decimal_value
             except Exception:
                 logger.exception("%s - Exception while parsing of the HTTP response.", self)
+                record_request_failure()
                 return {}
 
         day_rates = {}
@@ -129,18 +150,15 @@ class Fixer(Provider):
         :rtype: dict[date, dict[str, decimal.Decimal]]
         """
         date_of_exchange = origin_date
-        date_of_today = date.today()
+        date_of_today = clock.today()
         if date_of_exchange > date_of_today:
             date_of_exchange, date_of_today = date_of_today, date_of_exchange
 
-        step_by_day = timedelta(days=1)
         historical_rates = {}
-
-        while date_of_exchange != date_of_today:
-            day_rates = self.get_all_by_date(date_of_exchange, currencies, logger)
+        for day in self.calendar.publication_days(date_of_exchange, date_of_today - timedelta(days=1)):
+            day_rates = self.get_all_by_date(day, currencies, logger)
             if day_rates:
-                historical_rates[date_of_exchange] = day_rates
-            date_of_exchange += step_by_day
+                historical_rates[day] = day_rates
 
         return historical_rates
 
@@ -176,3 +194,4 @@ class Fixer(Provider):
 
             except Exception:
                 logger.exception("%s - Exception while parsing of the HTTP response.", self)
+                record_request_failure()
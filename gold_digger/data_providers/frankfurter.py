@@ -1,14 +1,18 @@
-from datetime import date, timedelta
+from datetime import date, time, timedelta
 from http import HTTPStatus
 from operator import attrgetter
 
 from cachetools import cachedmethod, keys
 from requests import RequestException
 
-from ._provider import Provider
+from ._async_provider import AsyncProvider
+from ._calendar import PublicationCalendar
+from ._capabilities import ProviderCapabilities
+from ..utils import clock
+from ..utils.request_failures import record_request_failure
 
 
-class Frankfurter(Provider):
+class Frankfurter(AsyncProvider):
     """
     Free service for current and historical foreign exchange rates built on top of data published by European Central Bank.
     Rates are updated only on working days around 16:00 CET
@@ -18,17 +22,52 @@ class Frankfurter(Provider):
 
     BASE_URL = "https://api.frankfurter.app/{date}"
     name = "frankfurter"
+    calendar = PublicationCalendar(
+        weekdays=range(5),
+        holidays=((1, 1), (5, 1), (12, 25), (12, 26)),  # TARGET closing days
+        easter_holidays=(-2, 1),  # Good Friday, Easter Monday
+        publish_time=time(16, 0),
+        timezone_name="Europe/Berlin",
+        history_start=date(1999, 1, 4),
+    )
+    capabilities = ProviderCapabilities(currencies_per_request=None)
 
-    @cachedmethod(cache=attrgetter("_cache"), key=lambda _, date_of_exchange, __: keys.hashkey(date_of_exchange))
+    @cachedmethod(cache=attrgetter("_cache"), key=lambda _, date_of_exchange, __: keys.hashkey(date_of_exchange), lock=attrgetter("_cache_lock"))
     def get_supported_currencies(self, date_of_exchange, logger):
         """
         :type date_of_exchange: datetime.date
         :type logger: gold_digger.utils.ContextLogger
         :rtype: set[str]
         """
-        currencies = set()
         url = self.BASE_URL.format(date=date_of_exchange.isoformat())
-        response = self._get(url, logger=logger)
+        response = self._get_shared(url, params={"base": self.base_currency}, logger=logger)
+        return self._parse_supported_currencies(response, date_of_exchange, logger)
+
+    async def async_get_supported_currencies(self, date_of_exchange, logger):
+        """
+        :type date_of_exchange: datetime.date
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: set[str]
+        """
+
+        async def _fetch():
+            """
+            :rtype: set[str]
+            """
+            url = self.BASE_URL.format(date=date_of_exchange.isoformat())
+            response = await self._async_get(url, params={"base": self.base_currency}, logger=logger)
+            return self._parse_supported_currencies(response, date_of_exchange, logger)
+
+        return await self._async_cached_supported_currencies(date_of_exchange, _fetch)
+
+    def _parse_supported_currencies(self, response, date_of_exchange, logger):
+        """
+        :type response: requests.Response | httpx.Response | None
+        :type date_of_exchange: datetime.date
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: set[str]
+        """
+        currencies = set()
         if response is not None:
             response = response.json()
             if not response.get("error"):
@@ -51,12 +90,38 @@ class Frankfurter(Provider):
         """
         date_of_exchange_string = date_of_exchange.strftime("%Y-%m-%d")
         logger.debug("%s - Requesting rates for all currencies (%s)", self, date_of_exchange_string, extra={"date": date_of_exchange_string})
-        day_rates = {}
 
         url = self.BASE_URL.format(date=date_of_exchange_string)
-        response = self._get(url, params={"base": self.base_currency}, logger=logger)
+        response = self._get_shared(url, params={"base": self.base_currency}, logger=logger)
+        return self._parse_all_by_date(response, date_of_exchange, currencies, logger)
 
+    async def async_get_all_by_date(self, date_of_exchange, currencies, logger):
+        """
+        :type date_of_exchange: datetime.date
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: dict[str, decimal.Decimal]
+        """
+        date_of_exchange_string = date_of_exchange.strftime("%Y-%m-%d")
+        logger.debug("%s - Requesting rates for all currencies (%s)", self, date_of_exchange_string, extra={"date": date_of_exchange_string})
+
+        url = self.BASE_URL.format(date=date_of_exchange_string)
+        response = await self._async_get(url, params={"base": self.base_currency}, logger=logger)
+        return self._parse_all_by_date(response, date_of_exchange, currencies, logger)
+
+    def _parse_all_by_date(self, response, date_of_exchange, currencies, logger):
+        """
+        Parse rates of the response and share currencies of a successful response with `get_supported_currencies`.
+
+        :type response: requests.Response | httpx.Response | None
+        :type date_of_exchange: datetime.date
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: dict[str, decimal.Decimal]
+        """
+        day_rates = {}
         if response is not None:
+            status_code = response.status_code
             try:
                 response = response.json()
                 if response.get("error"):
@@ -64,6 +129,8 @@ class Frankfurter(Provider):
                     return {}
 
                 rates = response.get("rates", {})
+                if status_code == HTTPStatus.OK and "base" in response:
+                    self._share_supported_currencies(date_of_exchange, {*rates, response["base"]})
                 rates[self.base_currency] = 1
 
                 for currency in currencies:
@@ -73,6 +140,7 @@ class Frankfurter(Provider):
                             day_rates[currency] = decimal_value
             except ValueError:
                 logger.exception("%s - Exception while parsing of the HTTP response.", self)
+                record_request_failure()
                 return {}
 
         return day_rates
@@ -92,6 +160,32 @@ class Frankfurter(Provider):
 
         url = self.BASE_URL.format(date=date_of_exchange_string)
         response = self._get(url, params={"symbols": currency, "base": self.base_currency}, logger=logger)
+        return self._parse_by_date(response, currency, logger)
+
+    async def async_get_by_date(self, date_of_exchange, currency, logger):
+        """
+        :type date_of_exchange: datetime.date
+        :type currency: str
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: decimal.Decimal | None
+        """
+        date_of_exchange_string = date_of_exchange.strftime("%Y-%m-%d")
+        logger.debug("%s - Requesting for %s (%s)", self, currency, date_of_exchange_string, extra={"currency": currency, "date": date_of_exchange_string})
+
+        if currency == self.base_currency:
+            return self._to_decimal(1, currency, logger=logger)
+
+        url = self.BASE_URL.format(date=date_of_exchange_string)
+        response = await self._async_get(url, params={"symbols": currency, "base": self.base_currency}, logger=logger)
+        return self._parse_by_date(response, currency, logger)
+
+    def _parse_by_date(self, response, currency, logger):
+        """
+        :type response: requests.Response | httpx.Response | None
+        :type currency: str
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: decimal.Decimal | None
+        """
         if response is not None:
             try:
                 response = response.json()
@@ -105,6 +199,9 @@ class Frankfurter(Provider):
 
             except ValueError:
                 logger.exception("%s - Exception while parsing of the HTTP response.", self)
+                record_request_failure()
+
+        return None
 
     def get_historical(self, origin_date, currencies, logger):
         """
@@ -114,18 +211,15 @@ class Frankfurter(Provider):
         :rtype: dict[date, dict[str, decimal.Decimal]]
         """
         date_of_exchange = origin_date
-        date_of_today = date.today()
+        date_of_today = clock.today()
         if date_of_exchange > date_of_today:
             date_of_exchange, date_of_today = date_of_today, date_of_exchange
 
-        step_by_day = timedelta(days=1)
         historical_rates = {}
-
-        while date_of_exchange != date_of_today:
-            day_rates = self.get_all_by_date(date_of_exchange, currencies, logger)
+        for day in self.calendar.publication_days(date_of_exchange, date_of_today - timedelta(days=1)):
+            day_rates = self.get_all_by_date(day, currencies, logger)
             if day_rates:
-                historical_rates[date_of_exchange] = day_rates
-            date_of_exchange += step_by_day
+                historical_rates[day] = day_rates
 
         return historical_rates
 
@@ -137,12 +231,28 @@ class Frankfurter(Provider):
         :rtype: requests.Response | None
         """
         try:
-            self._http_session.cookies.clear()
-            response = self._http_session.get(url, params=params, timeout=self.DEFAULT_REQUEST_TIMEOUT)
+            response = self._transport.get(url, params=params)
             if response.status_code != HTTPStatus.OK:
                 logger.error("%s - Status code: %s, URL: %s, Params: %s", self, response.status_code, url, params)
+                if self.is_failed_status(response.status_code):
+                    record_request_failure()
             return response
         except RequestException as e:
             logger.error("%s - Exception: %s, URL: %s, Params: %s", self, e, url, params)
+            record_request_failure()
 
         return None
+
+    async def _async_get(self, url, params=None, *, logger, timeout=None):
+        """
+        :type url: str
+        :type params: None | dict[str, str]
+        :type logger: gold_digger.utils.ContextLogger
+        :type timeout: None | float
+        :rtype: httpx.Response | None
+        """
+        response = await self._async_request(url, params, logger=logger, timeout=timeout)
+        if response is not None and response.status_code != HTTPStatus.OK:
+            logger.error("%s - Status code: %s, URL: %s, Params: %s", self, response.status_code, url, params)
+
+        return response
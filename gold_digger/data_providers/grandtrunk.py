@@ -1,13 +1,49 @@
+import asyncio
 from collections import defaultdict
-from datetime import date, datetime as datetime_
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
 from operator import attrgetter
 
 from cachetools import cachedmethod, keys
 
-from ._provider import Provider
+from ._async_provider import AsyncProvider
+from ..utils import clock
 
 
-class GrandTrunk(Provider):
+def parse_range(text):
+    """
+    Parse `/getrange/` payload (lines `yyyy-mm-dd rate`) into columns of dates and rates in one pass over the whole text.
+    Malformed payload is parsed record by record, invalid records are skipped and returned for logging.
+    Rates are kept as `Decimal` (not floats) so they are stored exactly as published.
+
+    :type text: str
+    :return: dates, rates and invalid records with error message
+    :rtype: tuple[list[datetime.date], list[decimal.Decimal], list[tuple[str, str]]]
+    """
+    tokens = text.split()
+    if len(tokens) % 2 == 0:
+        try:
+            return list(map(date.fromisoformat, tokens[0::2])), list(map(Decimal, tokens[1::2])), []
+        except (ValueError, ArithmeticError):
+            pass
+
+    days, rates, invalid_records = [], [], []
+    for record in text.strip().split("\n"):
+        record = record.rstrip()
+        if record:
+            try:
+                date_string, rate_string = record.split(" ")
+                days.append(date.fromisoformat(date_string))
+                rates.append(Decimal(rate_string))
+            except (ValueError, ArithmeticError) as e:
+                del days[len(rates) :]
+                invalid_records.append((record, str(e)))
+
+    return days, rates, invalid_records
+
+
+class GrandTrunk(AsyncProvider):
     """
     Service offers day exchange rates based on Federal Reserve and European Central Bank.
     It is currently free for use in low-volume and non-commercial settings.
@@ -16,7 +52,29 @@ class GrandTrunk(Provider):
     BASE_URL = "http://currencies.apps.grandtrunk.net"
     name = "grandtrunk"
 
-    @cachedmethod(cache=attrgetter("_cache"), key=lambda _, date_of_exchange, __: keys.hashkey(date_of_exchange))
+    def __init__(self, base_currency, http_user_agent, transport=None, supported_currencies_cache=None, parse_processes=0):
+        """
+        :type base_currency: str
+        :type http_user_agent: str
+        :type transport: None | gold_digger.data_providers.HttpTransport
+        :type supported_currencies_cache: None | cachetools.Cache
+        :param parse_processes: historical ranges are parsed in a pool of processes while next ranges are downloaded, inline if 0
+        :type parse_processes: int
+        """
+        super().__init__(base_currency, http_user_agent, transport, supported_currencies_cache)
+        self._parse_processes = parse_processes
+
+    @staticmethod
+    def is_cacheable_response(response):
+        """
+        GrandTrunk answers with plain `False` and status 200 when it has no rate for the date.
+
+        :type response: requests.Response
+        :rtype: bool
+        """
+        return response.text.strip() != "False"
+
+    @cachedmethod(cache=attrgetter("_cache"), key=lambda _, date_of_exchange, __: keys.hashkey(date_of_exchange), lock=attrgetter("_cache_lock"))
     def get_supported_currencies(self, date_of_exchange, logger):
         """
         :type date_of_exchange: date
@@ -24,6 +82,30 @@ class GrandTrunk(Provider):
         :rtype: set[str]
         """
         response = self._get(f"{self.BASE_URL}/currencies/{date_of_exchange.strftime('%Y-%m-%d')}", logger=logger)
+        return self._parse_supported_currencies(response, logger)
+
+    async def async_get_supported_currencies(self, date_of_exchange, logger):
+        """
+        :type date_of_exchange: date
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: set[str]
+        """
+
+        async def _fetch():
+            """
+            :rtype: set[str]
+            """
+            response = await self._async_get(f"{self.BASE_URL}/currencies/{date_of_exchange.strftime('%Y-%m-%d')}", logger=logger)
+            return self._parse_supported_currencies(response, logger)
+
+        return await self._async_cached_supported_currencies(date_of_exchange, _fetch)
+
+    def _parse_supported_currencies(self, response, logger):
+        """
+        :type response: requests.Response | httpx.Response | None
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: set[str]
+        """
         if response is None:
             return set()
 
@@ -51,6 +133,22 @@ class GrandTrunk(Provider):
 
         return self._to_decimal(response.text.strip(), currency, logger=logger)
 
+    async def async_get_by_date(self, date_of_exchange, currency, logger):
+        """
+        :type date_of_exchange: date
+        :type currency: str
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: decimal.Decimal | None
+        """
+        date_str = date_of_exchange.strftime("%Y-%m-%d")
+        logger.debug("%s - Requesting for %s (%s)", self, currency, date_str, extra={"currency": currency, "date": date_str})
+
+        response = await self._async_get(f"{self.BASE_URL}/getrate/{date_str}/{self.base_currency}/{currency}", logger=logger)
+        if response is None:
+            return None
+
+        return self._to_decimal(response.text.strip(), currency, logger=logger)
+
     def get_all_by_date(self, date_of_exchange, currencies, logger):
         """
         :type date_of_exchange: date
@@ -76,6 +174,23 @@ class GrandTrunk(Provider):
 
         return day_rates
 
+    async def async_get_all_by_date(self, date_of_exchange, currencies, logger):
+        """
+        Rates of all currencies are requested concurrently, one request per currency.
+
+        :type date_of_exchange: date
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: dict[str, decimal.Decimal | None]
+        """
+        logger.debug("%s - Requesting for all rates for date %s", self, date_of_exchange)
+
+        supported_currencies = await self.async_get_supported_currencies(date_of_exchange, logger)
+        requested_currencies = [currency for currency in currencies if currency in supported_currencies]
+        rates = await asyncio.gather(*(self.async_get_by_date(date_of_exchange, currency, logger) for currency in requested_currencies))
+
+        return {currency: rate for currency, rate in zip(requested_currencies, rates) if rate}
+
     def get_historical(self, origin_date, currencies, logger):
         """
         :type origin_date: date
@@ -83,24 +198,39 @@ class GrandTrunk(Provider):
         :type logger: gold_digger.utils.ContextLogger
         :rtype: dict[date, dict[str, decimal.Decimal]]
         """
-        day_rates = defaultdict(dict)
+        if self._parse_processes:
+            with ProcessPoolExecutor(max_workers=self._parse_processes) as executor:
+                return self._get_historical(origin_date, currencies, logger, executor)
+        return self._get_historical(origin_date, currencies, logger)
+
+    def _get_historical(self, origin_date, currencies, logger, executor=None):
+        """
+        :type origin_date: date
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        :type executor: None | concurrent.futures.ProcessPoolExecutor
+        :rtype: dict[date, dict[str, decimal.Decimal]]
+        """
+        parsed_ranges = {}
         origin_date_string = origin_date.strftime("%Y-%m-%d")
-        for currency in currencies:
-            response = self._get(f"{self.BASE_URL}/getrange/{origin_date_string}/{date.today()}/{self.base_currency}/{currency}", logger=logger)
+        for currency in sorted(currencies):
+            response = self._get(f"{self.BASE_URL}/getrange/{origin_date_string}/{clock.today()}/{self.base_currency}/{currency}", logger=logger)
             if response is None:
                 continue
 
-            for record in response.text.strip().split("\n"):
-                record = record.rstrip()
-                if record:
-                    try:
-                        date_string, exchange_rate_string = record.split(" ")
-                        day = datetime_.strptime(date_string, "%Y-%m-%d")
-                    except ValueError as e:
-                        logger.error("%s - Parsing of rate & date on record '%s' failed: %s", self, record, e)
-                        continue
-                    decimal_value = self._to_decimal(exchange_rate_string, currency, logger=logger)
-                    if decimal_value:
-                        day_rates[day][currency] = decimal_value
+            if executor is None:
+                parsed_ranges[currency] = Future()
+                parsed_ranges[currency].set_result(parse_range(response.text))
+            else:
+                parsed_ranges[currency] = executor.submit(parse_range, response.text)
+
+        day_rates = defaultdict(dict)
+        for currency, parsed_range in parsed_ranges.items():
+            days, rates, invalid_records = parsed_range.result()
+            for record, error in invalid_records:
+                logger.error("%s - Parsing of rate & date on record '%s' failed: %s", self, record, error)
+            for day, rate in zip(days, rates):
+                if rate:
+                    day_rates[day][currency] = rate
 
         return day_rates
@@ -1,6 +1,10 @@
-from datetime import date
+from concurrent.futures import as_completed, ThreadPoolExecutor
+from contextvars import copy_context
 
+from ._calendar import PublicationCalendar
+from ._capabilities import ProviderCapabilities
 from ._provider import Provider
+from ..utils import clock
 from ..utils.helpers import batches
 
 
@@ -9,15 +13,21 @@ class Yahoo(Provider):
     SYMBOLS_PATTERN = "{}{}%3DX"
     SYMBOLS_BATCH_SIZE = 20  # Yahoo has recently started returning error for more
     name = "yahoo"
+    calendar = PublicationCalendar(history_days=0)  # only rates of today are served
+    capabilities = ProviderCapabilities(currencies_per_request=SYMBOLS_BATCH_SIZE)
 
-    def __init__(self, base_currency, http_user_agent, supported_currencies):
+    def __init__(self, base_currency, http_user_agent, supported_currencies, transport=None, batch_workers=4):
         """
         :type base_currency: str
         :type http_user_agent: str
         :type supported_currencies: set[str]
+        :type transport: None | gold_digger.data_providers.HttpTransport
+        :param batch_workers: maximal number of symbol batches requested concurrently
+        :type batch_workers: int
         """
-        super().__init__(base_currency, http_user_agent)
+        super().__init__(base_currency, http_user_agent, transport)
         self._downloaded_rates = {}
+        self._batch_executor = ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix="yahoo-batch")
         self._supported_currencies = supported_currencies - {
             "ATS",
             "BEF",
@@ -63,9 +73,9 @@ class Yahoo(Provider):
             "ZWL",
         }
 
-    def get_supported_currencies(self, date_of_exchange=date.today(), *_):
+    def get_supported_currencies(self, date_of_exchange=None, *_):
         """
-        :type date_of_exchange: datetime.date
+        :type date_of_exchange: None | datetime.date
         :rtype: set[str]
         """
         return self._supported_currencies
@@ -77,7 +87,7 @@ class Yahoo(Provider):
         :type logger: gold_digger.utils.ContextLogger
         :rtype: decimal.Decimal | None
         """
-        if date_of_exchange == date.today():
+        if date_of_exchange == clock.today():
             date_str = date_of_exchange.strftime("%Y-%m-%d")
             logger.debug("%s - Requesting for %s (%s)", self, currency, date_str, extra={"currency": currency, "date": date_str})
 
@@ -90,7 +100,7 @@ class Yahoo(Provider):
         :type logger: gold_digger.utils.ContextLogger
         :rtype: dict[str, decimal.Decimal | None]
         """
-        if date_of_exchange == date.today():
+        if date_of_exchange == clock.today():
             date_str = date_of_exchange.strftime("%Y-%m-%d")
             logger.debug("%s - Requesting rates for all currencies (%s)", self, date_str, extra={"date": date_str})
 
@@ -109,18 +119,35 @@ class Yahoo(Provider):
 
     def _get_all_latest(self, logger):
         """
+        Batches of symbols are requested concurrently and their rates are merged as they arrive.
+        Batches are composed deterministically (symbols are sorted) so the same batch is requested on retry.
+
         :type logger: gold_digger.utils.ContextLogger
         :rtype: dict[str, None | decimal.Decimal]
         """
         currency_rates = {}
-        symbols = {self.SYMBOLS_PATTERN.format(self.base_currency, currency) for currency in self.get_supported_currencies()}
+        symbols = [self.SYMBOLS_PATTERN.format(self.base_currency, currency) for currency in sorted(self.get_supported_currencies())]
 
-        for symbols_batch in batches(symbols, self.SYMBOLS_BATCH_SIZE):
-            response = self._get(self.BASE_URL.format(",".join(symbols_batch)), logger=logger)
-            currency_rates.update(self._parse_response(response, logger))
+        futures = [
+            self._batch_executor.submit(copy_context().run, self._get_batch, symbols_batch, logger)  # deadline of the caller applies to batches too
+            for symbols_batch in batches(symbols, self.SYMBOLS_BATCH_SIZE)
+        ]
+        for future in as_completed(futures):
+            currency_rates.update(future.result())
 
         return currency_rates
 
+    def _get_batch(self, symbols_batch, logger):
+        """
+        Failed batch is not requested again here, transient failures (connection errors, 5xx responses) are retried by the transport.
+
+        :type symbols_batch: list[str]
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: dict[str, None | decimal.Decimal]
+        """
+        response = self._get(self.BASE_URL.format(",".join(symbols_batch)), logger=logger)
+        return self._parse_response(response, logger)
+
     def _parse_response(self, response, logger):
         """
         :type response: requests.Response | None
@@ -1,2 +1,6 @@
+from .dao_advisory_lock import DaoAdvisoryLock
 from .dao_exchange_rate import DaoExchangeRate
+from .dao_ingestion_job import DaoIngestionJob
 from .dao_provider import DaoProvider
+from .dao_provider_miss import DaoProviderMiss
+from .dao_supported_currencies import DaoSupportedCurrencies
@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+from zlib import crc32
+
+from sqlalchemy import text
+
+
+class DaoAdvisoryLock:
+    """
+    PostgreSQL advisory locks of rates updates shared by all runners (cron of every pod, manual updates).
+    Lock is held by its own connection, so it's kept while the session of DAOs commits and releases its connections.
+    The lock is released when the runner dies too, because its connection is closed.
+    """
+
+    NAMESPACE = "gold-digger"
+
+    def __init__(self, db_connection):
+        """
+        :type db_connection: sqlalchemy.engine.Engine
+        """
+        self.db_connection = db_connection
+
+    @classmethod
+    def key(cls, provider_name, date_of_exchange):
+        """
+        :type provider_name: str
+        :type date_of_exchange: datetime.date
+        :return: key of `pg_advisory_lock(int, int)`
+        :rtype: tuple[int, int]
+        """
+        provider_key = crc32(f"{cls.NAMESPACE}:{provider_name}".encode("utf-8"))
+        return provider_key - 2**32 if provider_key >= 2**31 else provider_key, date_of_exchange.toordinal()
+
+    @contextmanager
+    def try_lock(self, provider_name, date_of_exchange):
+        """
+        Lock rates of the provider for the date without waiting, i.e. yield False if they are locked by another runner.
+
+        :type provider_name: str
+        :type date_of_exchange: datetime.date
+        :rtype: collections.abc.Iterator[bool]
+        """
+        provider_key, date_key = self.key(provider_name, date_of_exchange)
+        with self.db_connection.connect() as connection:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:provider_key, :date_key)"),
+                {"provider_key": provider_key, "date_key": date_key},
+            ).scalar()
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(text("SELECT pg_advisory_unlock(:provider_key, :date_key)"), {"provider_key": provider_key, "date_key": date_key})
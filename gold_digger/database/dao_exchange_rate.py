@@ -1,15 +1,21 @@
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
 from .db_model import ExchangeRate
+from ..utils.metrics import DB_CONFLICTS
 
 
 class DaoExchangeRate:
-    def __init__(self, db_session):
+    def __init__(self, db_session, db_session_factory=None):
         """
         :type db_session: sqlalchemy.orm.Session
+        :param db_session_factory: factory of short sessions of `store_new_rates` (called from threads fetching rates of data providers)
+        :type db_session_factory: None | sqlalchemy.orm.sessionmaker
         """
         self.db_session = db_session
+        self.db_session_factory = db_session_factory
 
     def insert_exchange_rate_to_db(self, records, logger):
         """
@@ -29,6 +35,7 @@ class DaoExchangeRate:
                 self.db_session.commit()
             except IntegrityError:
                 self.db_session.rollback()
+                DB_CONFLICTS.labels("insert_exchange_rate").inc()
                 duplicates.add(record["currency"])
 
         if duplicates:
@@ -47,6 +54,7 @@ class DaoExchangeRate:
         """
         return (
             self.db_session.query(ExchangeRate)
+            .options(joinedload(ExchangeRate.provider))  # providers of rates are read by caller, avoid lazy load of every provider
             .filter(
                 and_(ExchangeRate.date == date_of_exchange, ExchangeRate.currency == currency),
             )
@@ -68,6 +76,16 @@ class DaoExchangeRate:
             .first()
         )
 
+    def has_rates_by_date_provider(self, date_of_exchange, provider_id):
+        """
+        :type date_of_exchange: datetime.date
+        :type provider_id: int
+        :rtype: bool
+        """
+        return self.db_session.query(
+            self.db_session.query(ExchangeRate).filter(and_(ExchangeRate.date == date_of_exchange, ExchangeRate.provider_id == provider_id)).exists(),
+        ).scalar()
+
     def insert_new_rate(self, date_of_exchange, db_provider, currency, rate):
         """
         Insert new exchange rate for the specified date by specified provider.
@@ -85,9 +103,56 @@ class DaoExchangeRate:
             self.db_session.commit()
         except IntegrityError:  # rate for this currency, date and provider is already in database
             self.db_session.rollback()
+            DB_CONFLICTS.labels("insert_new_rate").inc()
             db_record = self.get_rate_by_date_currency_provider(date_of_exchange, currency, db_provider.name)
         return db_record
 
+    def insert_new_rates(self, records):
+        """
+        Insert new exchange rates in one statement. Rates already stored in database are kept as they are (no update),
+        i.e. concurrent inserts of the same rate don't raise IntegrityError. Stored records of all given rates are returned.
+
+        INSERT INTO "USD_exchange_rates" (...) VALUES (...), (...) ON CONFLICT (date, provider_id, currency) DO NOTHING
+
+        :type records: list[dict[str, decimal.Decimal | datetime.date | int | str]]
+        :rtype: list[gold_digger.database.db_model.ExchangeRate]
+        """
+        if not records:
+            return []
+
+        try:
+            result = self.db_session.execute(insert(ExchangeRate).values(records).on_conflict_do_nothing(index_elements=["date", "provider_id", "currency"]))
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+        if result.rowcount < len(records):
+            DB_CONFLICTS.labels("insert_new_rates").inc(len(records) - result.rowcount)
+
+        keys = [(record["date"], record["provider_id"], record["currency"]) for record in records]
+        return self.db_session.query(ExchangeRate).filter(tuple_(ExchangeRate.date, ExchangeRate.provider_id, ExchangeRate.currency).in_(keys)).all()
+
+    def store_new_rates(self, records):
+        """
+        Same as `insert_new_rates`, but in its own short session (it's called from threads fetching rates) and stored records are not returned.
+
+        INSERT INTO "USD_exchange_rates" (...) VALUES (...), (...) ON CONFLICT (date, provider_id, currency) DO NOTHING
+
+        :type records: list[dict[str, decimal.Decimal | datetime.date | int | str]]
+        :return: number of inserted rates
+        :rtype: int
+        """
+        if not records:
+            return 0
+
+        with self.db_session_factory() as db_session, db_session.begin():
+            result = db_session.execute(insert(ExchangeRate).values(records).on_conflict_do_nothing(index_elements=["date", "provider_id", "currency"]))
+
+        if result.rowcount < len(records):
+            DB_CONFLICTS.labels("store_new_rates").inc(len(records) - result.rowcount)
+        return result.rowcount
+
     def get_sum_of_rates_in_period(self, start_date, end_date, currency):
         """
         SELECT provider_id, count(*), SUM(rate) FROM "USD_exchange_rates" WHERE date >= '%Y-%m-%d' AND date <= '%Y-%m-%d' GROUP BY provider_id
@@ -0,0 +1,160 @@
+from datetime import timedelta
+
+from sqlalchemy import and_, func, or_
+
+from .db_model import IngestionJob
+
+
+class DaoIngestionJob:
+    """
+    Queue of ingestion jobs in PostgreSQL. Jobs are claimed by `SELECT ... FOR UPDATE SKIP LOCKED`, so concurrent workers
+    (threads, processes, pods) never take the same job and never wait for each other. Every operation uses its own short session.
+    """
+
+    def __init__(self, db_session_factory, visibility_timeout, max_attempts, retry_delay):
+        """
+        :type db_session_factory: sqlalchemy.orm.sessionmaker
+        :param visibility_timeout: seconds a claimed job is hidden from other workers, it's claimed again if not finished by then
+        :type visibility_timeout: int
+        :param max_attempts: attempts of a job before it's marked as failed
+        :type max_attempts: int
+        :param retry_delay: seconds to retry a job after its first failure, doubled with every next failure
+        :type retry_delay: int
+        """
+        self.db_session_factory = db_session_factory
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def enqueue(self, provider_name, start_date, end_date, now, chunk_days=31):
+        """
+        Split interval <start_date, end_date> into jobs of at most `chunk_days` days.
+
+        :type provider_name: str
+        :type start_date: datetime.date
+        :type end_date: datetime.date
+        :type now: datetime.datetime
+        :type chunk_days: int
+        :return: IDs of the enqueued jobs
+        :rtype: list[int]
+        """
+        jobs = []
+        while start_date <= end_date:
+            chunk_end_date = min(start_date + timedelta(days=chunk_days - 1), end_date)
+            jobs.append(
+                IngestionJob(
+                    provider=provider_name,
+                    start_date=start_date,
+                    end_date=chunk_end_date,
+                    status=IngestionJob.PENDING,
+                    attempts=0,
+                    max_attempts=self.max_attempts,
+                    run_after=now,
+                    created_at=now,
+                    updated_at=now,
+                ),
+            )
+            start_date = chunk_end_date + timedelta(days=1)
+
+        with self.db_session_factory() as db_session, db_session.begin():
+            db_session.add_all(jobs)
+            db_session.flush()
+            return [job.id for job in jobs]
+
+    def claim(self, now):
+        """
+        Claim the oldest pending job or a running job whose worker didn't finish it within visibility timeout (e.g. it crashed).
+
+        SELECT ... FROM ingestion_job WHERE status = 'pending' AND run_after <= now OR status = 'running' AND locked_until <= now
+        ORDER BY run_after, id LIMIT 1 FOR UPDATE SKIP LOCKED
+
+        :type now: datetime.datetime
+        :return: the claimed job (detached from session) or None if there is no job to run
+        :rtype: None | gold_digger.database.db_model.IngestionJob
+        """
+        with self.db_session_factory() as db_session, db_session.begin():
+            while True:
+                job = (
+                    db_session.query(IngestionJob)
+                    .filter(
+                        or_(
+                            and_(IngestionJob.status == IngestionJob.PENDING, IngestionJob.run_after <= now),
+                            and_(IngestionJob.status == IngestionJob.RUNNING, IngestionJob.locked_until <= now),
+                        ),
+                    )
+                    .order_by(IngestionJob.run_after, IngestionJob.id)
+                    .with_for_update(skip_locked=True)
+                    .first()
+                )
+                if job is None:
+                    return None
+
+                job.updated_at = now
+                if job.attempts >= job.max_attempts:
+                    job.status = IngestionJob.FAILED
+                    job.last_error = f"Visibility timeout expired in the last attempt. {job.last_error or ''}".strip()
+                    db_session.flush()
+                    continue
+
+                job.status = IngestionJob.RUNNING
+                job.attempts += 1
+                job.locked_until = now + timedelta(seconds=self.visibility_timeout)
+                db_session.flush()
+                db_session.expunge(job)
+                return job
+
+    def complete(self, job, now):
+        """
+        Nothing is changed if the job was claimed again by another worker meanwhile (i.e. its attempt is stale).
+
+        :type job: gold_digger.database.db_model.IngestionJob
+        :type now: datetime.datetime
+        :return: the job was completed
+        :rtype: bool
+        """
+        with self.db_session_factory() as db_session, db_session.begin():
+            updated = (
+                db_session.query(IngestionJob)
+                .filter(and_(IngestionJob.id == job.id, IngestionJob.attempts == job.attempts, IngestionJob.status == IngestionJob.RUNNING))
+                .update({"status": IngestionJob.DONE, "locked_until": None, "last_error": None, "updated_at": now}, synchronize_session=False)
+            )
+            return updated == 1
+
+    def fail(self, job, error, now):
+        """
+        Schedule retry of the job or mark it as failed if its attempts are exhausted.
+        Nothing is changed if the job was claimed again by another worker meanwhile (i.e. its attempt is stale).
+
+        :type job: gold_digger.database.db_model.IngestionJob
+        :type error: str
+        :type now: datetime.datetime
+        :return: the job will be retried
+        :rtype: bool
+        """
+        with self.db_session_factory() as db_session, db_session.begin():
+            record = (
+                db_session.query(IngestionJob)
+                .filter(and_(IngestionJob.id == job.id, IngestionJob.attempts == job.attempts, IngestionJob.status == IngestionJob.RUNNING))
+                .with_for_update()
+                .first()
+            )
+            if record is None:
+                return False
+
+            record.last_error = error
+            record.locked_until = None
+            record.updated_at = now
+            if record.attempts >= record.max_attempts:
+                record.status = IngestionJob.FAILED
+                return False
+
+            record.status = IngestionJob.PENDING
+            record.run_after = now + timedelta(seconds=self.retry_delay * 2 ** (record.attempts - 1))
+            return True
+
+    def count_by_status(self):
+        """
+        :rtype: dict[str, int]
+        """
+        with self.db_session_factory() as db_session:
+            return dict(db_session.query(IngestionJob.status, func.count(IngestionJob.id)).group_by(IngestionJob.status).all())
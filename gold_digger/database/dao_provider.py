@@ -8,12 +8,20 @@ class DaoProvider:
         """
         self.db_session = db_session
 
+    def get_provider_by_name(self, name):
+        """
+        :type name: str
+        :return: the provider or None if it's not in database
+        :rtype: None | gold_digger.database.db_model.Provider
+        """
+        return self.db_session.query(Provider).filter(Provider.name == name).first()
+
     def get_or_create_provider_by_name(self, name):
         """
         :type name: str
         :rtype: gold_digger.database.db_model.Provider
         """
-        provider = self.db_session.query(Provider).filter(Provider.name == name).first()
+        provider = self.get_provider_by_name(name)
         if not provider:
             provider = Provider(name=name)
             self.db_session.add(provider)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from sqlalchemy import and_, func, literal
+from sqlalchemy.dialects.postgresql import insert
+
+from .db_model import Provider, ProviderMiss
+
+
+class DaoProviderMiss:
+    def __init__(self, db_session, ttl, ttl_max):
+        """
+        :type db_session: sqlalchemy.orm.Session
+        :param ttl: seconds to skip provider after the first miss, doubled with every next miss
+        :type ttl: int
+        :param ttl_max: upper bound of the skip period in seconds
+        :type ttl_max: int
+        """
+        self.db_session = db_session
+        self.ttl = ttl
+        self.ttl_max = ttl_max
+
+    def get_active_misses(self, date_of_exchange, currencies, now):
+        """
+        :type date_of_exchange: datetime.date
+        :type currencies: list[str]
+        :type now: datetime.datetime
+        :return: names of providers and currencies which should not be requested for the date
+        :rtype: set[tuple[str, str]]
+        """
+        try:
+            rows = (
+                self.db_session.query(Provider.name, ProviderMiss.currency)
+                .join(Provider, Provider.id == ProviderMiss.provider_id)
+                .filter(
+                    and_(ProviderMiss.date == date_of_exchange, ProviderMiss.currency.in_(currencies), ProviderMiss.retry_after > now),
+                )
+                .all()
+            )
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+        return {(name, currency) for name, currency in rows}
+
+    def record_misses(self, records, now):
+        """
+        Insert new misses or prolong the existing ones. Skip period is doubled with every miss up to 'ttl_max'.
+
+        INSERT INTO provider_miss (...) VALUES (...), (...)
+        ON CONFLICT (date, provider_id, currency) DO UPDATE SET misses = provider_miss.misses + 1, retry_after = ...
+
+        :type records: list[dict[str, datetime.date | int | str]]
+        :type now: datetime.datetime
+        """
+        if not records:
+            return
+
+        values = [dict(record, misses=1, retry_after=now + timedelta(seconds=min(self.ttl, self.ttl_max))) for record in records]
+        statement = insert(ProviderMiss).values(values)
+        ttl_seconds = func.least(self.ttl * func.power(2, ProviderMiss.misses), self.ttl_max)
+        statement = statement.on_conflict_do_update(
+            index_elements=["date", "provider_id", "currency"],
+            set_={
+                "misses": ProviderMiss.misses + 1,
+                "retry_after": literal(now) + literal(timedelta(seconds=1)) * ttl_seconds,
+            },
+        )
+        try:
+            self.db_session.execute(statement)
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+    def delete_stale_misses(self, now):
+        """
+        Keep the table bounded. Misses expired for longer than 'ttl_max' are forgotten, i.e. the next miss starts with the initial skip period.
+
+        :type now: datetime.datetime
+        :return: number of deleted misses
+        :rtype: int
+        """
+        try:
+            deleted = (
+                self.db_session.query(ProviderMiss).filter(ProviderMiss.retry_after < now - timedelta(seconds=self.ttl_max)).delete(synchronize_session=False)
+            )
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+        return deleted
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_
+from sqlalchemy.dialects.postgresql import insert
+
+from .db_model import Provider, SupportedCurrencies
+
+
+class DaoSupportedCurrencies:
+    """
+    Supported currencies are read & written from threads of data providers, so every operation uses its own short session.
+    """
+
+    def __init__(self, db_session_factory):
+        """
+        :type db_session_factory: sqlalchemy.orm.sessionmaker
+        """
+        self.db_session_factory = db_session_factory
+
+    def get_supported_currencies(self, provider_name, date_of_exchange):
+        """
+        :type provider_name: str
+        :type date_of_exchange: datetime.date
+        :rtype: None | set[str]
+        """
+        with self.db_session_factory() as db_session:
+            record = (
+                db_session.query(SupportedCurrencies)
+                .join(Provider, Provider.id == SupportedCurrencies.provider_id)
+                .filter(
+                    and_(Provider.name == provider_name, SupportedCurrencies.valid_from <= date_of_exchange, SupportedCurrencies.valid_to >= date_of_exchange),
+                )
+                .order_by(SupportedCurrencies.valid_from.desc())
+                .first()
+            )
+            return set(record.currencies) if record else None
+
+    def save_supported_currencies(self, provider_name, date_of_exchange, currencies):
+        """
+        Extend interval of the latest previous record if the currencies are the same, otherwise start new interval on the date.
+
+        :type provider_name: str
+        :type date_of_exchange: datetime.date
+        :type currencies: set[str]
+        """
+        now = datetime.utcnow()
+        with self.db_session_factory() as db_session, db_session.begin():
+            db_session.execute(insert(Provider).values(name=provider_name).on_conflict_do_nothing(index_elements=["name"]))
+            provider_id = db_session.query(Provider.id).filter(Provider.name == provider_name).scalar()
+            record = (
+                db_session.query(SupportedCurrencies)
+                .filter(and_(SupportedCurrencies.provider_id == provider_id, SupportedCurrencies.valid_from <= date_of_exchange))
+                .order_by(SupportedCurrencies.valid_from.desc())
+                .with_for_update()
+                .first()
+            )
+
+            if record is not None and set(record.currencies) == currencies:
+                record.valid_to = max(record.valid_to, date_of_exchange)
+                record.updated_at = now
+                return
+
+            if record is not None and record.valid_to >= date_of_exchange:
+                if record.valid_from == date_of_exchange:
+                    record.currencies = sorted(currencies)
+                    record.valid_to = date_of_exchange
+                    record.updated_at = now
+                    return
+                record.valid_to = date_of_exchange - timedelta(days=1)
+
+            db_session.add(
+                SupportedCurrencies(
+                    provider_id=provider_id,
+                    valid_from=date_of_exchange,
+                    valid_to=date_of_exchange,
+                    currencies=sorted(currencies),
+                    updated_at=now,
+                ),
+            )
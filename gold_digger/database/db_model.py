@@ -1,6 +1,6 @@
 from decimal import Decimal
 
-from sqlalchemy import BigInteger, Column, Date, DECIMAL, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import ARRAY, BigInteger, Column, Date, DateTime, DECIMAL, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -35,3 +35,63 @@ class ExchangeRate(Base):
             currency=base_currency,
             rate=Decimal(1.0),
         )
+
+
+class ProviderMiss(Base):
+    """
+    Provider had no exchange rate of the currency for the (historical) date. Provider is not requested again until 'retry_after'.
+    """
+
+    __tablename__ = "provider_miss"
+    __table_args__ = (UniqueConstraint("date", "provider_id", "currency"),)
+
+    id = Column(BigInteger, primary_key=True)
+    date = Column(Date, nullable=False)
+    provider_id = Column(Integer, ForeignKey("provider.id"), nullable=False)
+    currency = Column(String, nullable=False)
+    misses = Column(Integer, nullable=False, default=1)
+    retry_after = Column(DateTime, nullable=False)
+
+
+class SupportedCurrencies(Base):
+    """
+    Currencies supported by the provider on days within interval <valid_from, valid_to>.
+    """
+
+    __tablename__ = "supported_currencies"
+
+    id = Column(Integer, primary_key=True)
+    provider_id = Column(Integer, ForeignKey("provider.id"), nullable=False, index=True)
+    valid_from = Column(Date, nullable=False)
+    valid_to = Column(Date, nullable=False)
+    currencies = Column(ARRAY(String), nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class IngestionJob(Base):
+    """
+    Unit of ingestion work (rates of the provider for days within interval <start_date, end_date>) consumed by workers.
+    Running job is invisible to other workers until 'locked_until', then it's taken again (the worker is considered dead).
+    Failed job is retried after 'run_after' until its attempts are exhausted.
+    """
+
+    __tablename__ = "ingestion_job"
+    __table_args__ = (Index("ix_ingestion_job_status_run_after", "status", "run_after"),)
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    id = Column(BigInteger, primary_key=True)
+    provider = Column(String, nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    status = Column(String, nullable=False, default=PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, nullable=False)
+    locked_until = Column(DateTime)
+    last_error = Column(String)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
@@ -1,28 +1,31 @@
+import atexit
 import logging
+import os
 from functools import lru_cache
-from os.path import abspath, dirname, normpath
+from logging.handlers import QueueListener
+from os.path import abspath, dirname, exists, normpath
+from queue import SimpleQueue
 from urllib.parse import quote
 from uuid import uuid4
 
-import graypy
 from cached_property import cached_property as service
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
 
 from . import settings
-from .data_providers import CurrencyLayer, Fixer, Frankfurter, GrandTrunk, Yahoo
-from .database.dao_exchange_rate import DaoExchangeRate
-from .database.dao_provider import DaoProvider
-from .managers.exchange_rate_manager import ExchangeRateManager
 from .utils import ContextLogger
-from .utils.custom_logging import IncludeFilter
+from .utils.custom_logging import DebugSamplingFilter, IncludeFilter, LocalQueueHandler
 
 
 class DiContainer:
+    """
+    Services are created on first use and modules of services (SQLAlchemy, data providers, graypy...) are imported
+    only then, so every command (and every cron job started as new process) loads only what it uses.
+    """
+
     def __init__(self, main_file_path):
         """
         :type main_file_path: str
         """
+        self.set_up_root_logger()
         self._file_path = normpath(abspath(main_file_path))
 
         self._db_connection = None
@@ -40,6 +43,8 @@ class DiContainer:
         :type exc_val: None | BaseException
         :type exc_tb: None | traceback
         """
+        if self.__dict__.get("exchange_archive") is not None:
+            self.exchange_archive.save(settings.PROVIDER_HTTP_RECORD_ARCHIVE)
         if self._db_session is not None:
             self._db_session.remove()
             self._db_session = None
@@ -66,6 +71,10 @@ class DiContainer:
         """
         :rtype: sqlalchemy.engine.base.Engine
         """
+        from sqlalchemy import create_engine
+
+        from .utils.metrics import instrument_engine
+
         self._db_connection = create_engine(
             "{dialect}://{user}:{password}@{host}:{port}/{name}".format(
                 dialect=settings.DATABASE_DIALECT,
@@ -76,14 +85,26 @@ class DiContainer:
                 name=settings.DATABASE_NAME,
             ),
         )
+        instrument_engine(self._db_connection)
         return self._db_connection
 
+    @service
+    def db_session_factory(self):
+        """
+        :rtype: sqlalchemy.orm.sessionmaker
+        """
+        from sqlalchemy.orm import sessionmaker
+
+        return sessionmaker(self.db_connection)
+
     @service
     def db_session(self):
         """
         :rtype: sqlalchemy.orm.Session
         """
-        self._db_session = scoped_session(sessionmaker(self.db_connection))
+        from sqlalchemy.orm import scoped_session
+
+        self._db_session = scoped_session(self.db_session_factory)
         return self._db_session()
 
     @property
@@ -98,26 +119,154 @@ class DiContainer:
         """
         :rtype: dict[str, gold_digger.data_providers.Provider]
         """
+        from .data_providers import CurrencyLayer, Fixer, Frankfurter, GrandTrunk, Yahoo
+
+        user_agent = settings.USER_AGENT_HTTP_HEADER
         providers = (
-            GrandTrunk(self.base_currency, settings.USER_AGENT_HTTP_HEADER),
-            CurrencyLayer(self.base_currency, settings.USER_AGENT_HTTP_HEADER, settings.SECRETS_CURRENCY_LAYER_ACCESS_KEY, self.logger()),
-            Yahoo(self.base_currency, settings.USER_AGENT_HTTP_HEADER, settings.SUPPORTED_CURRENCIES),
-            Fixer(self.base_currency, settings.USER_AGENT_HTTP_HEADER, settings.SECRETS_FIXER_ACCESS_KEY, self.logger()),
-            Frankfurter(self.base_currency, settings.USER_AGENT_HTTP_HEADER),
+            GrandTrunk(
+                self.base_currency,
+                user_agent,
+                self.http_transport(),
+                self.supported_currencies_cache(GrandTrunk.name),
+                settings.PROVIDER_GRANDTRUNK_PARSE_PROCESSES,
+            ),
+            CurrencyLayer(
+                self.base_currency,
+                user_agent,
+                settings.SECRETS_CURRENCY_LAYER_ACCESS_KEY,
+                self.logger(),
+                self.http_transport(),
+                self.supported_currencies_cache(CurrencyLayer.name),
+            ),
+            Yahoo(self.base_currency, user_agent, settings.SUPPORTED_CURRENCIES, self.http_transport()),
+            Fixer(
+                self.base_currency,
+                user_agent,
+                settings.SECRETS_FIXER_ACCESS_KEY,
+                self.logger(),
+                self.http_transport(),
+                self.supported_currencies_cache(Fixer.name),
+            ),
+            Frankfurter(self.base_currency, user_agent, self.http_transport(), self.supported_currencies_cache(Frankfurter.name)),
         )
         return {provider.name: provider for provider in providers}
 
+    @service
+    def http_response_cache(self):
+        """
+        On-disk cache of provider responses is shared by all transports, it is disabled unless its directory is configured.
+
+        :rtype: None | gold_digger.data_providers.HttpResponseCache
+        """
+        if not settings.PROVIDER_HTTP_CACHE_DIR:
+            return None
+
+        from .data_providers import HttpResponseCache
+
+        return HttpResponseCache(settings.PROVIDER_HTTP_CACHE_DIR, settings.PROVIDER_HTTP_CACHE_MAX_SIZE)
+
+    @service
+    def exchange_archive(self):
+        """
+        Archive of recorded provider exchanges, it is saved when the container exits. Recording is disabled unless the archive path is configured.
+
+        :rtype: None | gold_digger.data_providers.ExchangeArchive
+        """
+        if not settings.PROVIDER_HTTP_RECORD_ARCHIVE:
+            return None
+
+        from .data_providers import ExchangeArchive
+
+        if exists(settings.PROVIDER_HTTP_RECORD_ARCHIVE):
+            return ExchangeArchive.load(settings.PROVIDER_HTTP_RECORD_ARCHIVE)
+        return ExchangeArchive()
+
+    def http_transport(self):
+        """
+        Every data provider has its own transport, i.e. its own connection pool, request statistics and circuit breaker.
+        Requests are sent to the stub server if its URL is configured, responses are recorded if the archive path is configured.
+
+        :rtype: gold_digger.data_providers.HttpTransport
+        """
+        from .data_providers import CircuitBreaker, HttpTransport, RecordingTransport, ReplayTransport
+
+        if settings.PROVIDER_HTTP_REPLAY_URL:
+            transport_class, args = ReplayTransport, (settings.PROVIDER_HTTP_REPLAY_URL,)
+        elif self.exchange_archive is not None:
+            transport_class, args = RecordingTransport, (self.exchange_archive,)
+        else:
+            transport_class, args = HttpTransport, ()
+
+        return transport_class(
+            settings.USER_AGENT_HTTP_HEADER,
+            *args,
+            pool_size=settings.PROVIDER_HTTP_POOL_SIZE,
+            connect_timeout=settings.PROVIDER_HTTP_CONNECT_TIMEOUT,
+            read_timeout=settings.PROVIDER_HTTP_READ_TIMEOUT,
+            max_retries=settings.PROVIDER_HTTP_MAX_RETRIES,
+            backoff_factor=settings.PROVIDER_HTTP_BACKOFF_FACTOR,
+            backoff_max=settings.PROVIDER_HTTP_BACKOFF_MAX,
+            response_cache=self.http_response_cache,
+            circuit_breaker=CircuitBreaker(
+                window=settings.PROVIDER_CIRCUIT_BREAKER_WINDOW,
+                min_requests=settings.PROVIDER_CIRCUIT_BREAKER_MIN_REQUESTS,
+                failure_ratio=settings.PROVIDER_CIRCUIT_BREAKER_FAILURE_RATIO,
+                slow_call_duration=settings.PROVIDER_CIRCUIT_BREAKER_SLOW_CALL_DURATION,
+                reset_timeout=settings.PROVIDER_CIRCUIT_BREAKER_RESET_TIMEOUT,
+            ),
+        )
+
+    def supported_currencies_cache(self, provider_name):
+        """
+        :type provider_name: str
+        :rtype: gold_digger.data_providers.SupportedCurrenciesCache
+        """
+        from .data_providers import SupportedCurrenciesCache
+        from .database.dao_supported_currencies import DaoSupportedCurrencies
+
+        return SupportedCurrenciesCache(
+            provider_name,
+            DaoSupportedCurrencies(self.db_session_factory),
+            self.logger(),
+            settings.SUPPORTED_CURRENCIES_CACHE_TTL,
+        )
+
     @service
     def exchange_rate_manager(self):
         """
         :rtype: gold_digger.managers.exchange_rate_manager.ExchangeRateManager
         """
+        from .database.dao_advisory_lock import DaoAdvisoryLock
+        from .database.dao_exchange_rate import DaoExchangeRate
+        from .database.dao_provider import DaoProvider
+        from .database.dao_provider_miss import DaoProviderMiss
+        from .managers.exchange_rate_manager import ExchangeRateManager
+
         return ExchangeRateManager(
-            DaoExchangeRate(self.db_session),
+            DaoExchangeRate(self.db_session, self.db_session_factory),
             DaoProvider(self.db_session),
             list(self.data_providers.values()),
             self.base_currency,
             settings.SUPPORTED_CURRENCIES,
+            settings.PROVIDER_FETCH_WORKERS,
+            DaoProviderMiss(self.db_session, settings.PROVIDER_MISS_TTL, settings.PROVIDER_MISS_TTL_MAX),
+            hedge_percentile=settings.PROVIDER_HEDGE_PERCENTILE,
+            hedge_default_delay=settings.PROVIDER_HEDGE_DEFAULT_DELAY,
+            dao_advisory_lock=DaoAdvisoryLock(self.db_connection),
+        )
+
+    @service
+    def dao_ingestion_job(self):
+        """
+        :rtype: gold_digger.database.DaoIngestionJob
+        """
+        from .database.dao_ingestion_job import DaoIngestionJob
+
+        return DaoIngestionJob(
+            self.db_session_factory,
+            settings.INGESTION_VISIBILITY_TIMEOUT,
+            settings.INGESTION_MAX_ATTEMPTS,
+            settings.INGESTION_RETRY_DELAY,
         )
 
     @classmethod
@@ -161,9 +310,14 @@ class DiContainer:
     def set_up_root_logger():
         """
         Function for setting root logger. Should be called only once.
+
+        Records are only put to a queue by the logging thread, they are emitted by the handler (e.g. published to AMQP)
+        in a background thread of queue listener. The listener is started again in processes forked by gunicorn.
         """
         logger_ = logging.getLogger()
         if settings.LOGGING_GRAYLOG_ENABLED:
+            import graypy
+
             handler = graypy.GELFRabbitHandler(
                 url=(
                     f"amqp://{settings.LOGGING_AMQP_USERNAME}:{quote(settings.LOGGING_AMQP_PASSWORD, safe='')}@"
@@ -181,7 +335,14 @@ class DiContainer:
             handler = logging.StreamHandler()
             handler.setFormatter(logging.Formatter(settings.LOGGING_FORMAT, "%Y-%m-%d %H:%M:%S"))
 
-        handler.setLevel(settings.LOGGING_LEVEL)
-        handler.addFilter(IncludeFilter())
+        queue_handler = LocalQueueHandler(SimpleQueue())
+        queue_handler.setLevel(settings.LOGGING_LEVEL)
+        queue_handler.addFilter(IncludeFilter())
+        queue_handler.addFilter(DebugSamplingFilter(settings.LOGGING_DEBUG_SAMPLE_RATE))
+
+        listener = QueueListener(queue_handler.queue, handler)
+        listener.start()
+        os.register_at_fork(after_in_child=listener.start)
+        atexit.register(listener.stop)
 
-        logger_.addHandler(handler)
+        logger_.addHandler(queue_handler)
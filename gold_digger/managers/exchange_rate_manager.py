@@ -1,108 +1,636 @@
 from collections import Counter, defaultdict
-from datetime import date, timedelta
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+from contextlib import contextmanager
+from contextvars import copy_context
+from datetime import datetime, timedelta
 from decimal import Decimal
 from itertools import combinations
+from time import monotonic
 
+from .fetch_planner import FetchPlanner
 from ..database.db_model import ExchangeRate
+from ..utils import clock
+from ..utils.deadline import use_deadline
+from ..utils.metrics import record_cache_lookup
+from ..utils.request_failures import RequestFailures, use_request_failures
+from ..utils.single_flight import SingleFlight
 
 
 class ExchangeRateManager:
-    def __init__(self, dao_exchange_rate, dao_provider, data_providers, base_currency, supported_currencies):
+    UNKNOWN_PROVIDER_COST = 1.0  # expected latency (seconds) of provider without enough recent requests
+
+    def __init__(
+        self,
+        dao_exchange_rate,
+        dao_provider,
+        data_providers,
+        base_currency,
+        supported_currencies,
+        fetch_workers=8,
+        dao_provider_miss=None,
+        hedge_percentile=None,
+        hedge_default_delay=1.0,
+        dao_advisory_lock=None,
+    ):
         """
         :type dao_exchange_rate: gold_digger.database.DaoExchangeRate
         :type dao_provider: gold_digger.database.DaoProvider
         :type data_providers: list[gold_digger.data_providers.Provider]
         :type base_currency: str
         :type supported_currencies: set[str]
+        :type fetch_workers: int
+        :param dao_provider_miss: negative cache of provider misses on historical dates (disabled if None)
+        :type dao_provider_miss: None | gold_digger.database.DaoProviderMiss
+        :param hedge_percentile: percentile of provider's latency after which the next provider is requested too, hedging is disabled if None
+        :type hedge_percentile: None | float
+        :param hedge_default_delay: delay of hedge request (seconds) for providers without enough latency samples
+        :type hedge_default_delay: float
+        :param dao_advisory_lock: locks of updates of provider's rates shared by all runners (disabled if None)
+        :type dao_advisory_lock: None | gold_digger.database.DaoAdvisoryLock
         """
         self._dao_exchange_rate = dao_exchange_rate
         self._dao_provider = dao_provider
+        self._dao_provider_miss = dao_provider_miss
+        self._provider_ids = {}  # name of data provider -> ID in database
         self._data_providers = data_providers
         self._base_currency = base_currency
         self._supported_currencies = supported_currencies
+        self._fetch_executor = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="provider-fetch")
+        self._single_flight = SingleFlight()
+        self._fetch_planner = FetchPlanner(supported_currencies)
+        self._hedge_percentile = hedge_percentile
+        self._hedge_default_delay = hedge_default_delay
+        self._dao_advisory_lock = dao_advisory_lock
 
     def update_all_rates_by_date(self, date_of_exchange, data_providers, logger):
         """
+        If rates of the date are not published by a provider yet (or at all), rates of its latest publication are updated instead
+        unless they are already in database. Provider is skipped if its rates of the date are being updated by another runner.
+
         :type date_of_exchange: datetime.date
         :type data_providers: list[gold_digger.data_providers.Provider]
         :type logger: gold_digger.utils.ContextLogger
         """
+        if self._dao_provider_miss is not None:
+            try:
+                deleted = self._dao_provider_miss.delete_stale_misses(datetime.utcnow())
+                logger.info("Deleted %s stale provider misses.", deleted)
+            except Exception:
+                logger.exception("Deleting of stale provider misses failed.")
+
         for data_provider in data_providers:
+            if self._is_circuit_open(data_provider, logger):
+                continue
             try:
-                logger.info("Update started: Provider %s, date %s.", data_provider, date_of_exchange)
-                day_rates = data_provider.get_all_by_date(date_of_exchange, self._supported_currencies, logger)
-                if day_rates:
-                    provider = self._dao_provider.get_or_create_provider_by_name(data_provider.name)
-                    records = [
-                        {"currency": currency, "rate": rate, "date": date_of_exchange, "provider_id": provider.id} for currency, rate in day_rates.items()
-                    ]
-                    self._dao_exchange_rate.insert_exchange_rate_to_db(records, logger)
-                    logger.info("Update succeeded: Provider %s, date %s.", data_provider, date_of_exchange)
-                else:
-                    logger.error("Update failed: Provider %s did not return any exchange rates, date %s.", data_provider, date_of_exchange)
+                publication_date = data_provider.calendar.latest_publication(date_of_exchange)
+                if publication_date is None or not data_provider.calendar.is_available(publication_date):
+                    logger.info("Update skipped: Provider %s has no rates available for date %s.", data_provider, date_of_exchange)
+                    continue
+
+                with self._update_lock(data_provider, publication_date, logger) as locked:
+                    if locked:
+                        self._update_rates_by_date(data_provider, date_of_exchange, publication_date, logger)
             except Exception:
                 logger.exception("Update failed: Provider %s raised unexpected exception, date %s.", data_provider, date_of_exchange)
 
+            logger.info("HTTP statistics of provider %s: %s", data_provider, data_provider.statistics.snapshot())
+
+    def _update_rates_by_date(self, data_provider, date_of_exchange, publication_date, logger):
+        """
+        Update is skipped if rates of the publication date are already stored (e.g. by the runner which held the lock before)
+        and the provider has request limit. Stored rates of the date may come from API requests of a few currencies only,
+        so provider without request limit is requested again for the rest of them.
+
+        :type data_provider: gold_digger.data_providers.Provider
+        :type date_of_exchange: datetime.date
+        :type publication_date: datetime.date
+        :type logger: gold_digger.utils.ContextLogger
+        :return: rates of the publication date are stored
+        :rtype: bool
+        """
+        provider = self._dao_provider.get_or_create_provider_by_name(data_provider.name)
+        if publication_date != date_of_exchange:
+            if self._dao_exchange_rate.has_rates_by_date_provider(publication_date, provider.id):
+                logger.info(
+                    "Update skipped: Provider %s has not published rates of %s, rates of its latest publication %s are already stored.",
+                    data_provider,
+                    date_of_exchange,
+                    publication_date,
+                )
+                return True
+            logger.info(
+                "Provider %s has not published rates of %s, its latest publication %s is updated.",
+                data_provider,
+                date_of_exchange,
+                publication_date,
+            )
+        elif data_provider.has_request_limit and self._dao_exchange_rate.has_rates_by_date_provider(publication_date, provider.id):
+            logger.info("Update skipped: Rates of provider %s with request limit are already stored, date %s.", data_provider, publication_date)
+            return True
+
+        logger.info("Update started: Provider %s, date %s.", data_provider, publication_date)
+        day_rates = data_provider.get_all_by_date(publication_date, self._supported_currencies, logger)
+        if day_rates:
+            records = [{"currency": currency, "rate": rate, "date": publication_date, "provider_id": provider.id} for currency, rate in day_rates.items()]
+            self._dao_exchange_rate.insert_exchange_rate_to_db(records, logger)
+            logger.info("Update succeeded: Provider %s, date %s.", data_provider, publication_date)
+            return True
+
+        logger.error("Update failed: Provider %s did not return any exchange rates, date %s.", data_provider, publication_date)
+        return False
+
+    def update_rates_in_range(self, data_provider, start_date, end_date, logger):
+        """
+        Update rates of the provider for publication days within interval <start_date, end_date> which are not stored yet,
+        so a retried (or resumed) update continues where the previous one stopped. Days locked by another runner are skipped,
+        they are failed if their rates are still not stored after that (e.g. the other runner didn't finish them yet).
+
+        :type data_provider: gold_digger.data_providers.Provider
+        :type start_date: datetime.date
+        :type end_date: datetime.date
+        :type logger: gold_digger.utils.ContextLogger
+        :return: days without stored rates after the update
+        :rtype: list[datetime.date]
+        """
+        days = [day for day in data_provider.calendar.publication_days(start_date, end_date) if data_provider.calendar.is_available(day)]
+        if self._is_circuit_open(data_provider, logger):
+            return days
+
+        provider = self._dao_provider.get_or_create_provider_by_name(data_provider.name)
+        failed_days = []
+        for day in days:
+            if self._dao_exchange_rate.has_rates_by_date_provider(day, provider.id):
+                continue
+            with self._update_lock(data_provider, day, logger) as locked:
+                if locked:
+                    updated = self._update_rates_by_date(data_provider, day, day, logger)
+                else:
+                    updated = self._dao_exchange_rate.has_rates_by_date_provider(day, provider.id)
+                if not updated:
+                    failed_days.append(day)
+
+        logger.info("HTTP statistics of provider %s: %s", data_provider, data_provider.statistics.snapshot())
+        return failed_days
+
     def update_all_historical_rates(self, origin_date, logger):
         """
+        Backfill of a provider is skipped if another runner backfills it from the same origin date.
+
         :type origin_date: datetime.date
         :type logger: gold_digger.utils.ContextLogger
         """
         for data_provider in self._data_providers:
-            logger.info("Updating all historical rates from %s provider", data_provider)
-            date_rates = data_provider.get_historical(origin_date, self._supported_currencies, logger)
-            provider = self._dao_provider.get_or_create_provider_by_name(data_provider.name)
-            for day, day_rates in date_rates.items():
-                records = [{"currency": currency, "rate": rate, "date": day, "provider_id": provider.id} for currency, rate in day_rates.items()]
-                self._dao_exchange_rate.insert_exchange_rate_to_db(records, logger)
+            if self._is_circuit_open(data_provider, logger):
+                continue
+            with self._update_lock(data_provider, origin_date, logger) as locked:
+                if not locked:
+                    continue
+                logger.info("Updating all historical rates from %s provider", data_provider)
+                date_rates = data_provider.get_historical(origin_date, self._supported_currencies, logger)
+                provider = self._dao_provider.get_or_create_provider_by_name(data_provider.name)
+                for day, day_rates in date_rates.items():
+                    records = [{"currency": currency, "rate": rate, "date": day, "provider_id": provider.id} for currency, rate in day_rates.items()]
+                    self._dao_exchange_rate.insert_exchange_rate_to_db(records, logger)
+            logger.info("HTTP statistics of provider %s: %s", data_provider, data_provider.statistics.snapshot())
 
-    def get_or_update_rate_by_date(self, date_of_exchange, currency, logger):
+    @contextmanager
+    def _update_lock(self, data_provider, date_of_exchange, logger):
+        """
+        Lock update of provider's rates of the date, so concurrent runners (cron of other pods, manual updates) divide
+        the work instead of requesting the same rates twice.
+
+        :type data_provider: gold_digger.data_providers.Provider
+        :type date_of_exchange: datetime.date
+        :type logger: gold_digger.utils.ContextLogger
+        :return: the update is locked by this runner (always True if locking is disabled)
+        :rtype: collections.abc.Iterator[bool]
+        """
+        if self._dao_advisory_lock is None:
+            yield True
+            return
+
+        with self._dao_advisory_lock.try_lock(data_provider.name, date_of_exchange) as locked:
+            if not locked:
+                logger.info("Update skipped: Rates of provider %s for %s are being updated by another runner.", data_provider, date_of_exchange)
+            yield locked
+
+    def get_or_update_rate_by_date(self, date_of_exchange, currency, logger, deadline=None):
         """
         Get records of exchange rates for the date from all data providers.
-        If rates are missing for the date from some providers request data only from these providers to update database.
-        If the requested date is today and there are missing rates, try to fetch data from yesterday, if even those are missing, request for today's data.
+        See `get_or_update_rates_by_date`.
 
         :type date_of_exchange: datetime.date
         :type currency: str
         :type logger: gold_digger.utils.ContextLogger
+        :type deadline: None | gold_digger.utils.Deadline
         :rtype: list[gold_digger.database.db_model.ExchangeRate]
         """
-        if currency == self._base_currency:
-            return [ExchangeRate.base(self._base_currency)]
-
-        today = date.today()
-        exchange_rates = self._dao_exchange_rate.get_rates_by_date_currency(date_of_exchange, currency)
-        exchange_rates_providers = {r.provider.name for r in exchange_rates}
-        missing_provider_rates = [provider for provider in self._data_providers if provider.name not in exchange_rates_providers]
-        for data_provider in missing_provider_rates:
-            if date_of_exchange == today:
-                logger.info("Today's rates for provider %s aren't ready yet, Using yesterday's rates.", data_provider.name)
-                previous_day = date_of_exchange - timedelta(1)
-                rate = self._dao_exchange_rate.get_rate_by_date_currency_provider(previous_day, currency, data_provider.name)
-                if rate:
-                    exchange_rates.append(rate)
+        return self.get_or_update_rates_by_date(date_of_exchange, [currency], logger, deadline)[currency]
+
+    def get_or_update_rates_by_date(self, date_of_exchange, currencies, logger, deadline=None):
+        """
+        Get records of exchange rates of the currencies for the date from all data providers.
+        If rates are missing for the date from some providers request data only from these providers to update database.
+        If the requested date is today and there are missing rates, try to fetch data from yesterday, if even those are missing, request for today's data.
+        Missing rates of all currencies are requested from the providers concurrently and stored to database at once.
+        Provider calls are planned by their costs, e.g. rates of all currencies are prefetched by one request if it's not more expensive.
+        Concurrent requests for the same missing rate are coalesced, only one of them requests the provider and stores the rate.
+        Providers which recently had no rate for the historical date are not requested again until their miss expires.
+        Providers are not requested for dates without publication according to their calendar. If today's rates are missing,
+        rates of the previous publication of the provider are used instead.
+        Providers are not awaited once the deadline is exceeded, rates available so far are returned instead.
+        Providers with open circuit breaker are skipped until the breaker lets a probe request through.
+
+        :type date_of_exchange: datetime.date
+        :type currencies: list[str]
+        :type logger: gold_digger.utils.ContextLogger
+        :type deadline: None | gold_digger.utils.Deadline
+        :rtype: dict[str, list[gold_digger.database.db_model.ExchangeRate]]
+        """
+        today = clock.today()
+        exchange_rates = {}
+        additional_rates = defaultdict(list)  # currency -> [(order of provider, exchange rate)]
+        missing_rates = []  # [(currency, data provider)]
+
+        for currency in dict.fromkeys(currencies):
+            if currency == self._base_currency:
+                exchange_rates[currency] = [ExchangeRate.base(self._base_currency)]
+                continue
+
+            exchange_rates[currency] = list(self._dao_exchange_rate.get_rates_by_date_currency(date_of_exchange, currency))
+            exchange_rates_providers = {r.provider.name for r in exchange_rates[currency]}
+            record_cache_lookup("exchange_rates", hit=True, count=len(exchange_rates_providers))
+            for order, data_provider in enumerate(self._data_providers):
+                if data_provider.name in exchange_rates_providers:
                     continue
-                else:
-                    logger.info("Yesterday's rates for provider %s not found. Requesting API.", data_provider.name)
-            elif data_provider.has_request_limit:
-                #  For providers with request limit we don't want to request rates from API for historical data, because it can easily generate hundreds
-                #  of requests at once and the limit is then soon exceeded.
-                logger.info("Rates for provider %s aren't in database and provider has disabled requests for historical data.", data_provider.name)
+
+                if date_of_exchange == today:
+                    logger.info("Today's rates for provider %s aren't ready yet, Using rates of its previous publication.", data_provider.name)
+                    previous_day = data_provider.calendar.latest_publication(date_of_exchange - timedelta(1))
+                    rate = previous_day and self._dao_exchange_rate.get_rate_by_date_currency_provider(previous_day, currency, data_provider.name)
+                    if rate:
+                        additional_rates[currency].append((order, rate))
+                        continue
+                    elif not data_provider.calendar.is_available(date_of_exchange):
+                        logger.info(
+                            "Rates of previous publication (%s) for provider %s not found and today's rates aren't published.",
+                            previous_day,
+                            data_provider.name,
+                        )
+                        continue
+                    else:
+                        logger.info("Rates of previous publication (%s) for provider %s not found. Requesting API.", previous_day, data_provider.name)
+                elif not data_provider.calendar.is_available(date_of_exchange):
+                    logger.info("Provider %s has no rates published for %s.", data_provider.name, date_of_exchange)
+                    continue
+                elif data_provider.has_request_limit:
+                    #  For providers with request limit we don't want to request rates from API for historical data, because it can easily generate hundreds
+                    #  of requests at once and the limit is then soon exceeded.
+                    logger.info("Rates for provider %s aren't in database and provider has disabled requests for historical data.", data_provider.name)
+                    continue
+                elif self._is_circuit_open(data_provider, logger):
+                    continue
+
+                missing_rates.append((currency, order, data_provider))
+
+        record_cache_lookup("exchange_rates", hit=False, count=len(missing_rates))
+        if date_of_exchange < today:
+            missing_rates = self._skip_known_misses(date_of_exchange, missing_rates, logger)
+
+        fetched_rates, missed_rates = self._fetch_missing_rates(date_of_exchange, missing_rates, logger, deadline)
+        if date_of_exchange < today and (deadline is None or not deadline.expired):
+            self._record_misses(date_of_exchange, missed_rates, logger)
+
+        for currency, order, data_provider, rate, _ in fetched_rates:
+            if order is not None:
+                exchange_rate = ExchangeRate(date=date_of_exchange, provider_id=self._provider_ids[data_provider.name], currency=currency, rate=rate)
+                additional_rates[currency].append((order, exchange_rate))
+
+        for currency, rates in additional_rates.items():
+            exchange_rates[currency].extend(rate for _, rate in sorted(rates, key=lambda item: item[0]))
+
+        return exchange_rates
+
+    def _fetch_missing_rates(self, date_of_exchange, missing_rates, logger, deadline):
+        """
+        Request missing rates from data providers concurrently according to the plan of provider calls.
+        Calls are submitted by fetch priority of providers (see `_fetch_priority`), order of providers in results is not affected.
+        Calls which don't finish until the deadline are ignored (they keep running and store their rates).
+        Call which is already being executed by another caller is not executed again, result of the running call is shared instead.
+        Fetched rates are stored by the calls, they are returned to be used as transient records.
+        Besides the fetched rates, providers which answered without the rate (and were really requested by this caller) are returned,
+        providers whose requests failed are not.
+        Prefetched rates of other currencies are returned with order None.
+
+        :type date_of_exchange: datetime.date
+        :type missing_rates: list[tuple[str, int, gold_digger.data_providers.Provider]]
+        :type logger: gold_digger.utils.ContextLogger
+        :type deadline: None | gold_digger.utils.Deadline
+        :return: fetched rates (currency, order of provider, data provider, rate, shared) and missed rates (currency, data provider)
+        :rtype: tuple[list[tuple[str, None | int, gold_digger.data_providers.Provider, decimal.Decimal, bool]], list[tuple]]
+        """
+        if not missing_rates:
+            return [], []
+
+        if deadline is not None and deadline.expired:
+            logger.warning("Deadline exceeded, missing rates (%s) won't be requested from providers.", date_of_exchange)
+            return [], []
+
+        try:
+            for data_provider in {data_provider for _, _, data_provider in missing_rates}:
+                self._provider_id(data_provider)  # fetched rates are stored by threads of the calls, they don't access provider DAO
+        except Exception:
+            logger.exception("Loading of providers failed, missing rates (%s) won't be requested from providers.", date_of_exchange)
+            return [], []
+
+        missing_rates = sorted(missing_rates, key=self._fetch_priority)
+        if self._hedge_percentile is not None:
+            return self._fetch_missing_rates_hedged(date_of_exchange, missing_rates, logger, deadline)
+
+        calls = self._fetch_planner.plan(missing_rates)
+        logger.debug("Provider calls planned for missing rates (%s): %s", date_of_exchange, calls)
+        futures = [self._submit_fetch(date_of_exchange, call, logger, deadline) for call in calls]
+        _, not_done = wait(futures, timeout=None if deadline is None else deadline.remaining())
+
+        missing_orders = defaultdict(dict)  # name of data provider -> {currency: order of provider}
+        for currency, order, data_provider in missing_rates:
+            missing_orders[data_provider.name][currency] = order
+
+        fetched_rates = []
+        missed_rates = []
+        for future, call in zip(futures, calls):
+            data_provider = call.data_provider
+            if future in not_done:
+                logger.warning("Deadline exceeded, %s (%s) is not awaited.", call, date_of_exchange)
                 continue
 
             try:
-                if currency not in data_provider.get_supported_currencies(today, logger):
-                    continue
-                rate = data_provider.get_by_date(date_of_exchange, currency, logger)
-                if rate:
-                    db_provider = self._dao_provider.get_or_create_provider_by_name(data_provider.name)
-                    exchange_rate = self._dao_exchange_rate.insert_new_rate(date_of_exchange, db_provider, currency, rate)
-                    exchange_rates.append(exchange_rate)
+                (rates, failed), shared = future.result()
+            except TimeoutError:
+                logger.warning("Deadline exceeded, shared %s (%s) is not awaited.", call, date_of_exchange)
+                continue
+            except Exception:
+                logger.exception("Requesting exchange rates by %s (%s) failed.", call, date_of_exchange)
+                continue
+
+            orders = missing_orders[data_provider.name]
+            for currency in orders if call.currency is None else [call.currency]:
+                if rates.get(currency):
+                    fetched_rates.append((currency, orders[currency], data_provider, rates[currency], shared))
+                elif not shared and not failed:
+                    missed_rates.append((currency, data_provider))
+
+            if not shared:
+                fetched_rates.extend((currency, None, data_provider, rate, shared) for currency, rate in rates.items() if rate and currency not in orders)
+
+        return fetched_rates, missed_rates
+
+    def _fetch_missing_rates_hedged(self, date_of_exchange, missing_rates, logger, deadline):
+        """
+        Hedged variant of `_fetch_missing_rates`. Only the first eligible provider (by fetch priority) is requested for every currency.
+        If it doesn't answer within its latency percentile, the next eligible provider without request limit is requested too (hedge).
+        The first answer with the rate is taken, calls still running for currencies which already have the rate are ignored.
+        Provider which fails or has no rate is replaced by the next provider immediately.
+
+        :type date_of_exchange: datetime.date
+        :type missing_rates: list[tuple[str, int, gold_digger.data_providers.Provider]]
+        :type logger: gold_digger.utils.ContextLogger
+        :type deadline: None | gold_digger.utils.Deadline
+        :rtype: tuple[list[tuple[str, None | int, gold_digger.data_providers.Provider, decimal.Decimal, bool]], list[tuple]]
+        """
+        candidates = defaultdict(list)  # currency -> [(order, data provider)] not requested yet
+        missing_orders = defaultdict(dict)  # name of data provider -> {currency: order of provider}
+        for currency, order, data_provider in missing_rates:
+            candidates[currency].append((order, data_provider))
+            missing_orders[data_provider.name][currency] = order
+
+        running = {}  # future -> (call, covered currencies, hedge)
+        hedge_at = {}  # currency -> time of its next hedge
+        satisfied = set()
+        fetched_rates = []
+        missed_rates = []
+
+        def _submit(currencies, hedge):
+            """
+            :type currencies: list[str]
+            :type hedge: bool
+            """
+            next_calls = []
+            for currency in currencies:
+                while candidates[currency]:
+                    order, data_provider = candidates[currency].pop(0)
+                    if not hedge or not data_provider.has_request_limit:
+                        next_calls.append((currency, order, data_provider))
+                        break
+
+            for call in self._fetch_planner.plan(next_calls):
+                covered = {call.currency} if call.currency else {c for c, _, p in next_calls if p is call.data_provider}
+                future = self._submit_fetch(date_of_exchange, call, logger, deadline)
+                running[future] = (call, covered, hedge)
+                delay = call.data_provider.statistics.latency_percentile(self._hedge_percentile) or self._hedge_default_delay
+                for currency in covered:
+                    hedge_at[currency] = monotonic() + delay
+                if hedge:
+                    logger.info("Hedge %s requested for %s (%s).", call, sorted(covered), date_of_exchange)
+
+        _submit(list(candidates), hedge=False)
+        while running and len(satisfied) < len(candidates):
+            pending_hedges = [at for currency, at in hedge_at.items() if currency not in satisfied and candidates[currency]]
+            timeout = max(0.0, min(pending_hedges) - monotonic()) if pending_hedges else None
+            if deadline is not None:
+                timeout = deadline.remaining() if timeout is None else min(timeout, deadline.remaining())
+
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                call, covered, hedge = running.pop(future)
+                data_provider = call.data_provider
+                try:
+                    (rates, failed), shared = future.result()
+                except TimeoutError:
+                    logger.warning("Deadline exceeded, shared %s (%s) is not awaited.", call, date_of_exchange)
+                    rates, failed, shared = {}, True, False
+                except Exception:
+                    logger.exception("Requesting exchange rates by %s (%s) failed.", call, date_of_exchange)
+                    rates, failed, shared = {}, True, False
+
+                newly_satisfied = set()
+                orders = missing_orders[data_provider.name]
+                for currency, rate in rates.items():
+                    if not rate:
+                        continue
+                    prefetched = currency in orders and currency not in covered and (orders[currency], data_provider) in candidates[currency]
+                    if currency in covered or prefetched:
+                        if prefetched:
+                            candidates[currency].remove((orders[currency], data_provider))  # the provider is not requested for the currency again
+                        fetched_rates.append((currency, orders[currency], data_provider, rate, shared))
+                        if currency not in satisfied:
+                            newly_satisfied.add(currency)
+                    elif not shared:
+                        fetched_rates.append((currency, None, data_provider, rate, shared))
+                satisfied |= newly_satisfied
+
+                if not shared and not failed:
+                    missed_rates.extend((currency, data_provider) for currency in covered if not rates.get(currency))
+                if hedge:
+                    data_provider.statistics.record_hedge(win=bool(newly_satisfied & covered))
+
+                in_flight = set().union(*(c for _, c, _ in running.values()))
+                _submit([currency for currency in covered if currency not in satisfied and currency not in in_flight], hedge=False)
+
+            if deadline is not None and deadline.expired:
+                break
+            now = monotonic()
+            _submit([currency for currency, at in hedge_at.items() if currency not in satisfied and candidates[currency] and at <= now], hedge=True)
+
+        for future, (call, _, hedge) in running.items():
+            future.cancel()
+            if hedge:
+                call.data_provider.statistics.record_hedge(win=False)
+            if deadline is not None and deadline.expired:
+                logger.warning("Deadline exceeded, %s (%s) is not awaited.", call, date_of_exchange)
+
+        return fetched_rates, missed_rates
+
+    def _submit_fetch(self, date_of_exchange, call, logger, deadline):
+        """
+        Submit the call unless the same call is running already, the caller waits for the running call within its deadline then.
 
+        :type date_of_exchange: datetime.date
+        :type call: gold_digger.managers.fetch_planner.FetchCall
+        :type logger: gold_digger.utils.ContextLogger
+        :type deadline: None | gold_digger.utils.Deadline
+        :return: future of fetched rates, whether a request failed (see `_fetch_rates`) and whether the result was shared from another caller
+        :rtype: concurrent.futures.Future
+        """
+        return self._fetch_executor.submit(
+            copy_context().run,  # queries of the call (storing of rates) are recorded to statistics of the caller
+            self._single_flight.do,
+            call.key(date_of_exchange),
+            self._fetch_rates,
+            date_of_exchange,
+            call,
+            self._provider_ids[call.data_provider.name],
+            logger,
+            deadline,
+            timeout=None if deadline is None else deadline.remaining(),
+        )
+
+    def _fetch_rates(self, date_of_exchange, call, provider_id, logger, deadline):
+        """
+        Fetched rates are stored by the call itself, i.e. even if the caller doesn't wait for them (its deadline is exceeded)
+        and only once if the call is shared by more callers.
+
+        :type date_of_exchange: datetime.date
+        :type call: gold_digger.managers.fetch_planner.FetchCall
+        :param provider_id: ID of the data provider in database
+        :type provider_id: int
+        :type logger: gold_digger.utils.ContextLogger
+        :type deadline: None | gold_digger.utils.Deadline
+        :return: fetched rates and whether a request of the provider failed, i.e. the missing rates are not known to be missing
+        :rtype: tuple[dict[str, decimal.Decimal | None], bool]
+        """
+        data_provider = call.data_provider
+        with use_deadline(deadline), use_request_failures(RequestFailures()) as request_failures:
+            if call.currency is None:
+                rates = data_provider.get_all_by_date(date_of_exchange, self._supported_currencies, logger) or {}
+            elif call.currency not in data_provider.get_supported_currencies(clock.today(), logger):
+                rates = {}
+            else:
+                rates = {call.currency: data_provider.get_by_date(date_of_exchange, call.currency, logger)}
+
+        records = [{"date": date_of_exchange, "provider_id": provider_id, "currency": currency, "rate": rate} for currency, rate in rates.items() if rate]
+        if records:
+            try:
+                self._dao_exchange_rate.store_new_rates(records)
             except Exception:
-                logger.exception("Requesting exchange rate for %s (%s) from provider '%s' failed.", currency, date_of_exchange, data_provider)
+                logger.exception("Storing of requested exchange rates by %s (%s) failed.", call, date_of_exchange)
 
-        return exchange_rates
+        return rates, request_failures.failed
+
+    def _provider_id(self, data_provider):
+        """
+        ID of the data provider in database, the provider is created if it's not there yet.
+
+        :type data_provider: gold_digger.data_providers.Provider
+        :rtype: int
+        """
+        if data_provider.name not in self._provider_ids:
+            self._provider_ids[data_provider.name] = self._dao_provider.get_or_create_provider_by_name(data_provider.name).id
+        return self._provider_ids[data_provider.name]
+
+    def _fetch_priority(self, missing_rate):
+        """
+        Fast, reliable providers without request limit are requested first. Providers are ordered by their expected latency
+        (mean latency of recent requests divided by their success ratio), ties are broken by order of providers.
+
+        The order matters only for hedged requests (see `_fetch_missing_rates_hedged`), where the next provider is requested
+        only if the previous one is slow or has no rate. Without hedging all providers are requested at once, the order only
+        decides which calls start first when there are more of them than fetch workers.
+
+        :type missing_rate: tuple[str, int, gold_digger.data_providers.Provider]
+        :rtype: tuple[bool, float, int]
+        """
+        _, order, data_provider = missing_rate
+        expected_latency = data_provider.statistics.expected_latency()
+        return data_provider.has_request_limit, self.UNKNOWN_PROVIDER_COST if expected_latency is None else expected_latency, order
+
+    @staticmethod
+    def _is_circuit_open(data_provider, logger):
+        """
+        :type data_provider: gold_digger.data_providers.Provider
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: bool
+        """
+        circuit_breaker = data_provider.circuit_breaker
+        if circuit_breaker is not None and circuit_breaker.is_open:
+            logger.warning("Provider %s skipped, its circuit breaker is open: %s", data_provider.name, circuit_breaker.snapshot())
+            return True
+        return False
+
+    def _skip_known_misses(self, date_of_exchange, missing_rates, logger):
+        """
+        :type date_of_exchange: datetime.date
+        :type missing_rates: list[tuple[str, int, gold_digger.data_providers.Provider]]
+        :type logger: gold_digger.utils.ContextLogger
+        :rtype: list[tuple[str, int, gold_digger.data_providers.Provider]]
+        """
+        if self._dao_provider_miss is None or not missing_rates:
+            return missing_rates
+
+        try:
+            known_misses = self._dao_provider_miss.get_active_misses(
+                date_of_exchange,
+                sorted({currency for currency, _, _ in missing_rates}),
+                datetime.utcnow(),
+            )
+        except Exception:
+            logger.exception("Loading of provider misses (%s) failed.", date_of_exchange)
+            return missing_rates
+
+        for currency, _, data_provider in missing_rates:
+            if (data_provider.name, currency) in known_misses:
+                logger.info("Provider %s recently had no rate for %s (%s), it won't be requested.", data_provider.name, currency, date_of_exchange)
+
+        return [(currency, order, data_provider) for currency, order, data_provider in missing_rates if (data_provider.name, currency) not in known_misses]
+
+    def _record_misses(self, date_of_exchange, missed_rates, logger):
+        """
+        :type date_of_exchange: datetime.date
+        :type missed_rates: list[tuple[str, gold_digger.data_providers.Provider]]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        if self._dao_provider_miss is None or not missed_rates:
+            return
+
+        try:
+            records = []
+            for currency, data_provider in missed_rates:
+                db_provider = self._dao_provider.get_or_create_provider_by_name(data_provider.name)
+                records.append({"date": date_of_exchange, "provider_id": db_provider.id, "currency": currency})
+
+            self._dao_provider_miss.record_misses(records, datetime.utcnow())
+        except Exception:
+            logger.exception("Storing of provider misses (%s) failed.", date_of_exchange)
 
     @staticmethod
     def pick_the_best(rates):
@@ -137,13 +665,13 @@ class ExchangeRateManager:
         :type logger: gold_digger.utils.ContextLogger
         :rtype: datetime.date
         """
-        today = date.today()
+        today = clock.today()
         if date_of_exchange > today:
             logger.warning("Request for future date %s. Exchange rate of today will be returned instead.", date_of_exchange)
             return today
         return date_of_exchange
 
-    def get_exchange_rate_by_date(self, date_of_exchange, from_currency, to_currency, logger):
+    def get_exchange_rate_by_date(self, date_of_exchange, from_currency, to_currency, logger, deadline=None):
         """
         Compute exchange rate between 'from_currency' and 'to_currency'.
         If the date is missing request data providers to update database.
@@ -152,12 +680,14 @@ class ExchangeRateManager:
         :type from_currency: str
         :type to_currency: str
         :type logger: gold_digger.utils.ContextLogger
+        :type deadline: None | gold_digger.utils.Deadline
         :rtype: decimal.Decimal
         """
         date_of_exchange = self.future_date_to_today(date_of_exchange, logger)
 
-        _from_currency_all_available = self.get_or_update_rate_by_date(date_of_exchange, from_currency, logger)
-        _to_currency_all_available = self.get_or_update_rate_by_date(date_of_exchange, to_currency, logger)
+        all_available = self.get_or_update_rates_by_date(date_of_exchange, [from_currency, to_currency], logger, deadline)
+        _from_currency_all_available = all_available[from_currency]
+        _to_currency_all_available = all_available[to_currency]
 
         _from_currency_rates = [r.rate for r in _from_currency_all_available]
         _to_currency_rates = [r.rate for r in _to_currency_all_available]
@@ -182,7 +712,7 @@ class ExchangeRateManager:
 
         return self._dao_exchange_rate.get_sum_of_rates_in_period(start_date, end_date, currency)
 
-    def get_average_exchange_rate_by_dates(self, start_date, end_date, from_currency, to_currency, logger):
+    def get_average_exchange_rate_by_dates(self, start_date, end_date, from_currency, to_currency, logger, deadline=None):
         """
         Compute average exchange rate of currency in specified period.
         Log warnings for missing days.
@@ -192,13 +722,15 @@ class ExchangeRateManager:
         :type from_currency: str
         :type to_currency: str
         :type logger: gold_digger.utils.ContextLogger
+        :type deadline: None | gold_digger.utils.Deadline
         :rtype: None | decimal.Decimal
         """
         today_or_past_date = self.future_date_to_today(start_date, logger)
         if today_or_past_date != start_date:
-            return self.get_exchange_rate_by_date(today_or_past_date, from_currency, to_currency, logger)
+            return self.get_exchange_rate_by_date(today_or_past_date, from_currency, to_currency, logger, deadline)
 
         number_of_days = abs((end_date - start_date).days) + 1  # we want interval <start_date, end_date>
+        expected_days = self._get_publication_days_by_provider_id(start_date, end_date)
         _from_currency = self._get_sum_of_rates_in_period(start_date, end_date, from_currency)
         _to_currency = self._get_sum_of_rates_in_period(start_date, end_date, to_currency)
 
@@ -216,20 +748,22 @@ class ExchangeRateManager:
                 from_provider,
                 to_provider,
             )
-            if from_count != number_of_days and from_currency != self._base_currency:
+            from_days = expected_days.get(from_provider, number_of_days)
+            to_days = expected_days.get(to_provider, number_of_days)
+            if from_count < from_days and from_currency != self._base_currency:
                 logger.warning(
                     "Provider %s is missing %s days with currency %s while range request on %s - %s",
                     from_provider,
-                    number_of_days - from_count,
+                    from_days - from_count,
                     from_currency,
                     start_date,
                     end_date,
                 )
-            if to_count != number_of_days and to_currency != self._base_currency:
+            if to_count < to_days and to_currency != self._base_currency:
                 logger.warning(
                     "Provider %s is missing %s days with currency %s while range request on %s - %s",
                     to_provider,
-                    number_of_days - to_count,
+                    to_days - to_count,
                     to_currency,
                     start_date,
                     end_date,
@@ -245,25 +779,47 @@ class ExchangeRateManager:
 
         return None
 
-    def get_exchange_rate_in_intervals_by_date(self, date_of_exchange, from_currency, to_currency, logger):
+    def _get_publication_days_by_provider_id(self, start_date, end_date):
+        """
+        Number of days with published rates within interval <start_date, end_date> according to calendars of data providers.
+        Providers not in database yet are skipped (they have no rates), they are not created by read-only requests.
+
+        :type start_date: datetime.date
+        :type end_date: datetime.date
+        :rtype: dict[int, int]
+        """
+        expected_days = {}
+        for data_provider in self._data_providers:
+            if data_provider.name not in self._provider_ids:
+                db_provider = self._dao_provider.get_provider_by_name(data_provider.name)
+                if db_provider is None:
+                    continue
+                self._provider_ids[data_provider.name] = db_provider.id
+
+            expected_days[self._provider_ids[data_provider.name]] = len(data_provider.calendar.publication_days(start_date, end_date))
+
+        return expected_days
+
+    def get_exchange_rate_in_intervals_by_date(self, date_of_exchange, from_currency, to_currency, logger, deadline=None):
         """
         :type date_of_exchange: datetime.date
         :type from_currency: str
         :type to_currency: str
         :type logger: gold_digger.utils.ContextLogger
+        :type deadline: None | gold_digger.utils.Deadline
         :rtype: list[dict[str, str]]
         """
-        daily = self.get_exchange_rate_by_date(date_of_exchange, from_currency, to_currency, logger)
+        daily = self.get_exchange_rate_by_date(date_of_exchange, from_currency, to_currency, logger, deadline)
         if daily is None:
             return []
 
         start_date, end_date = date_of_exchange - timedelta(days=6), date_of_exchange
-        weekly = self.get_average_exchange_rate_by_dates(start_date, end_date, from_currency, to_currency, logger)
+        weekly = self.get_average_exchange_rate_by_dates(start_date, end_date, from_currency, to_currency, logger, deadline)
         if weekly is None:
             return []
 
         start_date, end_date = date_of_exchange - timedelta(days=30), date_of_exchange
-        monthly = self.get_average_exchange_rate_by_dates(start_date, end_date, from_currency, to_currency, logger)
+        monthly = self.get_average_exchange_rate_by_dates(start_date, end_date, from_currency, to_currency, logger, deadline)
         if monthly is None:
             return []
 
@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+
+class FetchCall:
+    def __init__(self, data_provider, currency=None):
+        """
+        :type data_provider: gold_digger.data_providers.Provider
+        :param currency: currency requested by `get_by_date`, rates of all currencies are requested by `get_all_by_date` if None
+        :type currency: None | str
+        """
+        self.data_provider = data_provider
+        self.currency = currency
+
+    def key(self, date_of_exchange):
+        """
+        Key of the call for request coalescing.
+
+        :type date_of_exchange: datetime.date
+        :rtype: tuple[str, datetime.date, None | str]
+        """
+        return self.data_provider.name, date_of_exchange, self.currency
+
+    def __eq__(self, other):
+        """
+        :type other: object
+        :rtype: bool
+        """
+        return isinstance(other, FetchCall) and (self.data_provider, self.currency) == (other.data_provider, other.currency)
+
+    def __repr__(self):
+        """
+        :rtype: str
+        """
+        return f"FetchCall({self.data_provider}, {self.currency or 'all currencies'})"
+
+
+class FetchPlanner:
+    """
+    Turn missing rates of one date into the cheapest set of provider calls according to capabilities of the providers.
+    Whole day is requested at once if it is not more expensive than requesting the missing currencies one by one,
+    so the following requests of other currencies are served from database.
+    """
+
+    def __init__(self, supported_currencies):
+        """
+        :type supported_currencies: set[str]
+        """
+        self._supported_currencies_count = len(supported_currencies)
+
+    def plan(self, missing_rates):
+        """
+        :type missing_rates: list[tuple[str, int, gold_digger.data_providers.Provider]]
+        :rtype: list[gold_digger.managers.fetch_planner.FetchCall]
+        """
+        currencies_by_provider = defaultdict(set)
+        data_providers = {}
+        for currency, _, data_provider in missing_rates:
+            currencies_by_provider[data_provider.name].add(currency)
+            data_providers[data_provider.name] = data_provider
+
+        calls = []
+        for name, currencies in currencies_by_provider.items():
+            data_provider = data_providers[name]
+            capabilities = data_provider.capabilities
+            if capabilities.all_by_date_cost(self._supported_currencies_count) <= capabilities.by_date_cost(len(currencies)):
+                calls.append(FetchCall(data_provider))
+            else:
+                calls.extend(FetchCall(data_provider, currency) for currency in sorted(currencies))
+
+        return calls
@@ -0,0 +1,157 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Event
+from time import monotonic
+
+from croniter import croniter
+
+from .utils import Deadline, use_deadline
+from .utils.metrics import JOB_RUNS
+
+
+class Job:
+    """
+    Job of the scheduler, i.e. function called with DI container & logger according to its cron schedule.
+    """
+
+    def __init__(self, name, schedule, func, timeout):
+        """
+        :type name: str
+        :param schedule: cron expression, e.g. "5 0 * * *"
+        :type schedule: str
+        :type func: (gold_digger.di.DiContainer, gold_digger.utils.ContextLogger) -> None
+        :param timeout: time budget of the job in seconds, data providers are not requested once it's spent
+        :type timeout: float
+        """
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.timeout = timeout
+
+    def next_run(self, after):
+        """
+        :type after: datetime.datetime
+        :rtype: datetime.datetime
+        """
+        return croniter(self.schedule, after).get_next(datetime)
+
+    def __str__(self):
+        """
+        :rtype: str
+        """
+        return f"{self.schedule} {self.name}"
+
+
+class Scheduler:
+    """
+    In-process cron scheduler. Jobs run one by one in a worker thread on the same (warm) DI container,
+    so connection pools, HTTP sessions and caches of data providers are reused by all runs.
+    A job is skipped if its previous run hasn't finished yet. Duration & outcome of every run is logged and exposed as metric.
+    Health check runs in the scheduler thread, so it's not delayed by running jobs and it reports them.
+    """
+
+    def __init__(self, container, jobs, logger, health_check_schedule="0 * * * *", clock=datetime.now):
+        """
+        :type container: gold_digger.di.DiContainer
+        :type jobs: list[gold_digger.scheduler.Job]
+        :type logger: gold_digger.utils.ContextLogger
+        :param health_check_schedule: cron expression of health check or None to disable it
+        :type health_check_schedule: None | str
+        :type clock: () -> datetime.datetime
+        """
+        self._container = container
+        self._jobs = jobs
+        self._logger = logger
+        self._health_check_schedule = health_check_schedule
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scheduler")
+        self._runs = {}  # job name -> future of its last run
+        self._started = {}  # job name -> start (monotonic) of its running run
+        self._stopped = Event()
+
+    def run_forever(self):
+        """
+        Run jobs according to their schedules until `stop` is called.
+        """
+        now = self._clock()
+        next_runs = {job.name: job.next_run(now) for job in self._jobs}
+        next_health_check = None if self._health_check_schedule is None else croniter(self._health_check_schedule, now).get_next(datetime)
+        while not self._stopped.is_set():
+            now = self._clock()
+            for job in self._jobs:
+                if next_runs[job.name] <= now:
+                    self.submit(job)
+                    next_runs[job.name] = job.next_run(now)
+            if next_health_check is not None and next_health_check <= now:
+                self.health_check()
+                next_health_check = croniter(self._health_check_schedule, now).get_next(datetime)
+
+            next_run = min(run for run in [*next_runs.values(), next_health_check] if run is not None)
+            self._stopped.wait(max(0.0, (next_run - self._clock()).total_seconds()))
+
+        self._executor.shutdown(wait=True)
+
+    def stop(self):
+        self._stopped.set()
+
+    def submit(self, job):
+        """
+        :type job: gold_digger.scheduler.Job
+        :return: the run is submitted, i.e. previous run of the job is finished
+        :rtype: bool
+        """
+        previous_run = self._runs.get(job.name)
+        if previous_run is not None and not previous_run.done():
+            self._logger.warning("Job %s skipped, its previous run hasn't finished yet.", job.name, extra={"job": job.name, "job_outcome": "skipped"})
+            JOB_RUNS.labels(job.name, "skipped").observe(0)
+            return False
+
+        self._runs[job.name] = self._executor.submit(self.run, job)
+        return True
+
+    def run(self, job):
+        """
+        :type job: gold_digger.scheduler.Job
+        :return: outcome of the run (success, timeout or failure)
+        :rtype: str
+        """
+        logger = self._container.logger(job=job.name)
+        logger.info("Job %s started.", job.name)
+        start = self._started[job.name] = monotonic()
+        try:
+            with use_deadline(Deadline(job.timeout)):
+                job.func(self._container, logger)
+        except Exception:
+            logger.exception("Job %s failed.", job.name)
+            outcome = "failure"
+            self._container.db_session.rollback()
+        else:
+            outcome = "timeout" if monotonic() - start > job.timeout else "success"
+        finally:
+            del self._started[job.name]
+            try:
+                self._container.db_session.close()  # connection is returned to pool, objects loaded by the run are released
+            except Exception:
+                logger.exception("Closing of DB session after job %s failed.", job.name)
+
+        duration = monotonic() - start
+        JOB_RUNS.labels(job.name, outcome).observe(duration)
+        logger.info("Job %s finished: %s.", job.name, outcome, extra={"job_outcome": outcome, "duration_in_secs": duration})
+        return outcome
+
+    def health_check(self):
+        """
+        Log running jobs and for how long they run.
+
+        :return: job name -> seconds since start of its running run
+        :rtype: dict[str, float]
+        """
+        now = monotonic()
+        running = {name: now - start for name, start in list(self._started.items())}
+        self._logger.info(
+            "Cron health check. Running jobs: %s.",
+            ", ".join(f"{name} ({duration:.0f} s)" for name, duration in running.items()) or "none",
+            extra={"job": "health-check", "running_jobs": sorted(running)},
+        )
+        JOB_RUNS.labels("health-check", "success").observe(0)
+        return running
@@ -11,8 +11,31 @@ DATABASE_USER = get_env("database_user", default="postgres")
 DATABASE_PASSWORD = get_env("database_password", default="postgres")
 DATABASE_NAME = get_env("database_name", default="golddigger")
 
+API_REQUEST_TIMEOUT = get_env("api_request_timeout", default=10, convert=float)  # default time budget (seconds) of API request
+API_REQUEST_TIMEOUT_MAX = get_env("api_request_timeout_max", default=60, convert=float)  # upper limit of 'timeout' query parameter
+API_REQUEST_TIMEOUT_MIN = get_env("api_request_timeout_min", default=1, convert=float)  # lower limit, shorter budget would only time out providers
+API_QUERY_BUDGET_STRICT = get_env("api_query_budget_strict", default=0, convert=int)  # fail API requests exceeding query budget of their route (tests)
+
+# Profiles of API requests are stored to the directory as collapsed stacks named by flow ID, profiling is disabled if not set.
+# Request is profiled if its profiling header contains the token or it's randomly sampled.
+API_PROFILING_DIR = get_env("api_profiling_dir")
+API_PROFILING_HEADER = "X-Gold-Digger-Profile"
+API_PROFILING_TOKEN = get_env("api_profiling_token")
+API_PROFILING_SAMPLE_RATE = get_env("api_profiling_sample_rate", default=0.0, convert=float)
+API_PROFILING_INTERVAL = get_env("api_profiling_interval", default=0.005, convert=float)  # seconds between stack samples
+API_PROFILING_MAX_FILES = get_env("api_profiling_max_files", default=1000, convert=int)  # the oldest profiles are removed above the limit
+
+CRON_JOB_TIMEOUT = get_env("cron_job_timeout", default=1800, convert=float)  # time budget (seconds) of every run of scheduled job
+
+INGESTION_VISIBILITY_TIMEOUT = get_env("ingestion_visibility_timeout", default=900, convert=int)  # seconds, claimed job is taken again after it
+INGESTION_MAX_ATTEMPTS = get_env("ingestion_max_attempts", default=5, convert=int)
+INGESTION_RETRY_DELAY = get_env("ingestion_retry_delay", default=60, convert=int)  # seconds to retry failed job, doubled with every failure
+INGESTION_POLL_INTERVAL = get_env("ingestion_poll_interval", default=5.0, convert=float)  # seconds to wait for new jobs when the queue is empty
+INGESTION_CHUNK_DAYS = get_env("ingestion_chunk_days", default=31, convert=int)  # days of one enqueued job
+
 LOGGING_FORMAT = "[%(levelname)s] %(asctime)s at %(filename)s:%(lineno)d (%(processName)s-%(process)s-%(threadName)s) -- %(message)s"
 LOGGING_LEVEL = logging.DEBUG
+LOGGING_DEBUG_SAMPLE_RATE = get_env("logging_debug_sample_rate", default=1.0, convert=float)  # ratio of request flows with debug logs
 LOGGING_GRAYLOG_ENABLED = False
 LOGGING_AMQP_HOST = "136.243.154.182"
 LOGGING_AMQP_PORT = 5672
@@ -223,3 +246,26 @@ SECRETS_CURRENCY_LAYER_ACCESS_KEY = get_env("secrets_currency_layer_access_key",
 SECRETS_FIXER_ACCESS_KEY = get_env("secrets_fixer_access_key", default="")
 
 USER_AGENT_HTTP_HEADER = "ROI Hunter/Exchange rates service; https://www.roihunter.com/"
+
+PROVIDER_FETCH_WORKERS = get_env("provider_fetch_workers", default=8, convert=int)  # concurrent provider requests of API requests
+PROVIDER_HTTP_POOL_SIZE = get_env("provider_http_pool_size", default=10, convert=int)
+PROVIDER_HTTP_CONNECT_TIMEOUT = get_env("provider_http_connect_timeout", default=3.05, convert=float)
+PROVIDER_HTTP_READ_TIMEOUT = get_env("provider_http_read_timeout", default=15, convert=float)
+PROVIDER_HTTP_MAX_RETRIES = get_env("provider_http_max_retries", default=2, convert=int)
+PROVIDER_HTTP_BACKOFF_FACTOR = get_env("provider_http_backoff_factor", default=0.5, convert=float)
+PROVIDER_HTTP_BACKOFF_MAX = get_env("provider_http_backoff_max", default=10, convert=float)
+PROVIDER_CIRCUIT_BREAKER_WINDOW = get_env("provider_circuit_breaker_window", default=20, convert=int)  # recent requests of failure ratio
+PROVIDER_CIRCUIT_BREAKER_MIN_REQUESTS = get_env("provider_circuit_breaker_min_requests", default=5, convert=int)
+PROVIDER_CIRCUIT_BREAKER_FAILURE_RATIO = get_env("provider_circuit_breaker_failure_ratio", default=0.5, convert=float)
+PROVIDER_CIRCUIT_BREAKER_SLOW_CALL_DURATION = get_env("provider_circuit_breaker_slow_call_duration", default=10, convert=float)  # seconds
+PROVIDER_CIRCUIT_BREAKER_RESET_TIMEOUT = get_env("provider_circuit_breaker_reset_timeout", default=30, convert=float)  # seconds before probe
+PROVIDER_HTTP_CACHE_DIR = get_env("provider_http_cache_dir", default=None)  # on-disk cache of provider responses is disabled if not set
+PROVIDER_HTTP_CACHE_MAX_SIZE = get_env("provider_http_cache_max_size", default=256 * 1024 * 1024, convert=int)  # bytes
+PROVIDER_HTTP_RECORD_ARCHIVE = get_env("provider_http_record_archive", default=None)  # path of archive to record provider exchanges to
+PROVIDER_HTTP_REPLAY_URL = get_env("provider_http_replay_url", default=None)  # URL of stub server replaying recorded exchanges
+PROVIDER_GRANDTRUNK_PARSE_PROCESSES = get_env("provider_grandtrunk_parse_processes", default=0, convert=int)  # historical ranges parsed inline if 0
+PROVIDER_HEDGE_PERCENTILE = get_env("provider_hedge_percentile", default=None, convert=float)  # e.g. 0.95, hedged requests are disabled if not set
+PROVIDER_HEDGE_DEFAULT_DELAY = get_env("provider_hedge_default_delay", default=1.0, convert=float)  # seconds, for providers without latency samples
+PROVIDER_MISS_TTL = get_env("provider_miss_ttl", default=3600, convert=int)  # seconds to skip provider without rate for historical date
+PROVIDER_MISS_TTL_MAX = get_env("provider_miss_ttl_max", default=7 * 24 * 3600, convert=int)
+SUPPORTED_CURRENCIES_CACHE_TTL = get_env("supported_currencies_cache_ttl", default=3600, convert=int)  # seconds, in-process layer of database cache
@@ -4,10 +4,13 @@ Related article: https://sebest.github.io/post/protips-using-gunicorn-inside-a-d
 Parameters you might want to override:
   GUNICORN_WORKERS=1
   GUNICORN_BIND="0.0.0.0:8080"
+  PROMETHEUS_MULTIPROC_DIR="/tmp/gold-digger-metrics" - metrics of workers are aggregated in the directory (emptied on start)
 """
 
 import os
+import shutil
 import sys
+import tempfile
 
 sys.path.append(".")
 
@@ -15,6 +18,33 @@ timeout = 300  # 5 minutes in seconds
 bind = "0.0.0.0:8080"
 workers = 1
 
+# Metrics are written to the directory by every worker so the worker serving `/metrics` can aggregate them.
+# It has to be set before `prometheus_client` is imported by workers.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "gold-digger-metrics"))
+
+
+def on_starting(server):
+    """
+    Remove metrics of the previous run.
+
+    :type server: gunicorn.arbiter.Arbiter
+    """
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+
+def child_exit(server, worker):
+    """
+    Live samples (gauges) of the exited worker are removed, its counters & histograms are kept.
+
+    :type server: gunicorn.arbiter.Arbiter
+    :type worker: gunicorn.workers.base.Worker
+    """
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
 # Overwrite some Gunicorn's params by ENV variables
 for k, v in os.environ.items():
     if k.startswith("GUNICORN_"):
@@ -1 +1,5 @@
 from ._context_logger import ContextLogger
+from .deadline import Deadline, use_deadline
+from .query_statistics import QueryBudgetExceeded, QueryStatistics, use_query_statistics
+from .request_failures import record_request_failure, RequestFailures, use_request_failures
+from .single_flight import SingleFlight
@@ -1,11 +1,24 @@
+from functools import lru_cache
 from hashlib import md5
 from logging import LoggerAdapter
 
 
+@lru_cache(maxsize=1024)
+def message_hash(msg):
+    """
+    Messages are format strings, so there are only a few of them and their hashes are memoized.
+
+    :type msg: str
+    :rtype: str
+    """
+    return md5(msg.encode("utf-8")).hexdigest()
+
+
 class ContextLogger(LoggerAdapter):
     """
     Acts like logging.LoggerAdapter but instead of overwriting message extra
     it merges it together so that message extra has higher priority.
+    Messages are processed only if their level is enabled (see `logging.LoggerAdapter.log`).
     """
 
     @property
@@ -23,7 +36,7 @@ class ContextLogger(LoggerAdapter):
         """
         extra = self.extra.copy()
         extra.update(kwargs.get("extra") or {})
-        extra["message_hash"] = md5(msg.encode("utf-8")).hexdigest()
+        extra["message_hash"] = message_hash(msg) if isinstance(msg, str) else message_hash(str(msg))
         kwargs["extra"] = extra
         return msg, kwargs
 
@@ -0,0 +1,45 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+_pinned_time = None
+
+
+def now(tz=timezone.utc):
+    """
+    Current time, or the pinned time (see `pin_time`).
+
+    :type tz: datetime.tzinfo
+    :rtype: datetime.datetime
+    """
+    if _pinned_time is not None:
+        return _pinned_time.astimezone(tz)
+    return datetime.now(tz)
+
+
+def today():
+    """
+    Current local date, or date of the pinned time (see `pin_time`).
+
+    :rtype: datetime.date
+    """
+    if _pinned_time is not None:
+        return _pinned_time.date()
+    return date.today()
+
+
+@contextmanager
+def pin_time(moment):
+    """
+    Pin current time of providers, their calendars and exchange rate manager (in all threads), e.g. so a benchmark
+    requests the same URLs as when its exchanges were recorded, whatever day it runs.
+
+    :param moment: time with timezone, its date is used as today
+    :type moment: datetime.datetime
+    """
+    global _pinned_time
+
+    previous, _pinned_time = _pinned_time, moment
+    try:
+        yield moment
+    finally:
+        _pinned_time = previous
@@ -1,4 +1,7 @@
 import logging
+from logging.handlers import QueueHandler
+from random import random
+from zlib import crc32
 
 
 class IncludeFilter:
@@ -44,3 +47,46 @@ class IncludeFilter:
 
         # record is from GoldDigger app
         return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Only a sample of debug records passes the filter, records of other levels pass always.
+    Records are sampled by their flow ID (if any), i.e. either all debug records of a request pass or none of them.
+    """
+
+    def __init__(self, sample_rate):
+        """
+        :param sample_rate: ratio of debug records (or flows) which pass the filter
+        :type sample_rate: float
+        """
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        """
+        :type record: logging.LogRecord
+        :rtype: bool
+        """
+        if record.levelno != logging.DEBUG or self.sample_rate >= 1:
+            return True
+
+        flow_id = getattr(record, "flow_id", None)
+        if flow_id is None:
+            return random() < self.sample_rate
+        return crc32(flow_id.encode("utf-8")) / 0xFFFFFFFF < self.sample_rate
+
+
+class LocalQueueHandler(QueueHandler):
+    """
+    Queue handler for queue consumed by listener in the same process. Records are put to the queue unchanged,
+    i.e. they are formatted only once by the target handler and exception info (`exc_info`) is kept for it
+    (e.g. graypy sends traceback as a separate field). `QueueHandler.prepare` formats them for pickling instead.
+    """
+
+    def prepare(self, record):
+        """
+        :type record: logging.LogRecord
+        :rtype: logging.LogRecord
+        """
+        return record
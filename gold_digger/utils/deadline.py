@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+
+_current_deadline = ContextVar("deadline", default=None)
+
+
+class Deadline:
+    """
+    Time budget of one request. Data providers trim their HTTP timeouts to the remaining budget
+    and skip requests when the budget is spent.
+    """
+
+    def __init__(self, timeout):
+        """
+        :type timeout: float
+        """
+        self.timeout = timeout
+        self._expires_at = monotonic() + timeout
+
+    @staticmethod
+    def current():
+        """
+        :rtype: None | gold_digger.utils.Deadline
+        """
+        return _current_deadline.get()
+
+    @property
+    def expired(self):
+        """
+        :rtype: bool
+        """
+        return self.remaining() <= 0
+
+    def remaining(self):
+        """
+        :rtype: float
+        """
+        return max(0.0, self._expires_at - monotonic())
+
+    def trim(self, timeout):
+        """
+        :type timeout: float
+        :rtype: float
+        """
+        return min(timeout, self.remaining())
+
+    def __repr__(self):
+        """
+        :rtype: str
+        """
+        return f"Deadline(timeout={self.timeout}, remaining={self.remaining():.3f})"
+
+
+@contextmanager
+def use_deadline(deadline):
+    """
+    Make the deadline current for the code (and data providers) called within the context.
+
+    :type deadline: None | gold_digger.utils.Deadline
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
@@ -12,7 +12,7 @@ class GunicornLogger(glogging.Logger):
         """
         :type cfg: gunicorn.config.Config
         """
-        # this is also executed when importing whole gold_digger package
+        # this is also executed when DI container is created
         DiContainer.set_up_root_logger()
 
         # disables StreamHandler
@@ -0,0 +1,115 @@
+"""
+Prometheus metrics of the service exposed by `/metrics` endpoint.
+
+Metrics of all gunicorn workers are aggregated when `PROMETHEUS_MULTIPROC_DIR` is set (see `settings_gunicorn.py`),
+every worker writes its samples to memory-mapped files in the directory and the scraped worker collects them all.
+Otherwise (e.g. cron or development server) metrics of the current process are exposed.
+"""
+
+import os
+from time import perf_counter
+
+from prometheus_client import CollectorRegistry, CONTENT_TYPE_LATEST, Counter, generate_latest, Histogram, REGISTRY
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+
+from .query_statistics import QueryStatistics
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+API_REQUEST_DURATION = Histogram(
+    "gold_digger_api_request_duration_seconds",
+    "Duration of API requests.",
+    ["route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+PROVIDER_REQUEST_DURATION = Histogram(
+    "gold_digger_provider_request_duration_seconds",
+    "Duration of HTTP requests to data providers.",
+    ["provider", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30),
+)
+DB_QUERY_DURATION = Histogram(
+    "gold_digger_db_query_duration_seconds",
+    "Duration of database queries.",
+    ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+CACHE_REQUESTS = Counter("gold_digger_cache_requests_total", "Lookups of caches by result (hit or miss).", ["cache", "result"])
+PROVIDER_ERRORS = Counter("gold_digger_provider_errors_total", "Failed HTTP requests to data providers (connection errors, timeouts and 5xx).", ["provider"])
+PROVIDER_QUOTA_CALLS = Counter(
+    "gold_digger_provider_quota_calls_total",
+    "Calls of data providers with request limit, rejected calls were not sent because the limit is exceeded.",
+    ["provider", "result"],
+)
+JOB_RUNS = Histogram(
+    "gold_digger_job_duration_seconds",
+    "Duration of runs of scheduled jobs by outcome (success, timeout, failure or skipped).",
+    ["job", "outcome"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+INGESTION_JOBS = Counter("gold_digger_ingestion_jobs_total", "Processed ingestion jobs by outcome (done, retry, failed or stale).", ["provider", "outcome"])
+DB_CONFLICTS = Counter("gold_digger_db_conflicts_total", "Inserted rows already stored in database (IntegrityError or ON CONFLICT).", ["operation"])
+
+STATEMENTS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def render_metrics():
+    """
+    :return: metrics in Prometheus text format
+    :rtype: bytes
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def record_cache_lookup(cache, hit, count=1):
+    """
+    :type cache: str
+    :type hit: bool
+    :type count: int
+    """
+    if count:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+def record_provider_request(provider, latency, success):
+    """
+    :type provider: None | str
+    :type latency: float
+    :type success: bool
+    """
+    provider = provider or "unknown"
+    PROVIDER_REQUEST_DURATION.labels(provider, "success" if success else "error").observe(latency)
+    if not success:
+        PROVIDER_ERRORS.labels(provider).inc()
+
+
+def instrument_engine(engine):
+    """
+    Observe duration of every query executed by the engine, queries are labelled by type of their statement.
+    Queries are also recorded to statistics of the current API request (if any).
+
+    :type engine: sqlalchemy.engine.Engine
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = perf_counter() - conn.info["query_start"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        DB_QUERY_DURATION.labels(verb if verb in STATEMENTS else "OTHER").observe(duration)
+        query_statistics = QueryStatistics.current()
+        if query_statistics is not None:
+            query_statistics.record(statement, duration)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        if context.connection is not None and context.connection.info.get("query_start"):
+            context.connection.info["query_start"].pop()
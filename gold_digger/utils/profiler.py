@@ -0,0 +1,119 @@
+import sys
+from collections import Counter
+from glob import glob
+from os import makedirs, remove
+from os.path import basename, getmtime, join
+from threading import Event, get_ident, Thread
+
+
+class StackSampler:
+    """
+    Sampling profiler of one thread. Stack of the thread is sampled by a background thread every `interval` seconds
+    while the sampler is active. Samples are stored in collapsed-stack format (`root;...;leaf count` per line)
+    readable by flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        """
+        :type interval: float
+        :param thread_id: identifier of the profiled thread, the current thread if None
+        :type thread_id: None | int
+        """
+        self.interval = interval
+        self.thread_id = get_ident() if thread_id is None else thread_id
+        self.samples = Counter()
+        self._stopped = Event()
+        self._thread = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = Thread(target=self._sample, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        """
+        :rtype: gold_digger.utils.profiler.StackSampler
+        """
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        :type exc_type: None | type[BaseException]
+        :type exc_val: None | BaseException
+        :type exc_tb: None | traceback
+        """
+        self.stop()
+
+    def collapsed(self):
+        """
+        :rtype: str
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def save(self, directory, name):
+        """
+        :type directory: str
+        :param name: name of the profile, e.g. flow ID of the request
+        :type name: str
+        :return: path of the stored profile
+        :rtype: str
+        """
+        makedirs(directory, exist_ok=True)
+        path = join(directory, f"{name}.collapsed")
+        with open(path, "w", encoding="utf-8") as profile_file:
+            profile_file.write(self.collapsed())
+        return path
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            self.samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        """
+        :type frame: types.FrameType
+        :rtype: str
+        """
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+
+def prune_profiles(directory, max_files):
+    """
+    Remove the oldest profiles in the directory, so at most `max_files` of them are kept.
+    Profiles removed meanwhile by another worker are ignored.
+
+    :type directory: str
+    :type max_files: int
+    :return: number of removed profiles
+    :rtype: int
+    """
+    profiles = []
+    for path in glob(join(directory, "*.collapsed")):
+        try:
+            profiles.append((getmtime(path), path))
+        except FileNotFoundError:
+            continue
+
+    removed = 0
+    for _, path in sorted(profiles)[: max(0, len(profiles) - max_files)]:
+        try:
+            remove(path)
+            removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
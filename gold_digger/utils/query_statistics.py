@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from heapq import heappush, heapreplace
+from threading import Lock
+
+_current_query_statistics = ContextVar("query_statistics", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    API request executed more database queries than its route declares (raised in strict mode only).
+    """
+
+
+class QueryStatistics:
+    """
+    Database queries executed within one API request, queries are recorded by engine events (see `metrics.instrument_engine`).
+    """
+
+    SLOWEST_QUERIES = 3
+    STATEMENT_MAX_LENGTH = 200
+
+    def __init__(self):
+        self._lock = Lock()  # queries may be executed by threads of the request (e.g. supported currencies of providers)
+        self.count = 0
+        self.duration = 0.0
+        self._slowest = []  # min-heap of (duration, statement)
+
+    @staticmethod
+    def current():
+        """
+        :rtype: None | gold_digger.utils.QueryStatistics
+        """
+        return _current_query_statistics.get()
+
+    def record(self, statement, duration):
+        """
+        :type statement: str
+        :type duration: float
+        """
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            if len(self._slowest) < self.SLOWEST_QUERIES:
+                heappush(self._slowest, (duration, statement[: self.STATEMENT_MAX_LENGTH]))
+            elif duration > self._slowest[0][0]:
+                heapreplace(self._slowest, (duration, statement[: self.STATEMENT_MAX_LENGTH]))
+
+    @property
+    def slowest(self):
+        """
+        :return: the slowest statements with their durations, the slowest first
+        :rtype: list[tuple[float, str]]
+        """
+        with self._lock:
+            return sorted(self._slowest, reverse=True)
+
+    def log_extra(self):
+        """
+        :rtype: dict[str, int | float | list[str]]
+        """
+        return {
+            "db_query_count": self.count,
+            "db_duration_in_secs": self.duration,
+            "db_slowest_queries": [f"{duration:.4f}s {statement}" for duration, statement in self.slowest],
+        }
+
+
+@contextmanager
+def use_query_statistics(query_statistics):
+    """
+    Record database queries executed within the context to the statistics.
+
+    :type query_statistics: gold_digger.utils.QueryStatistics
+    """
+    token = _current_query_statistics.set(query_statistics)
+    try:
+        yield query_statistics
+    finally:
+        _current_query_statistics.reset(token)
@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+_current_request_failures = ContextVar("request_failures", default=None)
+
+
+class RequestFailures:
+    """
+    Failed requests of data providers within a context (connection errors, timeouts, 5xx & 429 responses, unparsable responses,
+    exhausted request limit). Provider returns no rate both when its request fails and when its response has no rate,
+    the failures tell these cases apart.
+    """
+
+    def __init__(self):
+        self._lock = Lock()  # requests may be sent by threads of the provider (e.g. batches of Yahoo)
+        self.count = 0
+
+    @staticmethod
+    def current():
+        """
+        :rtype: None | gold_digger.utils.RequestFailures
+        """
+        return _current_request_failures.get()
+
+    def record(self):
+        with self._lock:
+            self.count += 1
+
+    @property
+    def failed(self):
+        """
+        :rtype: bool
+        """
+        return self.count > 0
+
+
+def record_request_failure():
+    """
+    Record failed request of data provider to the current failures (if any).
+    """
+    request_failures = RequestFailures.current()
+    if request_failures is not None:
+        request_failures.record()
+
+
+@contextmanager
+def use_request_failures(request_failures):
+    """
+    Record failed requests of data providers called within the context to the failures.
+
+    :type request_failures: gold_digger.utils.RequestFailures
+    """
+    token = _current_request_failures.set(request_failures)
+    try:
+        yield request_failures
+    finally:
+        _current_request_failures.reset(token)
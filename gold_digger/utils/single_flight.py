@@ -0,0 +1,45 @@
+from concurrent.futures import Future
+from threading import Lock
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key. The first caller (leader) executes the function,
+    callers arriving while it is running wait for its result (or exception) instead of repeating the call.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+
+    def do(self, key, function, *args, timeout=None):
+        """
+        :type key: collections.abc.Hashable
+        :type function: collections.abc.Callable
+        :param timeout: seconds to wait for result of the running call, the leader's call is not limited
+        :type timeout: None | float
+        :return: result of the function and flag whether the result was shared from call of another caller
+        :rtype: tuple[object, bool]
+        :raises concurrent.futures.TimeoutError: result of the running call is not ready within timeout
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if not leader:
+            return call.result(timeout), True
+
+        try:
+            result = function(*args)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return result, False
@@ -0,0 +1,111 @@
+from datetime import datetime
+from threading import Event
+from time import monotonic
+
+from .utils import Deadline, use_deadline
+from .utils.metrics import INGESTION_JOBS
+
+
+class Worker:
+    """
+    Consumer of the ingestion job queue (see `gold_digger.database.DaoIngestionJob`). Jobs are processed one by one on the same DI container.
+    Every job runs within deadline shorter than visibility timeout, so it's not claimed by another worker while still running.
+    Job of a crashed worker is claimed again once its visibility timeout expires, already stored days are not requested again.
+    """
+
+    VISIBILITY_MARGIN = 0.9  # part of visibility timeout used as time budget of the job
+
+    def __init__(self, container, dao_ingestion_job, logger, poll_interval, clock=datetime.utcnow):
+        """
+        :type container: gold_digger.di.DiContainer
+        :type dao_ingestion_job: gold_digger.database.DaoIngestionJob
+        :type logger: gold_digger.utils.ContextLogger
+        :param poll_interval: seconds to wait for new jobs when the queue is empty
+        :type poll_interval: float
+        :type clock: () -> datetime.datetime
+        """
+        self._container = container
+        self._dao_ingestion_job = dao_ingestion_job
+        self._logger = logger
+        self._poll_interval = poll_interval
+        self._clock = clock
+        self._stopped = Event()
+
+    def run_forever(self):
+        """
+        Process jobs until `stop` is called, the current job is finished first.
+        """
+        while not self._stopped.is_set():
+            if not self.run_next():
+                self._stopped.wait(self._poll_interval)
+
+    def stop(self):
+        self._stopped.set()
+
+    def run_next(self):
+        """
+        :return: a job was claimed and processed
+        :rtype: bool
+        """
+        try:
+            job = self._dao_ingestion_job.claim(self._clock())
+        except Exception:
+            self._logger.exception("Claiming of ingestion job failed.")
+            return False
+
+        if job is None:
+            return False
+
+        self.run(job)
+        return True
+
+    def run(self, job):
+        """
+        :type job: gold_digger.database.db_model.IngestionJob
+        :return: outcome of the job (done, retry, failed or stale)
+        :rtype: str
+        """
+        logger = self._container.logger(job_id=job.id, provider=job.provider)
+        logger.info("Ingestion job %s started: Provider %s, dates %s - %s, attempt %s.", job.id, job.provider, job.start_date, job.end_date, job.attempts)
+        start = monotonic()
+        try:
+            error = self._process(job, logger)
+        except Exception as e:
+            logger.exception("Ingestion job %s failed.", job.id)
+            self._container.db_session.rollback()
+            error = repr(e)
+
+        try:
+            if error is None:
+                outcome = "done" if self._dao_ingestion_job.complete(job, self._clock()) else "stale"
+            elif self._dao_ingestion_job.fail(job, error, self._clock()):
+                outcome = "retry"
+            else:
+                outcome = "stale" if job.attempts < job.max_attempts else "failed"
+        except Exception:
+            # the job is claimed again when its visibility timeout expires
+            logger.exception("Finishing of ingestion job %s failed.", job.id)
+            outcome = "stale"
+
+        duration = monotonic() - start
+        INGESTION_JOBS.labels(job.provider, outcome).inc()
+        logger.info("Ingestion job %s finished: %s.", job.id, outcome, extra={"job_outcome": outcome, "duration_in_secs": duration, "error": error})
+        return outcome
+
+    def _process(self, job, logger):
+        """
+        :type job: gold_digger.database.db_model.IngestionJob
+        :type logger: gold_digger.utils.ContextLogger
+        :return: error of the job or None if all its days are stored
+        :rtype: None | str
+        """
+        data_provider = self._container.data_providers.get(job.provider)
+        if data_provider is None:
+            return f"Unknown provider {job.provider}."
+
+        with use_deadline(Deadline(self._dao_ingestion_job.visibility_timeout * self.VISIBILITY_MARGIN)):
+            failed_days = self._container.exchange_rate_manager.update_rates_in_range(data_provider, job.start_date, job.end_date, logger)
+
+        if failed_days:
+            return f"Rates of {len(failed_days)} days are missing: {', '.join(map(str, failed_days[:10]))}"
+        return None
@@ -1,6 +1,6 @@
 import pytest
 
-from gold_digger.data_providers import CurrencyLayer, Fixer, Frankfurter, Yahoo
+from gold_digger.data_providers import CurrencyLayer, Fixer, Frankfurter, GrandTrunk, Yahoo
 
 
 @pytest.fixture
@@ -44,3 +44,13 @@ def currency_layer(base_currency, http_user_agent, logger):
     :rtype: gold_digger.data_providers.CurrencyLayer
     """
     return CurrencyLayer(base_currency, http_user_agent, "simple_access_key", logger)
+
+
+@pytest.fixture
+def grandtrunk(base_currency, http_user_agent):
+    """
+    :type base_currency: str
+    :type http_user_agent: str
+    :rtype: gold_digger.data_providers.GrandTrunk
+    """
+    return GrandTrunk(base_currency, http_user_agent)
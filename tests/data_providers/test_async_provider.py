@@ -0,0 +1,171 @@
+import asyncio
+import gc
+from datetime import date
+from decimal import Decimal
+from unittest.mock import Mock
+
+import httpx
+
+from gold_digger.data_providers import AsyncHttpPool, CircuitBreaker
+
+
+class TestAsyncHttpPool:
+    @staticmethod
+    def test_get__concurrency_is_limited_per_host():
+        """
+        Requests to one host wait for a free slot, requests to other hosts are not blocked by them.
+        """
+        running = {"a.test": 0, "b.test": 0}
+        max_running = {"a.test": 0, "b.test": 0}
+
+        async def _handler(request):
+            """
+            :type request: httpx.Request
+            :rtype: httpx.Response
+            """
+            host = request.url.host
+            running[host] += 1
+            max_running[host] = max(max_running[host], running[host])
+            await asyncio.sleep(0.01)
+            running[host] -= 1
+            return httpx.Response(200, text="OK")
+
+        pool = AsyncHttpPool(max_connections_per_host=2, transport=httpx.MockTransport(_handler))
+
+        async def _run():
+            """
+            :rtype: list[httpx.Response]
+            """
+            urls = ["http://a.test/"] * 6 + ["http://b.test/"] * 3
+            responses = await asyncio.gather(*(pool.get(url, timeout=5) for url in urls))
+            await pool.close()
+            return responses
+
+        responses = asyncio.run(_run())
+
+        assert [r.status_code for r in responses] == [200] * 9
+        assert max_running == {"a.test": 2, "b.test": 2}
+
+    @staticmethod
+    def test_get__timeout_budget_includes_waiting_for_host():
+        """
+        :raises asyncio.TimeoutError:
+        """
+
+        async def _handler(_):
+            """
+            :rtype: httpx.Response
+            """
+            await asyncio.sleep(1)
+            return httpx.Response(200)
+
+        pool = AsyncHttpPool(max_connections_per_host=1, transport=httpx.MockTransport(_handler))
+
+        async def _run():
+            """
+            :rtype: list[httpx.Response | BaseException]
+            """
+            results = await asyncio.gather(pool.get("http://a.test/", timeout=0.05), return_exceptions=True)
+            await pool.close()
+            return results
+
+        (result,) = asyncio.run(_run())
+
+        assert isinstance(result, asyncio.TimeoutError)
+
+    @staticmethod
+    def test_client_of_previous_loop_is_dropped():
+        """
+        Pool used by more `asyncio.run` calls without `close` keeps only the client & semaphores of the last loop.
+        """
+        pool = AsyncHttpPool(transport=httpx.MockTransport(lambda _: httpx.Response(200)))
+
+        async def _run():
+            """
+            :rtype: tuple[httpx.AsyncClient, asyncio.Semaphore]
+            """
+            await pool.get("http://a.test/", timeout=5)
+            return pool.client(), pool.host_semaphore("a.test")
+
+        first_client, first_semaphore = asyncio.run(_run())
+        second_client, second_semaphore = asyncio.run(_run())
+        gc.collect()
+
+        assert first_client is not second_client
+        assert first_semaphore is not second_semaphore
+        assert pool._loop() is None  # the last loop is referenced weakly
+        assert list(pool._host_semaphores) == ["a.test"]
+
+
+class TestAsyncGetAllByDate:
+    @staticmethod
+    def test_async_get_all_by_date__grandtrunk(grandtrunk, logger):
+        """
+        GrandTrunk is requested concurrently for every supported currency.
+
+        :type grandtrunk: gold_digger.data_providers.GrandTrunk
+        :type logger: gold_digger.utils.ContextLogger
+        """
+
+        def _handler(request):
+            """
+            :type request: httpx.Request
+            :rtype: httpx.Response
+            """
+            if request.url.path.startswith("/currencies/"):
+                return httpx.Response(200, text="USD\nEUR\nCZK")
+            return httpx.Response(200, text={"EUR": "0.89\n", "CZK": "22.6"}[request.url.path.rsplit("/", 1)[1]])
+
+        grandtrunk.async_http_pool = AsyncHttpPool(transport=httpx.MockTransport(_handler))
+
+        rates = asyncio.run(grandtrunk.async_get_all_by_date(date(2019, 4, 15), {"EUR", "CZK", "GBP"}, logger))
+
+        assert rates == {"EUR": Decimal("0.89"), "CZK": Decimal("22.6")}
+
+    @staticmethod
+    def test_async_get_all_by_date__frankfurter_connection_error(frankfurter, logger):
+        """
+        :type frankfurter: gold_digger.data_providers.Frankfurter
+        :type logger: gold_digger.utils.ContextLogger
+        """
+
+        def _handler(request):
+            """
+            :type request: httpx.Request
+            :raises httpx.ConnectError:
+            """
+            raise httpx.ConnectError("Connection refused", request=request)
+
+        frankfurter.async_http_pool = AsyncHttpPool(transport=httpx.MockTransport(_handler))
+
+        rates = asyncio.run(frankfurter.async_get_all_by_date(date(2019, 4, 15), {"EUR"}, logger))
+
+        assert rates == {}
+
+    @staticmethod
+    def test_async_get_all_by_date__too_many_requests_is_failure_of_circuit_breaker(frankfurter, logger):
+        """
+        :type frankfurter: gold_digger.data_providers.Frankfurter
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        frankfurter._transport.circuit_breaker = Mock(CircuitBreaker)
+        frankfurter._transport.circuit_breaker.allow_request.return_value = True
+        frankfurter.async_http_pool = AsyncHttpPool(transport=httpx.MockTransport(lambda request: httpx.Response(429)))
+
+        rates = asyncio.run(frankfurter.async_get_all_by_date(date(2019, 4, 15), {"EUR"}, logger))
+
+        assert rates == {}
+        assert frankfurter.circuit_breaker.record.call_args.args[1] is False
+
+    @staticmethod
+    def test_async_get_all_by_date__requests_are_recorded_in_statistics(frankfurter, logger):
+        """
+        :type frankfurter: gold_digger.data_providers.Frankfurter
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        frankfurter.async_http_pool = AsyncHttpPool(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+
+        asyncio.run(frankfurter.async_get_all_by_date(date(2019, 4, 15), {"EUR"}, logger))
+
+        assert frankfurter.statistics.snapshot()["requests"] == 1
+        assert frankfurter.statistics.snapshot()["errors"] == 1
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timezone
+
+from gold_digger.data_providers import Frankfurter, Yahoo
+from gold_digger.data_providers._calendar import easter_sunday
+
+
+class TestEasterSunday:
+    @staticmethod
+    def test_easter_sunday():
+        assert easter_sunday(2019) == date(2019, 4, 21)
+        assert easter_sunday(2024) == date(2024, 3, 31)
+        assert easter_sunday(2025) == date(2025, 4, 20)
+
+
+class TestFrankfurterCalendar:
+    @staticmethod
+    def test_publishes_on__working_days_without_target_holidays():
+        calendar = Frankfurter.calendar
+
+        assert calendar.publishes_on(date(2019, 4, 17))  # Wednesday
+        assert not calendar.publishes_on(date(2019, 4, 20))  # Saturday
+        assert not calendar.publishes_on(date(2019, 4, 19))  # Good Friday
+        assert not calendar.publishes_on(date(2019, 4, 22))  # Easter Monday
+        assert not calendar.publishes_on(date(2019, 12, 25))
+        assert not calendar.publishes_on(date(1998, 12, 30))  # before history of ECB rates
+
+    @staticmethod
+    def test_is_published__rates_of_today_after_publish_time():
+        calendar = Frankfurter.calendar
+        day = date(2019, 4, 17)
+
+        assert not calendar.is_published(day, datetime(2019, 4, 17, 13, 59, tzinfo=timezone.utc))  # 15:59 CEST
+        assert calendar.is_published(day, datetime(2019, 4, 17, 14, 0, tzinfo=timezone.utc))
+        assert not calendar.is_published(date(2019, 4, 18), datetime(2019, 4, 17, 14, 0, tzinfo=timezone.utc))
+
+    @staticmethod
+    def test_latest_publication():
+        calendar = Frankfurter.calendar
+        now = datetime(2019, 4, 23, 8, 0, tzinfo=timezone.utc)  # Tuesday after Easter, before publication
+
+        assert calendar.latest_publication(date(2019, 4, 23), now) == date(2019, 4, 18)
+        assert calendar.latest_publication(date(2019, 4, 30), now) == date(2019, 4, 18)
+        assert calendar.latest_publication(date(2019, 4, 17), now) == date(2019, 4, 17)
+
+    @staticmethod
+    def test_publication_days():
+        calendar = Frankfurter.calendar
+
+        assert calendar.publication_days(date(2019, 4, 15), date(2019, 4, 23), datetime(2019, 4, 23, 8, 0, tzinfo=timezone.utc)) == [
+            date(2019, 4, 15),
+            date(2019, 4, 16),
+            date(2019, 4, 17),
+            date(2019, 4, 18),
+        ]
+
+
+class TestYahooCalendar:
+    @staticmethod
+    def test_is_available__only_today():
+        now = datetime(2019, 4, 20, 10, 0, tzinfo=timezone.utc)
+
+        assert Yahoo.calendar.is_available(date(2019, 4, 20), now)
+        assert not Yahoo.calendar.is_available(date(2019, 4, 19), now)
+        assert Yahoo.calendar.is_published(date(2019, 4, 19), now)
@@ -0,0 +1,167 @@
+from datetime import date
+from unittest.mock import Mock, patch
+
+import pytest
+from requests import ConnectionError, Session, Timeout
+
+from gold_digger.data_providers import CircuitBreaker, CircuitOpen, GrandTrunk, HttpTransport
+from gold_digger.utils import Deadline, RequestFailures, use_deadline, use_request_failures
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        """
+        :rtype: float
+        """
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """
+    :rtype: _Clock
+    """
+    return _Clock()
+
+
+@pytest.fixture
+def circuit_breaker(clock):
+    """
+    :type clock: _Clock
+    :rtype: gold_digger.data_providers.CircuitBreaker
+    """
+    return CircuitBreaker(window=4, min_requests=4, failure_ratio=0.5, slow_call_duration=5, reset_timeout=30, clock=clock)
+
+
+class TestCircuitBreaker:
+    @staticmethod
+    def test_opens_on_failure_ratio(circuit_breaker):
+        """
+        :type circuit_breaker: gold_digger.data_providers.CircuitBreaker
+        """
+        circuit_breaker.record(0.1, success=True)
+        circuit_breaker.record(0.1, success=False)
+        circuit_breaker.record(0.1, success=True)
+        assert circuit_breaker.state == CircuitBreaker.CLOSED
+
+        circuit_breaker.record(6, success=True)  # too slow
+
+        assert circuit_breaker.state == CircuitBreaker.OPEN
+        assert circuit_breaker.is_open is True
+        assert circuit_breaker.allow_request() is False
+
+    @staticmethod
+    def test_half_open_probe(circuit_breaker, clock):
+        """
+        :type circuit_breaker: gold_digger.data_providers.CircuitBreaker
+        :type clock: _Clock
+        """
+        for _ in range(4):
+            circuit_breaker.record(0.1, success=False)
+        clock.now = 30
+
+        assert circuit_breaker.is_open is False
+        assert circuit_breaker.allow_request() is True
+        assert circuit_breaker.allow_request() is False  # only one probe at once
+        circuit_breaker.record(0.1, success=False)
+        assert circuit_breaker.state == CircuitBreaker.OPEN
+        assert circuit_breaker.snapshot()["trips"] == 2
+
+        clock.now = 60
+        assert circuit_breaker.allow_request() is True
+        circuit_breaker.record(0.1, success=True)
+        assert circuit_breaker.state == CircuitBreaker.CLOSED
+        assert circuit_breaker.allow_request() is True
+
+
+class TestTransportWithCircuitBreaker:
+    @staticmethod
+    @patch("gold_digger.data_providers._transport.sleep")
+    def test_open_circuit_rejects_requests(sleep_mock, http_user_agent, circuit_breaker):
+        """
+        :type sleep_mock: unittest.mock.Mock
+        :type http_user_agent: str
+        :type circuit_breaker: gold_digger.data_providers.CircuitBreaker
+        """
+        transport = HttpTransport(http_user_agent, max_retries=10, circuit_breaker=circuit_breaker)
+        transport.session = Mock(Session)
+        transport.session.cookies = Mock()
+        transport.session.get.side_effect = ConnectionError()
+
+        with pytest.raises(CircuitOpen):
+            transport.get("http://test")
+
+        assert transport.session.get.call_count == 4
+        with pytest.raises(CircuitOpen):
+            transport.get("http://test")
+        assert transport.session.get.call_count == 4
+
+    @staticmethod
+    def test_timeout_trimmed_by_deadline_is_not_counted(http_user_agent, circuit_breaker, clock):
+        """
+        :type http_user_agent: str
+        :type circuit_breaker: gold_digger.data_providers.CircuitBreaker
+        :type clock: _Clock
+        """
+        transport = HttpTransport(http_user_agent, read_timeout=15, max_retries=0, circuit_breaker=circuit_breaker)
+        transport.session = Mock(Session)
+        transport.session.cookies = Mock()
+        transport.session.get.side_effect = Timeout()
+
+        for _ in range(4):
+            with use_deadline(Deadline(1)), pytest.raises(Timeout):
+                transport.get("http://test")
+        assert circuit_breaker.state == CircuitBreaker.CLOSED
+
+        for _ in range(4):
+            with pytest.raises(Timeout):
+                transport.get("http://test")
+        clock.now = 30
+        with use_deadline(Deadline(1)), pytest.raises(Timeout):
+            transport.get("http://test")  # probe
+
+        assert circuit_breaker.state == CircuitBreaker.HALF_OPEN
+        assert circuit_breaker.is_open is False
+
+    @staticmethod
+    def test_probe_is_finished_when_request_raises_unexpected_exception(http_user_agent, circuit_breaker, clock):
+        """
+        :type http_user_agent: str
+        :type circuit_breaker: gold_digger.data_providers.CircuitBreaker
+        :type clock: _Clock
+        """
+        for _ in range(4):
+            circuit_breaker.record(0.1, success=False)
+        clock.now = 30
+        transport = HttpTransport(http_user_agent, max_retries=0, circuit_breaker=circuit_breaker)
+        transport.session = Mock(Session)
+        transport.session.cookies = Mock()
+        transport.session.get.side_effect = ValueError("Invalid timeout")
+
+        with pytest.raises(ValueError):
+            transport.get("http://test")
+
+        assert circuit_breaker.state == CircuitBreaker.OPEN
+        clock.now = 60
+        assert circuit_breaker.is_open is False
+
+    @staticmethod
+    def test_rejected_request_is_failure_of_provider(http_user_agent, circuit_breaker, logger):
+        """
+        Provider without answer because of open circuit breaker must not be taken as provider without the rate.
+
+        :type http_user_agent: str
+        :type circuit_breaker: gold_digger.data_providers.CircuitBreaker
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        for _ in range(4):
+            circuit_breaker.record(0.1, success=False)
+        grandtrunk = GrandTrunk("USD", http_user_agent, HttpTransport(http_user_agent, circuit_breaker=circuit_breaker))
+
+        with use_request_failures(RequestFailures()) as request_failures:
+            assert grandtrunk.get_by_date(date(2019, 4, 17), "EUR", logger) is None
+
+        assert request_failures.failed is True
@@ -101,3 +101,25 @@ class TestGetByDate:
         assert fixer.request_limit_reached is False
         assert fixer._get.call_count == 2
         assert rate == Decimal("1")
+
+
+class TestSharedResponses:
+    @staticmethod
+    def test_get_all_by_date__fills_supported_currencies(fixer, response, logger):
+        """
+        Rates document of the date serves both rates and supported currencies with one HTTP request.
+
+        :type fixer: gold_digger.data_providers.Fixer
+        :type response: requests.Response
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        response.status_code = 200
+        response._content = b'{"success": true, "base": "EUR", "date": "2019-03-27", "rates": {"EUR": 1, "HUF": 319.899055, "USD": 1.125138}}'
+        fixer._transport.get = Mock(return_value=response)
+
+        day_rates = fixer.get_all_by_date(date(2019, 3, 27), {"USD", "HUF"}, logger)
+        supported_currencies = fixer.get_supported_currencies(date(2019, 3, 27), logger)
+
+        assert day_rates["HUF"] == Decimal("284.3198389886396014034013616")
+        assert supported_currencies == {"EUR", "HUF", "USD"}
+        assert fixer._transport.get.call_count == 1
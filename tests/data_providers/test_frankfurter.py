@@ -1,6 +1,9 @@
+import asyncio
 from datetime import date
 from decimal import Decimal
+from unittest.mock import Mock
 
+import httpx
 import pytest
 from requests import Response
 
@@ -230,3 +233,106 @@ class TestGetAllByDate:
             base_currency: Decimal(1),
             "CZK": Decimal(22.6509325555),
         }
+
+
+class TestAsyncGetAllByDate:
+    @staticmethod
+    def test_async_get_all_by_date__available(frankfurter, logger):
+        """
+        :type frankfurter: gold_digger.data_providers.Frankfurter
+        :type logger: gold_digger.utils.ContextLogger
+        """
+
+        async def _async_get(url, **kw):
+            """
+            :type url: str
+            :rtype: httpx.Response
+            """
+            return httpx.Response(200, content=API_RESPONSE_USD)
+
+        frankfurter._async_get = _async_get
+
+        converted_rates = asyncio.run(frankfurter.async_get_all_by_date(date(2019, 4, 15), {"CZK", "EUR"}, logger))
+        assert converted_rates == {
+            "CZK": Decimal(22.6509325555),
+            "EUR": Decimal(0.8839388314),
+        }
+
+
+class TestSharedResponses:
+    @staticmethod
+    def test_get_all_by_date__fills_supported_currencies(frankfurter, response, logger):
+        """
+        Rates response of the date is reused for supported currencies of the date, so only one HTTP request is made.
+
+        :type frankfurter: gold_digger.data_providers.Frankfurter
+        :type response: requests.Response
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        response.status_code = 200
+        response._content = API_RESPONSE_USD
+        frankfurter._transport.get = Mock(return_value=response)
+
+        assert frankfurter.get_all_by_date(date(2019, 4, 15), {"CZK"}, logger) == {"CZK": Decimal(22.6509325555)}
+        supported_currencies = frankfurter.get_supported_currencies(date(2019, 4, 15), logger)
+
+        assert {"USD", "EUR", "CZK"} <= supported_currencies
+        assert frankfurter._transport.get.call_count == 1
+
+    @staticmethod
+    def test_get_supported_currencies__response_reused_by_get_all_by_date(frankfurter, response, logger):
+        """
+        :type frankfurter: gold_digger.data_providers.Frankfurter
+        :type response: requests.Response
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        response.status_code = 200
+        response._content = API_RESPONSE_USD
+        frankfurter._transport.get = Mock(return_value=response)
+
+        assert "CZK" in frankfurter.get_supported_currencies(date(2019, 4, 15), logger)
+        assert frankfurter.get_all_by_date(date(2019, 4, 15), {"CZK"}, logger) == {"CZK": Decimal(22.6509325555)}
+
+        frankfurter._transport.get.assert_called_once_with("https://api.frankfurter.app/2019-04-15", params={"base": "USD"})
+
+    @staticmethod
+    def test_get_all_by_date__error_is_not_shared(frankfurter, response, logger):
+        """
+        :type frankfurter: gold_digger.data_providers.Frankfurter
+        :type response: requests.Response
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        response.status_code = 404
+        response._content = b'{"message": "not found"}'
+        frankfurter._transport.get = Mock(return_value=response)
+
+        assert frankfurter.get_all_by_date(date(2019, 4, 15), {"CZK"}, logger) == {}
+        assert frankfurter.get_all_by_date(date(2019, 4, 15), {"CZK"}, logger) == {}
+
+        assert frankfurter._transport.get.call_count == 2
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        ("content", "expected_rates"),
+        [
+            (b"<html>Bad gateway</html>", {}),
+            (b'{"rates": {"CZK": 22.65}}', {"CZK": Decimal(22.65)}),
+        ],
+    )
+    def test_get_all_by_date__malformed_response_is_not_shared(frankfurter, response, logger, content, expected_rates):
+        """
+        Successful response which is not JSON or lacks base currency does not fill supported currencies.
+
+        :type frankfurter: gold_digger.data_providers.Frankfurter
+        :type response: requests.Response
+        :type logger: gold_digger.utils.ContextLogger
+        :type content: bytes
+        :type expected_rates: dict[str, decimal.Decimal]
+        """
+        response.status_code = 200
+        response._content = content
+        frankfurter._transport.get = Mock(return_value=response)
+
+        assert frankfurter.get_all_by_date(date(2019, 4, 15), {"CZK"}, logger) == expected_rates
+
+        assert frankfurter._cache == {}
@@ -0,0 +1,73 @@
+from datetime import date
+from decimal import Decimal
+
+from requests import Response
+
+from gold_digger.data_providers import GrandTrunk
+from gold_digger.data_providers.grandtrunk import parse_range
+
+RANGE_RESPONSE = {
+    "CZK": "2019-04-12 22.6509\n2019-04-13 22.6510\n2019-04-15 22.6821\n",
+    "EUR": "2019-04-12 0.8839\n2019-04-15 0.8845\n",
+}
+
+
+def _get(url, **_):
+    """
+    :type url: str
+    :rtype: requests.Response
+    """
+    response = Response()
+    response.status_code = 200
+    response._content = RANGE_RESPONSE[url.rsplit("/", 1)[-1]].encode()
+    return response
+
+
+class TestParseRange:
+    @staticmethod
+    def test_parse_range():
+        days, rates, invalid_records = parse_range(RANGE_RESPONSE["CZK"])
+
+        assert days == [date(2019, 4, 12), date(2019, 4, 13), date(2019, 4, 15)]
+        assert rates == [Decimal("22.6509"), Decimal("22.6510"), Decimal("22.6821")]
+        assert invalid_records == []
+
+    @staticmethod
+    def test_parse_range__invalid_records_are_skipped():
+        days, rates, invalid_records = parse_range("2019-04-12 22.6509\n2019-04-13 N/A\n2019-04-1x 22.6\n2019-04-15 22.6821 x\n2019-04-16 22.7\n")
+
+        assert days == [date(2019, 4, 12), date(2019, 4, 16)]
+        assert rates == [Decimal("22.6509"), Decimal("22.7")]
+        assert [record for record, _ in invalid_records] == ["2019-04-13 N/A", "2019-04-1x 22.6", "2019-04-15 22.6821 x"]
+
+
+class TestGetHistorical:
+    @staticmethod
+    def test_get_historical(grandtrunk, logger):
+        """
+        :type grandtrunk: gold_digger.data_providers.GrandTrunk
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        grandtrunk._get = _get
+
+        rates = grandtrunk.get_historical(date(2019, 4, 12), {"CZK", "EUR"}, logger)
+
+        assert rates == {
+            date(2019, 4, 12): {"CZK": Decimal("22.6509"), "EUR": Decimal("0.8839")},
+            date(2019, 4, 13): {"CZK": Decimal("22.6510")},
+            date(2019, 4, 15): {"CZK": Decimal("22.6821"), "EUR": Decimal("0.8845")},
+        }
+
+    @staticmethod
+    def test_get_historical__parsed_in_process_pool(base_currency, http_user_agent, logger):
+        """
+        :type base_currency: str
+        :type http_user_agent: str
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        grandtrunk = GrandTrunk(base_currency, http_user_agent, parse_processes=2)
+        grandtrunk._get = _get
+
+        rates = grandtrunk.get_historical(date(2019, 4, 12), {"CZK", "EUR"}, logger)
+
+        assert rates[date(2019, 4, 15)] == {"CZK": Decimal("22.6821"), "EUR": Decimal("0.8845")}
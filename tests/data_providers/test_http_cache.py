@@ -0,0 +1,187 @@
+from datetime import date
+from unittest.mock import Mock
+
+import pytest
+from requests import Response, Session
+
+from gold_digger.data_providers import GrandTrunk, HttpResponseCache, HttpTransport
+
+
+def _response(status_code, content=b'{"rates": {"CZK": 22.65}}', headers=None, url="https://api.test/2019-04-15?access_key=secret"):
+    """
+    :type status_code: int
+    :type content: bytes
+    :type headers: None | dict[str, str]
+    :type url: str
+    :rtype: requests.Response
+    """
+    response = Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers.update(headers or {"Content-Type": "application/json"})
+    response.url = url
+    return response
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    """
+    :type tmp_path: pathlib.Path
+    :rtype: gold_digger.data_providers.HttpResponseCache
+    """
+    return HttpResponseCache(str(tmp_path), max_size=10_000)
+
+
+@pytest.fixture
+def transport(http_user_agent, response_cache):
+    """
+    :type http_user_agent: str
+    :type response_cache: gold_digger.data_providers.HttpResponseCache
+    :rtype: gold_digger.data_providers.HttpTransport
+    """
+    transport_ = HttpTransport(http_user_agent, response_cache=response_cache)
+    transport_.session = Mock(Session)
+    transport_.session.cookies = Mock()
+    return transport_
+
+
+class TestHttpResponseCache:
+    @staticmethod
+    def test_key__access_keys_are_stripped(response_cache):
+        """
+        :type response_cache: gold_digger.data_providers.HttpResponseCache
+        """
+        key = response_cache.key("https://api.test/2019-04-15?access_key=secret", {"symbols": "USD,CZK"})
+
+        assert key == response_cache.key("https://api.test/2019-04-15?access_key=other", {"symbols": "USD,CZK"})
+        assert key == response_cache.key("https://api.test/2019-04-15?symbols=USD%2CCZK")
+        assert key != response_cache.key("https://api.test/2019-04-15", {"symbols": "USD"})
+
+    @staticmethod
+    def test_is_immutable(response_cache):
+        """
+        :type response_cache: gold_digger.data_providers.HttpResponseCache
+        """
+        today = date(2019, 4, 20)
+
+        assert response_cache.is_immutable("https://api.test/2019-04-15", today=today) is True
+        assert response_cache.is_immutable("https://api.test/historical", {"date": "2019-04-18"}, today=today) is True
+        assert response_cache.is_immutable("https://api.test/2019-04-19", today=today) is False
+        assert response_cache.is_immutable("https://api.test/range/2019-04-01/2019-04-20/USD/CZK", today=today) is False
+        assert response_cache.is_immutable("https://api.test/latest", today=today) is False
+
+    @staticmethod
+    def test_store__error_payload_is_not_stored(response_cache):
+        """
+        :type response_cache: gold_digger.data_providers.HttpResponseCache
+        """
+        url = "https://api.test/2019-04-15"
+
+        assert response_cache.store(url, None, _response(200, b'{"success": false, "error": {"code": 104}}')) is False
+        assert response_cache.store(url, None, _response(404)) is False
+        assert response_cache.get(url) is None
+
+    @staticmethod
+    @pytest.mark.parametrize("content", [b"", b"{}", b"[]", b"false"])
+    def test_store__empty_payload_is_not_stored(response_cache, content):
+        """
+        :type response_cache: gold_digger.data_providers.HttpResponseCache
+        :type content: bytes
+        """
+        url = "https://api.test/2019-04-15"
+
+        assert response_cache.store(url, None, _response(200, content)) is False
+        assert response_cache.get(url) is None
+
+    @staticmethod
+    def test_store__plain_text_payload_is_stored(response_cache):
+        """
+        :type response_cache: gold_digger.data_providers.HttpResponseCache
+        """
+        url = "https://api.test/getrate/2019-04-15/USD/CZK"
+
+        assert response_cache.store(url, None, _response(200, b"22.65", headers={"Content-Type": "text/plain"})) is True
+
+    @staticmethod
+    def test_store__secrets_are_not_written(response_cache, tmp_path):
+        """
+        :type response_cache: gold_digger.data_providers.HttpResponseCache
+        :type tmp_path: pathlib.Path
+        """
+        assert response_cache.store("https://api.test/2019-04-15?access_key=secret", None, _response(200)) is True
+
+        assert all("secret" not in path.read_text() for path in tmp_path.iterdir())
+
+    @staticmethod
+    def test_store__least_recently_used_entries_are_evicted(tmp_path):
+        """
+        :type tmp_path: pathlib.Path
+        """
+        response_cache = HttpResponseCache(str(tmp_path), max_size=600)
+        for day in range(1, 6):
+            response_cache.store(f"https://api.test/2019-04-0{day}", None, _response(200))
+
+        assert sum(path.stat().st_size for path in tmp_path.iterdir()) <= 600
+        assert response_cache.get("https://api.test/2019-04-05") is not None
+        assert response_cache.get("https://api.test/2019-04-01") is None
+
+
+class TestTransportWithCache:
+    @staticmethod
+    def test_get__historical_response_is_served_without_request(transport):
+        """
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        transport.session.get.return_value = _response(200)
+
+        first = transport.get("https://api.test/2019-04-15?access_key=secret")
+        second = transport.get("https://api.test/2019-04-15?access_key=secret")
+
+        assert first.json() == second.json() == {"rates": {"CZK": 22.65}}
+        assert transport.session.get.call_count == 1
+        assert transport.statistics.snapshot()["cache_hits"] == 1
+
+    @staticmethod
+    def test_get__conditional_request(transport):
+        """
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        transport.session.get.side_effect = [
+            _response(200, headers={"Content-Type": "application/json", "ETag": '"v1"'}),
+            _response(304, b""),
+        ]
+
+        transport.get("https://api.test/latest")
+        response = transport.get("https://api.test/latest")
+
+        assert response.status_code == 200
+        assert response.json() == {"rates": {"CZK": 22.65}}
+        assert transport.session.get.call_args[1]["headers"] == {"If-None-Match": '"v1"'}
+
+    @staticmethod
+    def test_get__response_without_validators_is_not_cached(transport):
+        """
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        transport.session.get.return_value = _response(200)
+
+        transport.get("https://api.test/latest")
+        transport.get("https://api.test/latest")
+
+        assert transport.session.get.call_count == 2
+        assert "headers" not in transport.session.get.call_args[1]
+
+    @staticmethod
+    def test_get__response_rejected_by_provider_is_not_cached(transport, base_currency, http_user_agent):
+        """
+        :type transport: gold_digger.data_providers.HttpTransport
+        :type base_currency: str
+        :type http_user_agent: str
+        """
+        GrandTrunk(base_currency, http_user_agent, transport)
+        transport.session.get.return_value = _response(200, b"False", headers={"Content-Type": "text/plain"})
+
+        transport.get("https://api.test/getrate/2019-04-15/USD/XXX")
+        transport.get("https://api.test/getrate/2019-04-15/USD/XXX")
+
+        assert transport.session.get.call_count == 2
@@ -0,0 +1,122 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest.mock import Mock
+
+import pytest
+from requests import Response, Session
+
+from gold_digger.data_providers import ExchangeArchive, Frankfurter, GrandTrunk, RecordingTransport, ReplayTransport, StubServer
+from gold_digger.utils.clock import pin_time
+
+
+def _response(content, url):
+    """
+    :type content: bytes
+    :type url: str
+    :rtype: requests.Response
+    """
+    response = Response()
+    response.status_code = 200
+    response._content = content
+    response.headers["Content-Type"] = "application/json"
+    response.url = url
+    return response
+
+
+@pytest.fixture
+def archive():
+    """
+    :rtype: gold_digger.data_providers.ExchangeArchive
+    """
+    archive_ = ExchangeArchive()
+    archive_.record(
+        "https://api.frankfurter.app/2019-04-15",
+        {"base": "USD"},
+        _response(b'{"base": "USD", "date": "2019-04-15", "rates": {"CZK": 22.65, "EUR": 0.88}}', "https://api.frankfurter.app/2019-04-15?base=USD"),
+    )
+    return archive_
+
+
+class TestExchangeArchive:
+    @staticmethod
+    def test_recording_transport(http_user_agent):
+        """
+        :type http_user_agent: str
+        """
+        archive = ExchangeArchive()
+        transport = RecordingTransport(http_user_agent, archive)
+        transport.session = Mock(Session)
+        transport.session.cookies = Mock()
+        transport.session.get.return_value = _response(b'{"success": true}', "http://data.fixer.io/api/2019-04-15?access_key=secret")
+
+        transport.get("http://data.fixer.io/api/2019-04-15?access_key=secret", {"symbols": "USD"})
+
+        assert archive.lookup("data.fixer.io/api/2019-04-15?symbols=USD") == (200, {"Content-Type": "application/json"}, b'{"success": true}')
+
+    @staticmethod
+    def test_save_and_load(archive, tmp_path):
+        """
+        :type archive: gold_digger.data_providers.ExchangeArchive
+        :type tmp_path: pathlib.Path
+        """
+        path = str(tmp_path / "exchanges.json")
+        archive.save(path)
+
+        loaded = ExchangeArchive.load(path)
+
+        assert len(loaded) == 1
+        assert loaded.lookup("api.frankfurter.app/2019-04-15?base=USD") == archive.lookup("api.frankfurter.app/2019-04-15?base=USD")
+        assert loaded.recorded_at == archive.recorded_at
+
+
+class TestStubServer:
+    @staticmethod
+    def test_provider_is_replayed(archive, base_currency, http_user_agent, logger):
+        """
+        :type archive: gold_digger.data_providers.ExchangeArchive
+        :type base_currency: str
+        :type http_user_agent: str
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        with StubServer(archive) as server:
+            frankfurter = Frankfurter(base_currency, http_user_agent, ReplayTransport(http_user_agent, server.url))
+
+            assert frankfurter.get_all_by_date(date(2019, 4, 15), {"CZK"}, logger) == {"CZK": Decimal(22.65)}
+            assert frankfurter.get_all_by_date(date(2019, 4, 16), {"CZK"}, logger) == {}
+            assert server.requests == 2
+            assert server.misses == 1
+
+    @staticmethod
+    def test_requests_depending_on_today_are_replayed_at_time_of_recording(base_currency, http_user_agent, logger):
+        """
+        History is requested up to today, so it's replayed with the time pinned to the time of recording.
+
+        :type base_currency: str
+        :type http_user_agent: str
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        archive = ExchangeArchive(recorded_at=datetime(2019, 4, 17, 10, tzinfo=timezone.utc))
+        archive.record(
+            "http://currencies.apps.grandtrunk.net/getrange/2019-04-15/2019-04-17/USD/EUR",
+            None,
+            _response(b"2019-04-15 0.88\n2019-04-16 0.89\n", "http://currencies.apps.grandtrunk.net/getrange/2019-04-15/2019-04-17/USD/EUR"),
+        )
+
+        with StubServer(archive) as server, pin_time(archive.recorded_at):
+            grandtrunk = GrandTrunk(base_currency, http_user_agent, ReplayTransport(http_user_agent, server.url))
+            rates = grandtrunk.get_historical(date(2019, 4, 15), {"EUR"}, logger)
+
+        assert rates == {date(2019, 4, 15): {"EUR": Decimal("0.88")}, date(2019, 4, 16): {"EUR": Decimal("0.89")}}
+        assert server.misses == 0
+
+    @staticmethod
+    def test_error_injection(archive, http_user_agent):
+        """
+        :type archive: gold_digger.data_providers.ExchangeArchive
+        :type http_user_agent: str
+        """
+        with StubServer(archive, error_rate=1.0) as server:
+            transport = ReplayTransport(http_user_agent, server.url, max_retries=0)
+
+            assert transport.get("https://api.frankfurter.app/2019-04-15", {"base": "USD"}).status_code == 503
+            assert transport.statistics.snapshot()["errors"] == 1
@@ -0,0 +1,83 @@
+from datetime import date
+from unittest.mock import Mock
+
+from requests import Response
+
+from gold_digger.data_providers import GrandTrunk, SupportedCurrenciesCache
+from gold_digger.database.dao_supported_currencies import DaoSupportedCurrencies
+
+
+def _grandtrunk(base_currency, http_user_agent, dao_supported_currencies, logger):
+    """
+    :type base_currency: str
+    :type http_user_agent: str
+    :type dao_supported_currencies: gold_digger.database.DaoSupportedCurrencies
+    :type logger: gold_digger.utils.ContextLogger
+    :rtype: gold_digger.data_providers.GrandTrunk
+    """
+    response = Response()
+    response.status_code = 200
+    response._content = b"USD\nEUR\nCZK"
+
+    grandtrunk = GrandTrunk(
+        base_currency,
+        http_user_agent,
+        supported_currencies_cache=SupportedCurrenciesCache(GrandTrunk.name, dao_supported_currencies, logger, ttl=60),
+    )
+    grandtrunk._get = Mock(return_value=response)
+    return grandtrunk
+
+
+class TestSupportedCurrenciesCache:
+    @staticmethod
+    def test_get_supported_currencies__fetched_currencies_are_persisted(base_currency, http_user_agent, logger):
+        """
+        :type base_currency: str
+        :type http_user_agent: str
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_mock = Mock(DaoSupportedCurrencies)
+        dao_mock.get_supported_currencies.return_value = None
+        grandtrunk = _grandtrunk(base_currency, http_user_agent, dao_mock, logger)
+
+        assert grandtrunk.get_supported_currencies(date(2019, 4, 15), logger) == {"USD", "EUR", "CZK"}
+        assert grandtrunk.get_supported_currencies(date(2019, 4, 15), logger) == {"USD", "EUR", "CZK"}
+
+        assert grandtrunk._get.call_count == 1
+        assert dao_mock.get_supported_currencies.call_count == 1
+        dao_mock.save_supported_currencies.assert_called_once_with(GrandTrunk.name, date(2019, 4, 15), {"USD", "EUR", "CZK"})
+
+    @staticmethod
+    def test_get_supported_currencies__persisted_currencies_are_not_fetched(base_currency, http_user_agent, logger):
+        """
+        Provider is not requested after restart of the application if the currencies are in database.
+
+        :type base_currency: str
+        :type http_user_agent: str
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_mock = Mock(DaoSupportedCurrencies)
+        dao_mock.get_supported_currencies.return_value = {"USD", "EUR"}
+        grandtrunk = _grandtrunk(base_currency, http_user_agent, dao_mock, logger)
+
+        assert grandtrunk.get_supported_currencies(date(2019, 4, 15), logger) == {"USD", "EUR"}
+        assert grandtrunk.get_supported_currencies(date(2019, 4, 15), logger) == {"USD", "EUR"}
+
+        assert grandtrunk._get.call_count == 0
+        assert dao_mock.get_supported_currencies.call_count == 1
+        assert dao_mock.save_supported_currencies.call_count == 0
+
+    @staticmethod
+    def test_get_supported_currencies__database_failure(base_currency, http_user_agent, logger):
+        """
+        :type base_currency: str
+        :type http_user_agent: str
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_mock = Mock(DaoSupportedCurrencies)
+        dao_mock.get_supported_currencies.side_effect = Exception("Database is down")
+        dao_mock.save_supported_currencies.side_effect = Exception("Database is down")
+        grandtrunk = _grandtrunk(base_currency, http_user_agent, dao_mock, logger)
+
+        assert grandtrunk.get_supported_currencies(date(2019, 4, 15), logger) == {"USD", "EUR", "CZK"}
+        assert grandtrunk._get.call_count == 1
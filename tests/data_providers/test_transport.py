@@ -0,0 +1,149 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from requests import ConnectionError, Response, Session, TooManyRedirects
+
+from gold_digger.data_providers import CircuitBreaker, DeadlineExceeded, HttpTransport
+from gold_digger.utils import Deadline, use_deadline
+
+
+def _response(status_code):
+    """
+    :type status_code: int
+    :rtype: requests.Response
+    """
+    response = Response()
+    response.status_code = status_code
+    return response
+
+
+@pytest.fixture
+def transport(http_user_agent):
+    """
+    :type http_user_agent: str
+    :rtype: gold_digger.data_providers.HttpTransport
+    """
+    transport_ = HttpTransport(http_user_agent, connect_timeout=1, read_timeout=2, max_retries=2)
+    transport_.session = Mock(Session)
+    transport_.session.cookies = Mock()
+    return transport_
+
+
+class TestGet:
+    @staticmethod
+    @patch("gold_digger.data_providers._transport.sleep")
+    def test_get__retry_on_server_error(sleep_mock, transport):
+        """
+        :type sleep_mock: unittest.mock.Mock
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        transport.session.get.side_effect = [_response(503), ConnectionError(), _response(200)]
+
+        response = transport.get("http://test")
+
+        assert response.status_code == 200
+        assert transport.session.get.call_args[1]["timeout"] == (1, 2)
+        assert sleep_mock.call_count == 2
+        assert transport.statistics.snapshot()["requests"] == 3
+        assert transport.statistics.snapshot()["retries"] == 2
+        assert transport.statistics.snapshot()["errors"] == 2
+
+    @staticmethod
+    @patch("gold_digger.data_providers._transport.sleep")
+    def test_get__retries_are_bounded(sleep_mock, transport):
+        """
+        :type sleep_mock: unittest.mock.Mock
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        transport.session.get.side_effect = ConnectionError()
+
+        with pytest.raises(ConnectionError):
+            transport.get("http://test")
+
+        assert transport.session.get.call_count == 3
+        assert sleep_mock.call_count == 2
+
+    @staticmethod
+    @patch("gold_digger.data_providers._transport.sleep")
+    def test_get__no_retry_on_client_error(sleep_mock, transport):
+        """
+        :type sleep_mock: unittest.mock.Mock
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        transport.session.get.side_effect = [_response(404)]
+
+        assert transport.get("http://test").status_code == 404
+        assert sleep_mock.call_count == 0
+
+        transport.session.get.side_effect = TooManyRedirects()
+
+        with pytest.raises(TooManyRedirects):
+            transport.get("http://test")
+        assert sleep_mock.call_count == 0
+
+    @staticmethod
+    def test_get__too_many_requests_is_failure_of_circuit_breaker(transport):
+        """
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        transport.circuit_breaker = Mock(CircuitBreaker)
+        transport.circuit_breaker.allow_request.return_value = True
+        transport.session.get.side_effect = [_response(429), _response(404)]
+
+        assert transport.get("http://test").status_code == 429
+        assert transport.get("http://test").status_code == 404
+
+        assert [c.args[1] for c in transport.circuit_breaker.record.call_args_list] == [False, True]
+
+
+class TestBackoffTime:
+    @staticmethod
+    def test_backoff_time__is_bounded(http_user_agent):
+        """
+        :type http_user_agent: str
+        """
+        transport = HttpTransport(http_user_agent, backoff_factor=1, backoff_max=3)
+
+        assert all(0 <= transport.backoff_time(attempt) <= 3 for attempt in range(10))
+
+
+class TestGetWithDeadline:
+    @staticmethod
+    def test_get__timeouts_are_trimmed_to_deadline(transport):
+        """
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        transport.session.get.side_effect = [_response(200)]
+
+        with use_deadline(Deadline(0.5)):
+            transport.get("http://test")
+
+        connect_timeout, read_timeout = transport.session.get.call_args[1]["timeout"]
+        assert 0 < connect_timeout < read_timeout
+        assert connect_timeout + read_timeout <= 0.5
+
+    @staticmethod
+    def test_get__expired_deadline(transport):
+        """
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        with use_deadline(Deadline(0)), pytest.raises(DeadlineExceeded):
+            transport.get("http://test")
+
+        assert transport.session.get.call_count == 0
+
+    @staticmethod
+    @patch("gold_digger.data_providers._transport.sleep")
+    def test_get__no_retry_when_backoff_does_not_fit_deadline(sleep_mock, transport):
+        """
+        :type sleep_mock: unittest.mock.Mock
+        :type transport: gold_digger.data_providers.HttpTransport
+        """
+        transport.backoff_factor = 10
+        transport.session.get.side_effect = [_response(503), _response(200)]
+
+        with use_deadline(Deadline(1)):
+            response = transport.get("http://test")
+
+        assert response.status_code == 503
+        assert sleep_mock.call_count == 0
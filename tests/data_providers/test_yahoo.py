@@ -1,5 +1,6 @@
 from datetime import date
 from decimal import Decimal
+from threading import Lock
 
 from requests import Response
 
@@ -205,3 +206,41 @@ class TestGetAllByDate:
             "EUR": Decimal("0.8884"),
             "CZK": Decimal("25.959"),
         }
+
+    @staticmethod
+    def test_get_all_by_date__failed_batch_is_not_retried(yahoo, logger):
+        """
+        Failed batch is not requested again (transient failures are retried by transport), rates of other batches are kept.
+
+        :type yahoo: gold_digger.data_providers.Yahoo
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        sample = Response()
+        sample.status_code = 200
+        sample._content = YAHOO_RESPONSE
+        requested_urls = []
+        failed_urls = set()
+        lock = Lock()
+
+        def _get(url, **kw):
+            """
+            :type url: str
+            :rtype: None | requests.Response
+            """
+            with lock:
+                requested_urls.append(url)
+                if not failed_urls:
+                    failed_urls.add(url)
+                    return None
+            return sample
+
+        yahoo._get = _get
+        yahoo.SYMBOLS_BATCH_SIZE = 2
+
+        rates = yahoo.get_all_by_date(date.today(), {"EUR", "CZK"}, logger)
+
+        batches_count = -(-len(yahoo.get_supported_currencies()) // yahoo.SYMBOLS_BATCH_SIZE)
+        assert batches_count > 1
+        assert rates == {"EUR": Decimal("0.8884"), "CZK": Decimal("25.959")}
+        assert len(requested_urls) == batches_count
+        assert len(set(requested_urls)) == batches_count
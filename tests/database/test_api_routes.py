@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import Mock
+
+import falcon
+import pytest
+from falcon import testing
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from gold_digger import settings
+from gold_digger.api_server.api_server import DateRateResource, IntervalsRateResource, RangeRateResource
+from gold_digger.api_server.helpers import ContextMiddleware
+from gold_digger.data_providers import Frankfurter, GrandTrunk, ProviderStatistics
+from gold_digger.database.dao_exchange_rate import DaoExchangeRate
+from gold_digger.database.dao_provider import DaoProvider
+from gold_digger.database.dao_provider_miss import DaoProviderMiss
+from gold_digger.managers.exchange_rate_manager import ExchangeRateManager
+from gold_digger.utils.metrics import instrument_engine
+
+
+def _data_provider_mock(provider_class, rates):
+    """
+    :type provider_class: type
+    :type rates: dict[str, decimal.Decimal]
+    :return: Mock of gold_digger.data_providers.Provider
+    """
+    mock = Mock(provider_class)
+    mock.name = provider_class.name
+    mock.calendar = provider_class.calendar
+    mock.capabilities = provider_class.capabilities
+    mock.circuit_breaker = None
+    mock.statistics = ProviderStatistics()
+    mock.get_all_by_date.return_value = rates
+    mock.get_by_date.side_effect = lambda _, currency, __: rates.get(currency)
+    mock.get_supported_currencies.return_value = set(rates)
+    mock.has_request_limit = False
+    return mock
+
+
+@pytest.fixture
+def client(db_session, db_connection_string, monkeypatch):
+    """
+    API with real routes and exchange rate manager on test database, data providers are mocked.
+    Query budgets of the routes are strict, i.e. request exceeding its budget fails.
+
+    :type db_session: sqlalchemy.orm.Session
+    :type db_connection_string: str
+    :type monkeypatch: _pytest.monkeypatch.MonkeyPatch
+    :rtype: falcon.testing.TestClient
+    """
+    monkeypatch.setattr(settings, "API_QUERY_BUDGET_STRICT", 1)
+    engine = create_engine(db_connection_string)
+    instrument_engine(engine)
+    db_session_factory = sessionmaker(engine)
+    api_db_session = db_session_factory()
+
+    container = Mock()
+    container.db_session = api_db_session
+    container.exchange_rate_manager = ExchangeRateManager(
+        DaoExchangeRate(api_db_session, db_session_factory),
+        DaoProvider(api_db_session),
+        [
+            _data_provider_mock(Frankfurter, {"USD": Decimal(1), "EUR": Decimal("0.89"), "CZK": Decimal("22.5")}),
+            _data_provider_mock(GrandTrunk, {"USD": Decimal(1), "EUR": Decimal("0.90"), "CZK": Decimal("22.7")}),
+        ],
+        "USD",
+        {"USD", "EUR", "CZK"},
+        dao_provider_miss=DaoProviderMiss(api_db_session, ttl=60, ttl_max=150),
+    )
+
+    app = falcon.App(middleware=[ContextMiddleware()])
+    app.add_route("/intervals", IntervalsRateResource(container), suffix="intervals_rate")
+    app.add_route("/rate", DateRateResource(container), suffix="date_rate")
+    app.add_route("/range", RangeRateResource(container), suffix="range_rate")
+    yield testing.TestClient(app)
+
+    api_db_session.close()
+    engine.dispose()
+
+
+class TestQueryBudgetsOfRoutes:
+    @staticmethod
+    @pytest.mark.slow
+    def test_rate(client):
+        """
+        Missing rates are requested from providers and stored, stored rates are loaded on the next request.
+
+        :type client: falcon.testing.TestClient
+        """
+        for _ in range(2):
+            response = client.simulate_get("/rate", params={"from": "EUR", "to": "CZK", "date": "2019-04-17"})
+
+            assert response.status == falcon.HTTP_200
+            assert Decimal(response.json["exchange_rate"]) > 25
+
+    @staticmethod
+    @pytest.mark.slow
+    def test_range(client):
+        """
+        :type client: falcon.testing.TestClient
+        """
+        end_date = date(2019, 4, 17)
+        for day in range(5):
+            assert client.simulate_get("/rate", params={"from": "EUR", "to": "CZK", "date": str(end_date - timedelta(days=day))}).status == falcon.HTTP_200
+
+        response = client.simulate_get("/range", params={"from": "EUR", "to": "CZK", "start_date": "2019-04-13", "end_date": str(end_date)})
+
+        assert response.status == falcon.HTTP_200
+        assert Decimal(response.json["exchange_rate"]) > 25
+
+    @staticmethod
+    @pytest.mark.slow
+    def test_intervals(client):
+        """
+        :type client: falcon.testing.TestClient
+        """
+        response = client.simulate_get("/intervals", params={"from": "EUR", "to": "CZK", "date": "2019-04-17"})
+
+        assert response.status == falcon.HTTP_200
+        assert response.json["exchange_rates"]
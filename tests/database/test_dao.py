@@ -1,10 +1,16 @@
-from datetime import date
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
 import pytest
+from sqlalchemy.orm import sessionmaker
 
+from gold_digger.database.dao_advisory_lock import DaoAdvisoryLock
 from gold_digger.database.dao_exchange_rate import DaoExchangeRate
+from gold_digger.database.dao_ingestion_job import DaoIngestionJob
 from gold_digger.database.dao_provider import DaoProvider
+from gold_digger.database.dao_provider_miss import DaoProviderMiss
+from gold_digger.database.dao_supported_currencies import DaoSupportedCurrencies
+from gold_digger.database.db_model import IngestionJob
 
 
 @pytest.fixture
@@ -25,6 +31,15 @@ def dao_provider(db_session):
     return DaoProvider(db_session)
 
 
+@pytest.fixture
+def dao_provider_miss(db_session):
+    """
+    :type db_session: sqlalchemy.orm.Session
+    :rtype: gold_digger.database.DaoProviderMiss
+    """
+    return DaoProviderMiss(db_session, ttl=60, ttl_max=150)
+
+
 class TestInsertNewRate:
     @staticmethod
     @pytest.mark.slow
@@ -70,6 +85,75 @@ class TestInsertExchangeRateToDb:
         assert len(dao_exchange_rate.get_rates_by_date_currency(date.today(), "USD")) == 2
 
 
+class TestGetProviderByName:
+    @staticmethod
+    @pytest.mark.slow
+    def test_get_provider_by_name(dao_provider):
+        """
+        Provider which is not in database is not created.
+
+        :type dao_provider: gold_digger.database.DaoProvider
+        """
+        assert dao_provider.get_provider_by_name("test1") is None
+        assert dao_provider.get_provider_by_name("test1") is None
+
+        provider = dao_provider.get_or_create_provider_by_name("test1")
+
+        assert dao_provider.get_provider_by_name("test1").id == provider.id
+
+
+class TestInsertNewRates:
+    @staticmethod
+    @pytest.mark.slow
+    def test_insert_new_rates(dao_exchange_rate, dao_provider):
+        """
+        Rates already in database are kept and returned together with the new ones.
+
+        :type dao_exchange_rate: gold_digger.database.DaoExchangeRate
+        :type dao_provider: gold_digger.database.DaoProvider
+        """
+        provider1 = dao_provider.get_or_create_provider_by_name("test1")
+        provider2 = dao_provider.get_or_create_provider_by_name("test2")
+        dao_exchange_rate.insert_new_rate(date.today(), provider1, "EUR", Decimal(1))
+
+        records = [
+            {"date": date.today(), "currency": "EUR", "provider_id": provider1.id, "rate": Decimal(2)},
+            {"date": date.today(), "currency": "EUR", "provider_id": provider2.id, "rate": Decimal(3)},
+            {"date": date.today(), "currency": "CZK", "provider_id": provider2.id, "rate": Decimal(4)},
+        ]
+
+        stored_rates = dao_exchange_rate.insert_new_rates(records)
+
+        assert sorted((r.provider_id, r.currency, r.rate) for r in stored_rates) == [
+            (provider1.id, "EUR", Decimal(1)),
+            (provider2.id, "CZK", Decimal(4)),
+            (provider2.id, "EUR", Decimal(3)),
+        ]
+
+    @staticmethod
+    @pytest.mark.slow
+    def test_store_new_rates(db_session, dao_provider):
+        """
+        Rates are stored in own session, rates already in database are kept.
+
+        :type db_session: sqlalchemy.orm.Session
+        :type dao_provider: gold_digger.database.DaoProvider
+        """
+        dao_exchange_rate = DaoExchangeRate(db_session, sessionmaker(db_session.bind.engine))
+        provider = dao_provider.get_or_create_provider_by_name("test1")
+        dao_exchange_rate.insert_new_rate(date.today(), provider, "EUR", Decimal(1))
+
+        records = [
+            {"date": date.today(), "currency": "EUR", "provider_id": provider.id, "rate": Decimal(2)},
+            {"date": date.today(), "currency": "CZK", "provider_id": provider.id, "rate": Decimal(4)},
+        ]
+
+        assert dao_exchange_rate.store_new_rates(records) == 1
+        assert dao_exchange_rate.store_new_rates([]) == 0
+        assert sorted((r.currency, r.rate) for r in dao_exchange_rate.get_rates_by_date_currency(date.today(), "EUR")) == [("EUR", Decimal(1))]
+        assert sorted((r.currency, r.rate) for r in dao_exchange_rate.get_rates_by_date_currency(date.today(), "CZK")) == [("CZK", Decimal(4))]
+
+
 class TestGetSumOfRatesInPeriod:
     @staticmethod
     @pytest.mark.slow
@@ -91,3 +175,142 @@ class TestGetSumOfRatesInPeriod:
         records = dao_exchange_rate.get_sum_of_rates_in_period(start_date, end_date, "USD")
 
         assert records == [(provider1.id, 3, 6)]
+
+
+class TestProviderMisses:
+    @staticmethod
+    @pytest.mark.slow
+    def test_record_misses__skip_period_is_doubled_up_to_maximum(dao_provider_miss, dao_provider):
+        """
+        :type dao_provider_miss: gold_digger.database.DaoProviderMiss
+        :type dao_provider: gold_digger.database.DaoProvider
+        """
+        now = datetime(2016, 1, 10, 12)
+        provider = dao_provider.get_or_create_provider_by_name("test1")
+        records = [{"date": date(2016, 1, 1), "provider_id": provider.id, "currency": "EUR"}]
+
+        assert dao_provider_miss.get_active_misses(date(2016, 1, 1), ["EUR", "CZK"], now) == set()
+
+        dao_provider_miss.record_misses(records, now)
+        assert dao_provider_miss.get_active_misses(date(2016, 1, 1), ["EUR", "CZK"], now + timedelta(seconds=59)) == {("test1", "EUR")}
+        assert dao_provider_miss.get_active_misses(date(2016, 1, 1), ["EUR", "CZK"], now + timedelta(seconds=60)) == set()
+
+        dao_provider_miss.record_misses(records, now)
+        assert dao_provider_miss.get_active_misses(date(2016, 1, 1), ["EUR"], now + timedelta(seconds=119)) == {("test1", "EUR")}
+        assert dao_provider_miss.get_active_misses(date(2016, 1, 1), ["EUR"], now + timedelta(seconds=120)) == set()
+
+        dao_provider_miss.record_misses(records, now)
+        assert dao_provider_miss.get_active_misses(date(2016, 1, 1), ["EUR"], now + timedelta(seconds=149)) == {("test1", "EUR")}
+        assert dao_provider_miss.get_active_misses(date(2016, 1, 1), ["EUR"], now + timedelta(seconds=150)) == set()
+
+        assert dao_provider_miss.delete_stale_misses(now + timedelta(seconds=300)) == 0
+        assert dao_provider_miss.delete_stale_misses(now + timedelta(seconds=301)) == 1
+
+
+class TestSupportedCurrencies:
+    @staticmethod
+    @pytest.mark.slow
+    def test_save_supported_currencies__intervals(db_session):
+        """
+        :type db_session: sqlalchemy.orm.Session
+        """
+        dao_supported_currencies = DaoSupportedCurrencies(sessionmaker(db_session.bind))
+
+        assert dao_supported_currencies.get_supported_currencies("test1", date(2019, 1, 1)) is None
+
+        dao_supported_currencies.save_supported_currencies("test1", date(2019, 1, 1), {"USD", "EUR"})
+        dao_supported_currencies.save_supported_currencies("test1", date(2019, 1, 10), {"USD", "EUR"})
+        dao_supported_currencies.save_supported_currencies("test1", date(2019, 1, 20), {"USD", "EUR", "CZK"})
+
+        assert dao_supported_currencies.get_supported_currencies("test1", date(2018, 12, 31)) is None
+        assert dao_supported_currencies.get_supported_currencies("test1", date(2019, 1, 5)) == {"USD", "EUR"}
+        assert dao_supported_currencies.get_supported_currencies("test1", date(2019, 1, 15)) is None
+        assert dao_supported_currencies.get_supported_currencies("test1", date(2019, 1, 20)) == {"USD", "EUR", "CZK"}
+        assert dao_supported_currencies.get_supported_currencies("test2", date(2019, 1, 5)) is None
+
+        dao_supported_currencies.save_supported_currencies("test1", date(2019, 1, 5), {"USD"})
+
+        assert dao_supported_currencies.get_supported_currencies("test1", date(2019, 1, 4)) == {"USD", "EUR"}
+        assert dao_supported_currencies.get_supported_currencies("test1", date(2019, 1, 5)) == {"USD"}
+        assert dao_supported_currencies.get_supported_currencies("test1", date(2019, 1, 6)) is None
+
+
+class TestAdvisoryLock:
+    @staticmethod
+    @pytest.mark.slow
+    def test_try_lock(db_connection):
+        """
+        :type db_connection: sqlalchemy.engine.Connection
+        """
+        dao_advisory_lock = DaoAdvisoryLock(db_connection.engine)
+
+        with dao_advisory_lock.try_lock("fixer.io", date(2019, 4, 17)) as locked:
+            with dao_advisory_lock.try_lock("fixer.io", date(2019, 4, 17)) as locked_again:
+                with dao_advisory_lock.try_lock("fixer.io", date(2019, 4, 18)) as other_date_locked:
+                    assert (locked, locked_again, other_date_locked) == (True, False, True)
+
+        with dao_advisory_lock.try_lock("fixer.io", date(2019, 4, 17)) as locked:
+            assert locked
+
+
+class TestIngestionJob:
+    @staticmethod
+    @pytest.mark.slow
+    def test_claim__locked_job_is_skipped(db_session):
+        """
+        :type db_session: sqlalchemy.orm.Session
+        """
+        db_session_factory = sessionmaker(db_session.bind.engine)
+        dao_ingestion_job = DaoIngestionJob(db_session_factory, visibility_timeout=60, max_attempts=2, retry_delay=10)
+        now = datetime(2019, 4, 17, 12)
+
+        job_ids = dao_ingestion_job.enqueue("fixer.io", date(2019, 1, 1), date(2019, 2, 15), now, chunk_days=31)
+
+        with db_session_factory() as db_session, db_session.begin():
+            db_session.query(IngestionJob).filter(IngestionJob.id == job_ids[0]).with_for_update().one()  # e.g. claimed by another worker right now
+            job = dao_ingestion_job.claim(now)
+
+        assert (job.id, job.start_date, job.end_date, job.status, job.attempts) == (job_ids[1], date(2019, 2, 1), date(2019, 2, 15), "running", 1)
+        assert dao_ingestion_job.claim(now).id == job_ids[0]
+        assert dao_ingestion_job.claim(now) is None
+
+    @staticmethod
+    @pytest.mark.slow
+    def test_claim__job_is_retried_and_taken_again_after_visibility_timeout(db_session):
+        """
+        :type db_session: sqlalchemy.orm.Session
+        """
+        dao_ingestion_job = DaoIngestionJob(sessionmaker(db_session.bind.engine), visibility_timeout=60, max_attempts=2, retry_delay=10)
+        now = datetime(2019, 4, 17, 12)
+        dao_ingestion_job.enqueue("fixer.io", date(2019, 1, 1), date(2019, 1, 10), now)
+
+        job = dao_ingestion_job.claim(now)
+        assert dao_ingestion_job.fail(job, "Rates of 1 days are missing", now) is True
+        assert dao_ingestion_job.claim(now + timedelta(seconds=9)) is None
+
+        job = dao_ingestion_job.claim(now + timedelta(seconds=10))
+        assert job.attempts == 2
+        assert dao_ingestion_job.claim(now + timedelta(seconds=69)) is None
+
+        # worker of the last attempt crashed
+        assert dao_ingestion_job.claim(now + timedelta(seconds=70)) is None
+        assert dao_ingestion_job.complete(job, now + timedelta(seconds=71)) is False
+        assert dao_ingestion_job.count_by_status() == {"failed": 1}
+
+    @staticmethod
+    @pytest.mark.slow
+    def test_complete__stale_attempt_is_ignored(db_session):
+        """
+        :type db_session: sqlalchemy.orm.Session
+        """
+        dao_ingestion_job = DaoIngestionJob(sessionmaker(db_session.bind.engine), visibility_timeout=60, max_attempts=3, retry_delay=10)
+        now = datetime(2019, 4, 17, 12)
+        dao_ingestion_job.enqueue("fixer.io", date(2019, 1, 1), date(2019, 1, 10), now)
+
+        stale_job = dao_ingestion_job.claim(now)
+        job = dao_ingestion_job.claim(now + timedelta(seconds=60))
+
+        assert job.id == stale_job.id
+        assert dao_ingestion_job.fail(stale_job, "Timeout", now + timedelta(seconds=61)) is False
+        assert dao_ingestion_job.complete(job, now + timedelta(seconds=62)) is True
+        assert dao_ingestion_job.count_by_status() == {"done": 1}
@@ -0,0 +1,23 @@
+import falcon
+import pytest
+from falcon.testing import create_req
+
+from gold_digger.api_server.helpers import ContextMiddleware
+
+
+class TestContextMiddleware:
+    @staticmethod
+    def test_deadline_of_request():
+        req = create_req(query_string="timeout=2.5")
+
+        ContextMiddleware().process_resource(req)
+
+        assert req.context.deadline.timeout == 2.5
+
+    @staticmethod
+    def test_too_short_timeout_is_rejected():
+        """
+        Timeouts of providers trimmed to a tiny budget would only fail, so clients can't request it.
+        """
+        with pytest.raises(falcon.HTTPInvalidParam):
+            ContextMiddleware().process_resource(create_req(query_string="timeout=0.05"))
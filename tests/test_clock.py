@@ -0,0 +1,17 @@
+from datetime import date, datetime, timedelta, timezone
+
+from gold_digger.utils import clock
+from gold_digger.utils.clock import pin_time
+
+
+class TestClock:
+    @staticmethod
+    def test_pinned_time():
+        moment = datetime(2019, 4, 17, 23, 30, tzinfo=timezone(timedelta(hours=2)))
+
+        with pin_time(moment):
+            assert clock.today() == date(2019, 4, 17)
+            assert clock.now() == moment
+            assert clock.now().tzinfo == timezone.utc
+
+        assert clock.today() == date.today()
@@ -1,14 +1,22 @@
+from contextlib import nullcontext
 from datetime import date, timedelta
 from decimal import Decimal
+from threading import Barrier, Event, Thread
+from time import sleep
 from unittest.mock import Mock
 
 import pytest
+from cachetools.keys import hashkey
+from requests import Timeout
 
-from gold_digger.data_providers import CurrencyLayer, Fixer, GrandTrunk
+from gold_digger.data_providers import CircuitBreaker, CurrencyLayer, Fixer, Frankfurter, GrandTrunk, HttpTransport, ProviderStatistics
+from gold_digger.database.dao_advisory_lock import DaoAdvisoryLock
 from gold_digger.database.dao_exchange_rate import DaoExchangeRate
 from gold_digger.database.dao_provider import DaoProvider
+from gold_digger.database.dao_provider_miss import DaoProviderMiss
 from gold_digger.database.db_model import ExchangeRate, Provider
 from gold_digger.managers.exchange_rate_manager import ExchangeRateManager
+from gold_digger.utils import Deadline, QueryStatistics, use_query_statistics
 
 
 @pytest.fixture
@@ -34,9 +42,10 @@ def dao_provider_mock():
         return {
             CurrencyLayer.name: Provider(id=1, name=CurrencyLayer.name),
             GrandTrunk.name: Provider(id=2, name=GrandTrunk.name),
-        }.get(name)
+        }.get(name, Provider(id=3, name=name))
 
     mock.get_or_create_provider_by_name.side_effect = _get_or_create_provider_by_name
+    mock.get_provider_by_name.side_effect = lambda name: {CurrencyLayer.name: Provider(id=1, name=CurrencyLayer.name)}.get(name)
     return mock
 
 
@@ -48,6 +57,10 @@ def currency_layer_mock(currencies):
     """
     mock = Mock(CurrencyLayer)
     mock.name = CurrencyLayer.name
+    mock.calendar = CurrencyLayer.calendar
+    mock.capabilities = CurrencyLayer.capabilities
+    mock.circuit_breaker = None
+    mock.statistics = ProviderStatistics()
     mock.get_all_by_date.return_value = {"EUR": Decimal(0.77), "USD": Decimal(1)}
     mock.get_supported_currencies.return_value = currencies
     mock.has_request_limit = True
@@ -62,6 +75,10 @@ def fixer_mock(currencies):
     """
     mock = Mock(Fixer)
     mock.name = Fixer.name
+    mock.calendar = Fixer.calendar
+    mock.capabilities = Fixer.capabilities
+    mock.circuit_breaker = None
+    mock.statistics = ProviderStatistics()
     mock.get_supported_currencies.return_value = currencies
     mock.has_request_limit = True
     return mock
@@ -75,12 +92,34 @@ def grandtrunk_mock(currencies):
     """
     mock = Mock(GrandTrunk)
     mock.name = GrandTrunk.name
+    mock.calendar = GrandTrunk.calendar
+    mock.capabilities = GrandTrunk.capabilities
+    mock.circuit_breaker = None
+    mock.statistics = ProviderStatistics()
     mock.get_all_by_date.return_value = {"EUR": Decimal(0.75), "USD": Decimal(1)}
     mock.get_supported_currencies.return_value = currencies
     mock.has_request_limit = False
     return mock
 
 
+@pytest.fixture
+def frankfurter_mock(currencies):
+    """
+    :type currencies: set[str]
+    :return: Mock of gold_digger.data_providers.Frankfurter
+    """
+    mock = Mock(Frankfurter)
+    mock.name = Frankfurter.name
+    mock.calendar = Frankfurter.calendar
+    mock.capabilities = Frankfurter.capabilities
+    mock.circuit_breaker = None
+    mock.statistics = ProviderStatistics()
+    mock.get_all_by_date.return_value = {"EUR": Decimal(0.89), "USD": Decimal(1)}
+    mock.get_supported_currencies.return_value = currencies
+    mock.has_request_limit = False
+    return mock
+
+
 class TestUpdateAllRatesByDate:
     @staticmethod
     def test_update_all_rates_by_date(dao_exchange_rate_mock, dao_provider_mock, currency_layer_mock, base_currency, currencies, logger):
@@ -95,6 +134,7 @@ class TestUpdateAllRatesByDate:
         :type logger: gold_digger.utils.ContextLogger
         """
         _date = date(2016, 2, 17)
+        dao_exchange_rate_mock.has_rates_by_date_provider.return_value = False
 
         exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [currency_layer_mock], base_currency, currencies)
         exchange_rate_manager.update_all_rates_by_date(_date, [currency_layer_mock], logger)
@@ -108,6 +148,190 @@ class TestUpdateAllRatesByDate:
             {"provider_id": 1, "date": _date, "currency": "USD", "rate": Decimal(1)},
         ]
 
+    @staticmethod
+    def test_update_all_rates_by_date__stored_rates_of_provider_with_request_limit(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        currency_layer_mock,
+        frankfurter_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Rates of the date are already stored (e.g. by runner which held the lock before), provider with request limit is not requested again.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param currency_layer_mock: Mock of gold_digger.data_providers.CurrencyLayer
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_exchange_rate_mock.has_rates_by_date_provider.return_value = True
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [currency_layer_mock, frankfurter_mock],
+            base_currency,
+            currencies,
+        )
+        exchange_rate_manager.update_all_rates_by_date(date(2019, 4, 17), [currency_layer_mock, frankfurter_mock], logger)
+
+        assert dao_exchange_rate_mock.has_rates_by_date_provider.call_args_list[0][0] == (date(2019, 4, 17), 1)
+        assert currency_layer_mock.get_all_by_date.call_count == 0
+        assert frankfurter_mock.get_all_by_date.call_count == 1
+
+    @staticmethod
+    def test_update_all_rates_by_date__provider_locked_by_another_runner(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        currency_layer_mock,
+        frankfurter_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param currency_layer_mock: Mock of gold_digger.data_providers.CurrencyLayer
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_advisory_lock_mock = Mock(DaoAdvisoryLock)
+        dao_advisory_lock_mock.try_lock.side_effect = lambda provider_name, _: nullcontext(provider_name != currency_layer_mock.name)
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [currency_layer_mock, frankfurter_mock],
+            base_currency,
+            currencies,
+            dao_advisory_lock=dao_advisory_lock_mock,
+        )
+        exchange_rate_manager.update_all_rates_by_date(date(2019, 4, 17), [currency_layer_mock, frankfurter_mock], logger)
+
+        assert currency_layer_mock.get_all_by_date.call_count == 0
+        assert frankfurter_mock.get_all_by_date.call_count == 1
+
+    @staticmethod
+    def test_update_all_rates_by_date__provider_without_publication(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        frankfurter_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Rates of the latest publication are updated if the provider has not published rates of the date, unless they are already in database.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_provider_mock.get_or_create_provider_by_name.side_effect = lambda name: Provider(id=3, name=name)
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [frankfurter_mock], base_currency, currencies)
+
+        dao_exchange_rate_mock.has_rates_by_date_provider.return_value = False
+        exchange_rate_manager.update_all_rates_by_date(date(2019, 4, 20), [frankfurter_mock], logger)  # Saturday
+
+        (actual_records, _), _ = dao_exchange_rate_mock.insert_exchange_rate_to_db.call_args
+        assert frankfurter_mock.get_all_by_date.call_args[0][0] == date(2019, 4, 18)  # Good Friday is holiday
+        assert {r["date"] for r in actual_records} == {date(2019, 4, 18)}
+
+        dao_exchange_rate_mock.has_rates_by_date_provider.return_value = True
+        exchange_rate_manager.update_all_rates_by_date(date(2019, 4, 21), [frankfurter_mock], logger)  # Sunday
+
+        assert dao_exchange_rate_mock.has_rates_by_date_provider.call_args[0] == (date(2019, 4, 18), 3)
+        assert frankfurter_mock.get_all_by_date.call_count == 1
+
+
+class TestUpdateRatesInRange:
+    @staticmethod
+    def test_update_rates_in_range__stored_days_are_skipped(dao_exchange_rate_mock, dao_provider_mock, frankfurter_mock, base_currency, currencies, logger):
+        """
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_provider_mock.get_or_create_provider_by_name.side_effect = lambda name: Provider(id=3, name=name)
+        dao_exchange_rate_mock.has_rates_by_date_provider.side_effect = lambda day, _: day == date(2019, 4, 8)
+        frankfurter_mock.get_all_by_date.side_effect = lambda day, *_: {} if day == date(2019, 4, 10) else {"EUR": Decimal(0.89)}
+
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [frankfurter_mock], base_currency, currencies)
+        failed_days = exchange_rate_manager.update_rates_in_range(frankfurter_mock, date(2019, 4, 8), date(2019, 4, 14), logger)
+
+        assert failed_days == [date(2019, 4, 10)]
+        assert [call[0][0] for call in frankfurter_mock.get_all_by_date.call_args_list] == [
+            date(2019, 4, 9),
+            date(2019, 4, 10),
+            date(2019, 4, 11),
+            date(2019, 4, 12),
+        ]
+        assert dao_exchange_rate_mock.insert_exchange_rate_to_db.call_count == 3
+
+    @staticmethod
+    def test_update_rates_in_range__days_locked_by_another_runner(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        frankfurter_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Locked days are not requested, the ones whose rates are still not stored by the other runner are failed.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        stored_days = set()
+
+        def _try_lock(_, day):
+            """
+            Another runner holds locks of 9th and 10th April, it stores rates of 9th April meanwhile.
+
+            :type day: datetime.date
+            :rtype: contextlib.AbstractContextManager
+            """
+            if day == date(2019, 4, 9):
+                stored_days.add(day)
+            return nullcontext(day not in (date(2019, 4, 9), date(2019, 4, 10)))
+
+        dao_advisory_lock_mock = Mock(DaoAdvisoryLock)
+        dao_advisory_lock_mock.try_lock.side_effect = _try_lock
+        dao_exchange_rate_mock.has_rates_by_date_provider.side_effect = lambda day, _: day in stored_days
+        frankfurter_mock.get_all_by_date.return_value = {"EUR": Decimal(0.89)}
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [frankfurter_mock],
+            base_currency,
+            currencies,
+            dao_advisory_lock=dao_advisory_lock_mock,
+        )
+        failed_days = exchange_rate_manager.update_rates_in_range(frankfurter_mock, date(2019, 4, 8), date(2019, 4, 11), logger)
+
+        assert failed_days == [date(2019, 4, 10)]
+        assert [call[0][0] for call in frankfurter_mock.get_all_by_date.call_args_list] == [date(2019, 4, 8), date(2019, 4, 11)]
+
 
 class TestGetOrUpdateRateByDate:
     @staticmethod
@@ -140,16 +364,13 @@ class TestGetOrUpdateRateByDate:
         dao_exchange_rate_mock.get_rates_by_date_currency.return_value = [
             ExchangeRate(provider=Provider(name=CurrencyLayer.name), date=_date, currency="EUR", rate=Decimal(0.77)),
         ]
-        dao_exchange_rate_mock.insert_new_rate.return_value = [
-            ExchangeRate(provider=Provider(name=GrandTrunk.name), date=_date, currency="EUR", rate=Decimal(0.75)),
-        ]
 
         exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(_date, currency="EUR", logger=logger)
 
-        insert_new_rate_args, _ = dao_exchange_rate_mock.insert_new_rate.call_args
+        (records,), _ = dao_exchange_rate_mock.store_new_rates.call_args
 
-        assert dao_exchange_rate_mock.insert_new_rate.call_count == 1
-        assert insert_new_rate_args[1].name == GrandTrunk.name
+        assert dao_exchange_rate_mock.store_new_rates.call_count == 1
+        assert records == [{"date": _date, "provider_id": 2, "currency": "EUR", "rate": Decimal(0.75)}]
         assert len(exchange_rates) == 2
 
     @staticmethod
@@ -287,16 +508,13 @@ class TestGetOrUpdateRateByDate:
             ExchangeRate(provider=Provider(name=CurrencyLayer.name), date=today, currency="EUR", rate=Decimal(0.77)),
         ]
         dao_exchange_rate_mock.get_rate_by_date_currency_provider.return_value = []
-        dao_exchange_rate_mock.insert_new_rate.return_value = [
-            ExchangeRate(provider=Provider(name=GrandTrunk.name), date=today, currency="EUR", rate=Decimal(0.75)),
-        ]
 
         exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(today, currency="EUR", logger=logger)
 
-        insert_new_rate_args, _ = dao_exchange_rate_mock.insert_new_rate.call_args
+        (records,), _ = dao_exchange_rate_mock.store_new_rates.call_args
 
-        assert dao_exchange_rate_mock.insert_new_rate.call_count == 1
-        assert insert_new_rate_args[1].name == GrandTrunk.name
+        assert dao_exchange_rate_mock.store_new_rates.call_count == 1
+        assert records == [{"date": today, "provider_id": 2, "currency": "EUR", "rate": Decimal(0.75)}]
         assert dao_exchange_rate_mock.get_rate_by_date_currency_provider.call_count == 1
         assert dao_exchange_rate_mock.get_rate_by_date_currency_provider.call_args[0] == (yesterday, "EUR", GrandTrunk.name)
         assert len(exchange_rates) == 2
@@ -335,6 +553,7 @@ class TestGetOrUpdateRateByDate:
         )
 
         dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+        grandtrunk_mock.get_by_date.return_value = Decimal(0.75)
 
         exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(yesterday, currency="EUR", logger=logger)
 
@@ -345,6 +564,334 @@ class TestGetOrUpdateRateByDate:
         assert fixer_mock.get_by_date.call_count == 0
         assert len(exchange_rates) == 1
 
+    @staticmethod
+    def test_get_or_update_rate_by_date__deadline_exceeded(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        currency_layer_mock,
+        grandtrunk_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Providers are not requested once the deadline of the request is exceeded, rates from DB are returned.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param currency_layer_mock: Mock of gold_digger.data_providers.CurrencyLayer
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        _date = date(2016, 2, 17)
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [currency_layer_mock, grandtrunk_mock],
+            base_currency,
+            currencies,
+        )
+
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = [
+            ExchangeRate(provider=Provider(name=CurrencyLayer.name), date=_date, currency="EUR", rate=Decimal(0.77)),
+        ]
+
+        exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(_date, currency="EUR", logger=logger, deadline=Deadline(0))
+
+        assert grandtrunk_mock.get_by_date.call_count == 0
+        assert dao_exchange_rate_mock.store_new_rates.call_count == 0
+        assert len(exchange_rates) == 1
+
+    @staticmethod
+    def test_get_or_update_rate_by_date__known_misses_are_not_requested(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        currency_layer_mock,
+        grandtrunk_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Provider which recently had no rate for the historical date is skipped, new misses are recorded.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param currency_layer_mock: Mock of gold_digger.data_providers.CurrencyLayer
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        _date = date(2016, 2, 17)
+        dao_provider_miss_mock = Mock(DaoProviderMiss)
+        dao_provider_miss_mock.get_active_misses.return_value = {(GrandTrunk.name, "EUR")}
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+        grandtrunk_mock.get_by_date.return_value = None
+        currency_layer_mock.has_request_limit = False
+        currency_layer_mock.get_all_by_date.return_value = {}
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [currency_layer_mock, grandtrunk_mock],
+            base_currency,
+            currencies,
+            dao_provider_miss=dao_provider_miss_mock,
+        )
+
+        exchange_rates = exchange_rate_manager.get_or_update_rates_by_date(_date, ["EUR", "CZK"], logger)
+
+        (records, _), _ = dao_provider_miss_mock.record_misses.call_args
+        assert exchange_rates == {"EUR": [], "CZK": []}
+        assert [args[1] for args, _ in grandtrunk_mock.get_by_date.call_args_list] == ["CZK"]
+        assert sorted((r["provider_id"], r["currency"]) for r in records) == [(1, "CZK"), (1, "EUR"), (2, "CZK")]
+        assert dao_exchange_rate_mock.store_new_rates.call_count == 0
+
+    @staticmethod
+    def test_get_or_update_rate_by_date__failed_requests_are_not_recorded_as_misses(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Provider which timed out may have the rate, so it's requested again by the next request for the historical date.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        transport = HttpTransport("gold-digger", max_retries=0)
+        transport.session.get = Mock(side_effect=Timeout("Read timed out."))
+        grandtrunk = GrandTrunk(base_currency, "gold-digger", transport, supported_currencies_cache={hashkey(date.today()): currencies})
+        dao_provider_miss_mock = Mock(DaoProviderMiss)
+        dao_provider_miss_mock.get_active_misses.return_value = set()
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [grandtrunk],
+            base_currency,
+            currencies,
+            dao_provider_miss=dao_provider_miss_mock,
+        )
+        exchange_rates = exchange_rate_manager.get_or_update_rates_by_date(date(2016, 2, 17), ["EUR", "CZK"], logger)
+
+        assert exchange_rates == {"EUR": [], "CZK": []}
+        assert transport.session.get.call_count == 2
+        assert dao_provider_miss_mock.record_misses.call_count == 0
+
+    @staticmethod
+    def test_get_or_update_rate_by_date__no_api_requests_for_days_without_publication(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        frankfurter_mock,
+        grandtrunk_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Frankfurter doesn't publish rates on weekends, so it is not requested for historical Saturday.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        saturday = date(2019, 4, 20)
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+        grandtrunk_mock.get_by_date.return_value = Decimal(0.89)
+
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [frankfurter_mock, grandtrunk_mock], base_currency, currencies)
+        exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(saturday, currency="EUR", logger=logger)
+
+        assert frankfurter_mock.get_by_date.call_count == 0
+        assert frankfurter_mock.get_supported_currencies.call_count == 0
+        assert grandtrunk_mock.get_by_date.call_count == 1
+        assert [r.rate for r in exchange_rates] == [Decimal(0.89)]
+
+    @staticmethod
+    def test_get_or_update_rate_by_date__providers_with_open_circuit_are_skipped(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        frankfurter_mock,
+        grandtrunk_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        frankfurter_mock.circuit_breaker = CircuitBreaker(min_requests=1)
+        frankfurter_mock.circuit_breaker.record(15, success=False)
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+        grandtrunk_mock.get_by_date.return_value = Decimal(0.89)
+
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [frankfurter_mock, grandtrunk_mock], base_currency, currencies)
+        exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(date(2019, 4, 17), currency="EUR", logger=logger)
+
+        assert frankfurter_mock.get_all_by_date.call_count == 0
+        assert [r.rate for r in exchange_rates] == [Decimal(0.89)]
+
+    @staticmethod
+    def test_get_or_update_rate_by_date__whole_day_is_prefetched(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        frankfurter_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Frankfurter returns rates of all currencies by one request, so whole day is requested and stored instead of the single rate.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        _date = date(2019, 4, 17)
+        dao_provider_mock.get_or_create_provider_by_name.side_effect = lambda name: Provider(id=3, name=name)
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [frankfurter_mock], base_currency, currencies)
+        exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(_date, currency="EUR", logger=logger)
+
+        (records,), _ = dao_exchange_rate_mock.store_new_rates.call_args
+        assert frankfurter_mock.get_by_date.call_count == 0
+        assert frankfurter_mock.get_all_by_date.call_args[0][0] == _date
+        assert sorted(r["currency"] for r in records) == ["EUR", "USD"]
+        assert [(r.currency, r.rate) for r in exchange_rates] == [("EUR", Decimal(0.89))]
+
+
+class TestHedgedRequests:
+    @staticmethod
+    def test_slow_provider_is_hedged(dao_exchange_rate_mock, dao_provider_mock, frankfurter_mock, grandtrunk_mock, base_currency, currencies, logger):
+        """
+        The first provider doesn't answer within its latency percentile, so the next provider is requested and its answer is taken.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        release = Event()
+        frankfurter_mock.get_all_by_date.side_effect = lambda *_: release.wait(5) and {"EUR": Decimal(0.89)}
+        grandtrunk_mock.get_by_date.return_value = Decimal(0.75)
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [frankfurter_mock, grandtrunk_mock],
+            base_currency,
+            currencies,
+            hedge_percentile=0.95,
+            hedge_default_delay=0.05,
+        )
+        try:
+            exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(date(2019, 4, 17), currency="EUR", logger=logger)
+        finally:
+            release.set()
+
+        assert [r.rate for r in exchange_rates] == [Decimal(0.75)]
+        assert grandtrunk_mock.statistics.snapshot()["hedges"] == 1
+        assert grandtrunk_mock.statistics.snapshot()["hedge_win_rate"] == 1.0
+
+    @staticmethod
+    def test_fast_provider_is_not_hedged(dao_exchange_rate_mock, dao_provider_mock, frankfurter_mock, grandtrunk_mock, base_currency, currencies, logger):
+        """
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_provider_mock.get_or_create_provider_by_name.side_effect = lambda name: Provider(id=3, name=name)
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [frankfurter_mock, grandtrunk_mock],
+            base_currency,
+            currencies,
+            hedge_percentile=0.95,
+            hedge_default_delay=5,
+        )
+        exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(date(2019, 4, 17), currency="EUR", logger=logger)
+
+        assert [r.rate for r in exchange_rates] == [Decimal(0.89)]
+        assert grandtrunk_mock.get_by_date.call_count == 0
+        assert grandtrunk_mock.statistics.snapshot()["hedges"] == 0
+
+    @staticmethod
+    def test_unreliable_provider_is_requested_last(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        frankfurter_mock,
+        grandtrunk_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Providers are requested by their expected latency, failing provider is requested only if the others don't answer.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        for _ in range(ProviderStatistics.LATENCY_MIN_SAMPLES):
+            frankfurter_mock.statistics.record_request(0.1, success=False)
+        grandtrunk_mock.get_by_date.return_value = Decimal(0.75)
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [frankfurter_mock, grandtrunk_mock],
+            base_currency,
+            currencies,
+            hedge_percentile=0.95,
+            hedge_default_delay=5,
+        )
+        exchange_rates = exchange_rate_manager.get_or_update_rate_by_date(date(2019, 4, 17), currency="EUR", logger=logger)
+
+        assert [r.rate for r in exchange_rates] == [Decimal(0.75)]
+        assert frankfurter_mock.get_all_by_date.call_count == 0
+        assert frankfurter_mock.get_by_date.call_count == 0
+
 
 class TestGetExchangeRateByDate:
     @staticmethod
@@ -375,6 +922,196 @@ class TestGetExchangeRateByDate:
 
         assert exchange_rate == Decimal(24.20) / Decimal(0.89)
 
+    @staticmethod
+    def test_get_exchange_rate_by_date__missing_rates_are_requested_concurrently(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        grandtrunk_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Missing rates of both currencies are requested at the same time and stored to database at once.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        _date = date(2016, 2, 17)
+        barrier = Barrier(2, timeout=5)
+
+        def _get_by_date(_, currency, __):
+            """
+            Both requests have to be running at the same time to pass the barrier.
+
+            :type currency: str
+            :rtype: decimal.Decimal
+            """
+            barrier.wait()
+            return {"EUR": Decimal(0.89), "CZK": Decimal(24.20)}[currency]
+
+        grandtrunk_mock.get_by_date.side_effect = _get_by_date
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [grandtrunk_mock], base_currency, currencies)
+        exchange_rate = exchange_rate_manager.get_exchange_rate_by_date(_date, "EUR", "CZK", logger)
+
+        assert exchange_rate == Decimal(24.20) / Decimal(0.89)
+        assert dao_exchange_rate_mock.store_new_rates.call_count == 2
+
+    @staticmethod
+    def test_get_exchange_rate_by_date__concurrent_requests_of_same_missing_rate_are_coalesced(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        grandtrunk_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Second request arrives while the provider is still being requested for the first one, so it waits for its result.
+        Provider is requested only once and only the first request stores the rate.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        _date = date(2016, 2, 17)
+        started = Event()
+
+        def _get_by_date(*_):
+            """
+            :rtype: decimal.Decimal
+            """
+            started.set()
+            sleep(0.2)
+            return Decimal(0.89)
+
+        grandtrunk_mock.get_by_date.side_effect = _get_by_date
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [grandtrunk_mock], base_currency, currencies)
+        results = {}
+
+        def _request(name):
+            """
+            :type name: str
+            """
+            results[name] = exchange_rate_manager.get_or_update_rate_by_date(_date, "EUR", logger)
+
+        first = Thread(target=_request, args=("first",))
+        first.start()
+        assert started.wait(5)
+        second = Thread(target=_request, args=("second",))
+        second.start()
+        first.join(5)
+        second.join(5)
+
+        assert [r.rate for r in results["first"]] == [Decimal(0.89)]
+        assert [r.rate for r in results["second"]] == [Decimal(0.89)]
+        assert grandtrunk_mock.get_by_date.call_count == 1
+        assert dao_exchange_rate_mock.store_new_rates.call_count == 1
+
+    @staticmethod
+    def test_get_exchange_rate_by_date__queries_of_calls_are_recorded_to_caller(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        grandtrunk_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Rates are stored by threads of the calls, their queries count to query budget of the API request.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        grandtrunk_mock.get_by_date.return_value = Decimal(0.89)
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+        dao_exchange_rate_mock.store_new_rates.side_effect = lambda _: QueryStatistics.current().record("INSERT", 0.1)
+
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [grandtrunk_mock], base_currency, currencies)
+        query_statistics = QueryStatistics()
+        with use_query_statistics(query_statistics):
+            exchange_rate_manager.get_or_update_rate_by_date(date(2016, 2, 17), "EUR", logger)
+
+        assert query_statistics.count == 1
+
+    @staticmethod
+    def test_get_exchange_rate_by_date__rate_is_stored_after_deadline_of_callers(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        grandtrunk_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Provider answers after deadlines of both the first request and the second one waiting for the same call.
+        Neither request waits beyond its deadline and the rate is stored by the call anyway.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param grandtrunk_mock: Mock of gold_digger.data_providers.GrandTrunk
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        _date = date(2016, 2, 17)
+        started = Event()
+        release = Event()
+        stored = Event()
+
+        def _get_by_date(*_):
+            """
+            :rtype: decimal.Decimal
+            """
+            started.set()
+            release.wait(5)
+            return Decimal(0.89)
+
+        grandtrunk_mock.get_by_date.side_effect = _get_by_date
+        dao_exchange_rate_mock.get_rates_by_date_currency.return_value = []
+        dao_exchange_rate_mock.store_new_rates.side_effect = lambda _: stored.set()
+
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [grandtrunk_mock], base_currency, currencies)
+        results = {}
+
+        def _request(name):
+            """
+            :type name: str
+            """
+            results[name] = exchange_rate_manager.get_or_update_rate_by_date(_date, "EUR", logger, deadline=Deadline(0.2))
+
+        first = Thread(target=_request, args=("first",))
+        first.start()
+        assert started.wait(5)
+        second = Thread(target=_request, args=("second",))
+        second.start()
+        first.join(5)
+        second.join(5)
+
+        assert results == {"first": [], "second": []}
+        assert dao_exchange_rate_mock.store_new_rates.call_count == 0
+
+        release.set()
+        assert stored.wait(5)
+        (records,), _ = dao_exchange_rate_mock.store_new_rates.call_args
+        assert records == [{"date": _date, "provider_id": 2, "currency": "EUR", "rate": Decimal(0.89)}]
+        assert grandtrunk_mock.get_by_date.call_count == 1
+
 
 class TestGetAverageExchangeRateByDates:
     @staticmethod
@@ -412,6 +1149,42 @@ class TestGetAverageExchangeRateByDates:
         assert exchange_rate == czk_average * (1 / eur_average)
         assert logger_mock.warning.call_count == 1
 
+    @staticmethod
+    def test_get_average_exchange_rate_by_dates__providers_are_not_created(
+        dao_exchange_rate_mock,
+        dao_provider_mock,
+        currency_layer_mock,
+        frankfurter_mock,
+        base_currency,
+        currencies,
+        logger,
+    ):
+        """
+        Provider which is not in database yet has no rates, it's skipped by the read-only request.
+
+        :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
+        :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param currency_layer_mock: Mock of gold_digger.data_providers.CurrencyLayer
+        :param frankfurter_mock: Mock of gold_digger.data_providers.Frankfurter
+        :type base_currency: str
+        :type currencies: set[str]
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_exchange_rate_mock.get_sum_of_rates_in_period.return_value = [[Provider(id=1, name=CurrencyLayer.name), 5, Decimal(5)]]
+
+        exchange_rate_manager = ExchangeRateManager(
+            dao_exchange_rate_mock,
+            dao_provider_mock,
+            [currency_layer_mock, frankfurter_mock],
+            base_currency,
+            currencies,
+        )
+        exchange_rate = exchange_rate_manager.get_average_exchange_rate_by_dates(date(2019, 4, 8), date(2019, 4, 12), "EUR", "CZK", logger)
+
+        assert exchange_rate == Decimal(1)
+        assert [call[0][0] for call in dao_provider_mock.get_provider_by_name.call_args_list] == [CurrencyLayer.name, Frankfurter.name]
+        assert dao_provider_mock.get_or_create_provider_by_name.call_count == 0
+
 
 class TestPickTheBest:
     @staticmethod
@@ -462,10 +1235,11 @@ class TestPickTheBest:
 
 class TestGetExchangeRateInIntervalsByDate:
     @staticmethod
-    def test_get_exchange_rate_in_intervals_by_date(dao_exchange_rate_mock, dao_provider_mock, base_currency, currencies, logger):
+    def test_get_exchange_rate_in_intervals_by_date(dao_exchange_rate_mock, dao_provider_mock, currency_layer_mock, base_currency, currencies, logger):
         """
         :param dao_exchange_rate_mock: Mock of gold_digger.database.DaoExchangeRate
         :param dao_provider_mock: Mock of gold_digger.database.DaoProvider
+        :param currency_layer_mock: Mock of gold_digger.data_providers.CurrencyLayer
         :type base_currency: str
         :type currencies: set[str]
         :type logger: gold_digger.utils.ContextLogger
@@ -492,7 +1266,7 @@ class TestGetExchangeRateInIntervalsByDate:
         }
         dao_exchange_rate_mock.get_sum_of_rates_in_period.side_effect = lambda start_date, _, currency: sum_of_rates[currency][start_date]
         dao_exchange_rate_mock.get_rates_by_date_currency.side_effect = lambda _, currency: rates[currency]
-        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [provider], base_currency, currencies)
+        exchange_rate_manager = ExchangeRateManager(dao_exchange_rate_mock, dao_provider_mock, [currency_layer_mock], base_currency, currencies)
 
         exchange_rate_in_intervals = exchange_rate_manager.get_exchange_rate_in_intervals_by_date(date_of_exchange_, "EUR", "CZK", logger)
 
@@ -0,0 +1,57 @@
+from unittest.mock import Mock
+
+import pytest
+
+from gold_digger.data_providers import Frankfurter, GrandTrunk, Yahoo
+from gold_digger.managers.fetch_planner import FetchCall, FetchPlanner
+
+
+def _provider_mock(provider_class):
+    """
+    :type provider_class: type[gold_digger.data_providers.Provider]
+    :return: Mock of gold_digger.data_providers.Provider
+    """
+    mock = Mock(provider_class)
+    mock.name = provider_class.name
+    mock.capabilities = provider_class.capabilities
+    return mock
+
+
+@pytest.fixture
+def planner():
+    """
+    :rtype: gold_digger.managers.fetch_planner.FetchPlanner
+    """
+    return FetchPlanner({f"C{i:02}" for i in range(100)})
+
+
+class TestPlan:
+    @staticmethod
+    def test_plan__whole_day_is_prefetched_by_one_request(planner):
+        """
+        :type planner: gold_digger.managers.fetch_planner.FetchPlanner
+        """
+        frankfurter = _provider_mock(Frankfurter)
+
+        assert planner.plan([("EUR", 0, frankfurter), ("CZK", 0, frankfurter)]) == [FetchCall(frankfurter)]
+
+    @staticmethod
+    def test_plan__per_currency_requests_are_cheaper(planner):
+        """
+        :type planner: gold_digger.managers.fetch_planner.FetchPlanner
+        """
+        grandtrunk = _provider_mock(GrandTrunk)
+
+        assert planner.plan([("EUR", 1, grandtrunk), ("CZK", 1, grandtrunk)]) == [FetchCall(grandtrunk, "CZK"), FetchCall(grandtrunk, "EUR")]
+
+    @staticmethod
+    def test_plan__batched_provider(planner):
+        """
+        Yahoo needs 5 requests for 100 currencies in batches of 20.
+
+        :type planner: gold_digger.managers.fetch_planner.FetchPlanner
+        """
+        yahoo = _provider_mock(Yahoo)
+
+        assert len(planner.plan([(f"C{i:02}", 2, yahoo) for i in range(4)])) == 4
+        assert planner.plan([(f"C{i:02}", 2, yahoo) for i in range(5)]) == [FetchCall(yahoo)]
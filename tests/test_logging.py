@@ -0,0 +1,75 @@
+import logging
+import sys
+from logging.handlers import QueueListener
+from queue import SimpleQueue
+
+from gold_digger.utils._context_logger import message_hash
+from gold_digger.utils.custom_logging import DebugSamplingFilter, LocalQueueHandler
+
+
+def _record(level, flow_id=None):
+    """
+    :type level: int
+    :type flow_id: None | str
+    :rtype: logging.LogRecord
+    """
+    record = logging.LogRecord("gold-digger", level, __file__, 1, "message", None, None)
+    if flow_id is not None:
+        record.flow_id = flow_id
+    return record
+
+
+class TestDebugSamplingFilter:
+    @staticmethod
+    def test_debug_records_are_sampled_by_flow():
+        debug_filter = DebugSamplingFilter(0.5)
+        flows = [f"flow-{i}" for i in range(1000)]
+
+        passed = [flow_id for flow_id in flows if debug_filter.filter(_record(logging.DEBUG, flow_id))]
+
+        assert 400 < len(passed) < 600
+        assert all(debug_filter.filter(_record(logging.DEBUG, flow_id)) for flow_id in passed)
+
+    @staticmethod
+    def test_other_levels_are_not_sampled():
+        debug_filter = DebugSamplingFilter(0.0)
+
+        assert not debug_filter.filter(_record(logging.DEBUG, "flow"))
+        assert debug_filter.filter(_record(logging.INFO, "flow"))
+
+
+class TestLocalQueueHandler:
+    @staticmethod
+    def test_exception_info_reaches_target_handler():
+        records = []
+        target = logging.Handler()
+        target.emit = records.append
+        queue_handler = LocalQueueHandler(SimpleQueue())
+        listener = QueueListener(queue_handler.queue, target)
+        listener.start()
+
+        try:
+            raise ValueError("failure")
+        except ValueError:
+            record = logging.LogRecord("gold-digger", logging.ERROR, __file__, 1, "message %s", ("arg",), sys.exc_info())
+            queue_handler.handle(record)
+        listener.stop()
+
+        assert records == [record]
+        assert records[0].exc_info[0] is ValueError
+        assert records[0].args == ("arg",)
+        assert records[0].exc_text is None
+
+
+class TestContextLogger:
+    @staticmethod
+    def test_message_hash(logger, caplog):
+        """
+        :type logger: gold_digger.utils.ContextLogger
+        :type caplog: _pytest.logging.LogCaptureFixture
+        """
+        with caplog.at_level(logging.INFO):
+            logger.info("Rate %s", 1)
+
+        assert caplog.records[0].message_hash == "12aeab7363fc5700a6f623d8538d9718"
+        assert message_hash.cache_info().currsize > 0
@@ -0,0 +1,42 @@
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+
+from gold_digger.data_providers import Frankfurter
+from gold_digger.utils.metrics import instrument_engine, render_metrics
+
+
+def _sample(name, **labels):
+    """
+    :type name: str
+    :rtype: float
+    """
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetrics:
+    @staticmethod
+    def test_provider_requests_are_observed(base_currency, http_user_agent):
+        """
+        :type base_currency: str
+        :type http_user_agent: str
+        """
+        frankfurter = Frankfurter(base_currency, http_user_agent)
+        requests_before = _sample("gold_digger_provider_request_duration_seconds_count", provider="frankfurter", outcome="error")
+        errors_before = _sample("gold_digger_provider_errors_total", provider="frankfurter")
+
+        frankfurter.statistics.record_request(0.2, success=False)
+
+        assert _sample("gold_digger_provider_request_duration_seconds_count", provider="frankfurter", outcome="error") == requests_before + 1
+        assert _sample("gold_digger_provider_errors_total", provider="frankfurter") == errors_before + 1
+        assert b'gold_digger_provider_errors_total{provider="frankfurter"}' in render_metrics()
+
+    @staticmethod
+    def test_db_queries_are_observed():
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+        queries_before = _sample("gold_digger_db_query_duration_seconds_count", statement="SELECT")
+
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+
+        assert _sample("gold_digger_db_query_duration_seconds_count", statement="SELECT") == queries_before + 1
@@ -0,0 +1,121 @@
+from os import utime
+from time import monotonic, sleep
+from unittest.mock import Mock
+
+import falcon
+import pytest
+
+from gold_digger import settings
+from gold_digger.api_server.helpers import http_api_logger, is_profiled
+from gold_digger.utils.profiler import prune_profiles, StackSampler
+
+
+class Route:
+    @http_api_logger
+    def on_get(self, req, resp, logger):
+        """
+        :type req: falcon.request.Request
+        :type resp: falcon.response.Response
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        sleep(0.05)
+        resp.status = falcon.HTTP_200
+
+
+@pytest.fixture
+def req():
+    """
+    :return: Mock of falcon.request.Request
+    """
+    mock = Mock(falcon.Request)
+    mock.context = Mock(flow_id="flow-id")
+    mock.get_header.return_value = None
+    return mock
+
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    """
+    :type monkeypatch: _pytest.monkeypatch.MonkeyPatch
+    :type tmp_path: pathlib.Path
+    :rtype: pathlib.Path
+    """
+    monkeypatch.setattr(settings, "API_PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "API_PROFILING_TOKEN", "secret")
+    monkeypatch.setattr(settings, "API_PROFILING_SAMPLE_RATE", 0.0)
+    return tmp_path
+
+
+def _busy(seconds):
+    """
+    :type seconds: float
+    """
+    end = monotonic() + seconds
+    while monotonic() < end:
+        pass
+
+
+class TestStackSampler:
+    @staticmethod
+    def test_collapsed_stacks():
+        with StackSampler(interval=0.001) as sampler:
+            _busy(0.05)
+
+        stack, count = sampler.collapsed().splitlines()[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert stack.split(";")[-1].startswith("_busy (test_profiler.py:")
+
+
+class TestPruneProfiles:
+    @staticmethod
+    def test_oldest_profiles_are_removed(tmp_path):
+        """
+        :type tmp_path: pathlib.Path
+        """
+        for i in range(5):
+            profile = tmp_path / f"flow-{i}.collapsed"
+            profile.write_text("main 1\n")
+            utime(profile, (1000 + i, 1000 + i))
+        (tmp_path / "notes.txt").write_text("not a profile")
+
+        assert prune_profiles(str(tmp_path), 3) == 2
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["flow-2.collapsed", "flow-3.collapsed", "flow-4.collapsed", "notes.txt"]
+        assert prune_profiles(str(tmp_path), 3) == 0
+
+
+class TestProfiledRequest:
+    @staticmethod
+    def test_request_with_admin_header_is_profiled(req, profiling):
+        """
+        :param req: Mock of falcon.request.Request
+        :type profiling: pathlib.Path
+        """
+        req.get_header.side_effect = {settings.API_PROFILING_HEADER: "secret"}.get
+
+        Route().on_get(req, Mock(falcon.Response))
+
+        assert "on_get (test_profiler.py:" in (profiling / "flow-id.collapsed").read_text()
+
+    @staticmethod
+    def test_request_is_not_profiled(req, profiling):
+        """
+        :param req: Mock of falcon.request.Request
+        :type profiling: pathlib.Path
+        """
+        req.get_header.side_effect = {settings.API_PROFILING_HEADER: "wrong"}.get
+
+        assert not is_profiled(req)
+
+        req.get_header.side_effect = {}.get
+
+        assert not is_profiled(req)
+
+    @staticmethod
+    def test_profiling_is_disabled_by_default(req):
+        """
+        :param req: Mock of falcon.request.Request
+        """
+        req.get_header.side_effect = {settings.API_PROFILING_HEADER: "secret"}.get
+
+        assert not is_profiled(req)
+        assert req.get_header.call_count == 0
@@ -0,0 +1,74 @@
+from unittest.mock import Mock
+
+import falcon
+import pytest
+
+from gold_digger import settings
+from gold_digger.api_server.helpers import http_api_logger, query_budget
+from gold_digger.utils import QueryBudgetExceeded, QueryStatistics
+
+
+class Route:
+    def __init__(self, queries):
+        """
+        :type queries: int
+        """
+        self.queries = queries
+
+    @http_api_logger
+    @query_budget(2)
+    def on_get(self, req, resp, logger):
+        """
+        :type req: falcon.request.Request
+        :type resp: falcon.response.Response
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        for duration in range(self.queries):
+            QueryStatistics.current().record(f"SELECT {duration}", duration)
+        resp.status = falcon.HTTP_200
+
+
+@pytest.fixture
+def req():
+    """
+    :return: Mock of falcon.request.Request
+    """
+    mock = Mock(falcon.Request)
+    mock.context = Mock(flow_id="flow-id")
+    return mock
+
+
+class TestQueryBudget:
+    @staticmethod
+    def test_query_statistics_are_logged(req, caplog):
+        """
+        :param req: Mock of falcon.request.Request
+        :type caplog: _pytest.logging.LogCaptureFixture
+        """
+        Route(queries=2).on_get(req, Mock(falcon.Response))
+
+        (completed,) = [record for record in caplog.records if record.getMessage() == "Completed API request on_get."]
+        assert completed.db_query_count == 2
+        assert completed.db_duration_in_secs == 1
+        assert completed.db_slowest_queries == ["1.0000s SELECT 1", "0.0000s SELECT 0"]
+
+    @staticmethod
+    def test_exceeded_budget_is_logged(req, caplog):
+        """
+        :param req: Mock of falcon.request.Request
+        :type caplog: _pytest.logging.LogCaptureFixture
+        """
+        Route(queries=3).on_get(req, Mock(falcon.Response))
+
+        assert "API request on_get exceeded its query budget (2)." in caplog.messages
+
+    @staticmethod
+    def test_exceeded_budget_fails_in_strict_mode(req, monkeypatch):
+        """
+        :param req: Mock of falcon.request.Request
+        :type monkeypatch: _pytest.monkeypatch.MonkeyPatch
+        """
+        monkeypatch.setattr(settings, "API_QUERY_BUDGET_STRICT", 1)
+
+        with pytest.raises(QueryBudgetExceeded):
+            Route(queries=3).on_get(req, Mock(falcon.Response))
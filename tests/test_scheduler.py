@@ -0,0 +1,97 @@
+from datetime import datetime
+from threading import Event
+from time import sleep
+from unittest.mock import Mock
+
+import pytest
+
+from gold_digger.scheduler import Job, Scheduler
+from gold_digger.utils import Deadline
+
+
+@pytest.fixture
+def container(logger):
+    """
+    :type logger: gold_digger.utils.ContextLogger
+    :return: Mock of gold_digger.di.DiContainer
+    """
+    mock = Mock()
+    mock.logger.return_value = logger
+    return mock
+
+
+class TestJob:
+    @staticmethod
+    def test_next_run():
+        job = Job("update", "5 0 * * *", Mock(), 60)
+
+        assert job.next_run(datetime(2019, 4, 17, 0, 5)) == datetime(2019, 4, 18, 0, 5)
+
+
+class TestScheduler:
+    @staticmethod
+    def test_run__job_is_called_within_its_deadline(container, logger):
+        """
+        :param container: Mock of gold_digger.di.DiContainer
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        deadlines = []
+        scheduler = Scheduler(container, [], logger)
+
+        outcome = scheduler.run(Job("update", "5 0 * * *", lambda *_: deadlines.append(Deadline.current()), 60))
+
+        assert outcome == "success"
+        assert deadlines[0].timeout == 60
+
+    @staticmethod
+    def test_run__outcomes_of_failed_and_timed_out_jobs(container, logger):
+        """
+        :param container: Mock of gold_digger.di.DiContainer
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        scheduler = Scheduler(container, [], logger)
+
+        assert scheduler.run(Job("failing", "5 0 * * *", Mock(side_effect=ValueError), 60)) == "failure"
+        assert container.db_session.rollback.call_count == 1
+        assert scheduler.run(Job("slow", "5 0 * * *", lambda *_: sleep(0.05), 0.01)) == "timeout"
+        assert container.db_session.close.call_count == 2
+
+    @staticmethod
+    def test_health_check__reports_running_job(container, logger):
+        """
+        :param container: Mock of gold_digger.di.DiContainer
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        started = Event()
+        release = Event()
+        job = Job("update", "5 0 * * *", lambda *_: started.set() or release.wait(5), 60)
+        scheduler = Scheduler(container, [job], logger)
+
+        assert scheduler.health_check() == {}
+        scheduler.submit(job)
+        assert started.wait(5)
+        assert list(scheduler.health_check()) == ["update"]
+        release.set()
+        scheduler.stop()
+        scheduler.run_forever()  # waits for the running job
+
+        assert scheduler.health_check() == {}
+
+    @staticmethod
+    def test_submit__overlapping_run_is_skipped(container, logger):
+        """
+        :param container: Mock of gold_digger.di.DiContainer
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        release = Event()
+        func = Mock(side_effect=lambda *_: release.wait(5))
+        job = Job("update", "5 0 * * *", func, 60)
+        scheduler = Scheduler(container, [job], logger)
+
+        assert scheduler.submit(job) is True
+        assert scheduler.submit(job) is False
+        release.set()
+        scheduler.stop()
+        scheduler.run_forever()  # waits for the running job
+
+        assert func.call_count == 1
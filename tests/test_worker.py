@@ -0,0 +1,98 @@
+from datetime import date, datetime
+from unittest.mock import Mock
+
+import pytest
+
+from gold_digger.database.db_model import IngestionJob
+from gold_digger.utils import Deadline
+from gold_digger.worker import Worker
+
+
+@pytest.fixture
+def container(logger):
+    """
+    :type logger: gold_digger.utils.ContextLogger
+    :return: Mock of gold_digger.di.DiContainer
+    """
+    mock = Mock()
+    mock.logger.return_value = logger
+    mock.data_providers = {"fixer.io": Mock()}
+    return mock
+
+
+@pytest.fixture
+def dao_ingestion_job_mock():
+    """
+    :return: Mock of gold_digger.database.DaoIngestionJob
+    """
+    mock = Mock()
+    mock.visibility_timeout = 100
+    mock.complete.return_value = True
+    mock.fail.return_value = True
+    return mock
+
+
+@pytest.fixture
+def job():
+    """
+    :rtype: gold_digger.database.db_model.IngestionJob
+    """
+    return IngestionJob(id=1, provider="fixer.io", start_date=date(2019, 1, 1), end_date=date(2019, 1, 31), attempts=1, max_attempts=2)
+
+
+class TestWorker:
+    @staticmethod
+    def test_run__job_is_completed_within_visibility_timeout(container, dao_ingestion_job_mock, job, logger):
+        """
+        :param container: Mock of gold_digger.di.DiContainer
+        :param dao_ingestion_job_mock: Mock of gold_digger.database.DaoIngestionJob
+        :type job: gold_digger.database.db_model.IngestionJob
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        deadlines = []
+        container.exchange_rate_manager.update_rates_in_range.side_effect = lambda *_: deadlines.append(Deadline.current()) or []
+        worker = Worker(container, dao_ingestion_job_mock, logger, poll_interval=1, clock=lambda: datetime(2019, 4, 17))
+
+        assert worker.run(job) == "done"
+        assert deadlines[0].timeout == 90
+        container.exchange_rate_manager.update_rates_in_range.assert_called_once_with(
+            container.data_providers["fixer.io"],
+            date(2019, 1, 1),
+            date(2019, 1, 31),
+            logger,
+        )
+        dao_ingestion_job_mock.complete.assert_called_once_with(job, datetime(2019, 4, 17))
+
+    @staticmethod
+    def test_run__failed_job_is_retried(container, dao_ingestion_job_mock, job, logger):
+        """
+        :param container: Mock of gold_digger.di.DiContainer
+        :param dao_ingestion_job_mock: Mock of gold_digger.database.DaoIngestionJob
+        :type job: gold_digger.database.db_model.IngestionJob
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        container.exchange_rate_manager.update_rates_in_range.return_value = [date(2019, 1, 2)]
+        worker = Worker(container, dao_ingestion_job_mock, logger, poll_interval=1, clock=lambda: datetime(2019, 4, 17))
+
+        assert worker.run(job) == "retry"
+        dao_ingestion_job_mock.fail.assert_called_once_with(job, "Rates of 1 days are missing: 2019-01-02", datetime(2019, 4, 17))
+
+        container.exchange_rate_manager.update_rates_in_range.side_effect = ValueError
+        dao_ingestion_job_mock.fail.return_value = False
+        job.attempts = 2
+
+        assert worker.run(job) == "failed"
+        assert container.db_session.rollback.call_count == 1
+
+    @staticmethod
+    def test_run_next__empty_queue(container, dao_ingestion_job_mock, logger):
+        """
+        :param container: Mock of gold_digger.di.DiContainer
+        :param dao_ingestion_job_mock: Mock of gold_digger.database.DaoIngestionJob
+        :type logger: gold_digger.utils.ContextLogger
+        """
+        dao_ingestion_job_mock.claim.return_value = None
+        worker = Worker(container, dao_ingestion_job_mock, logger, poll_interval=1)
+
+        assert worker.run_next() is False
+        container.exchange_rate_manager.update_rates_in_range.assert_not_called()